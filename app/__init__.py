@@ -1,14 +1,28 @@
+import atexit
+import json
+import os
+
+import click
 from flask import Flask, redirect, url_for
 from flask_cors import CORS
-from flask_jwt_extended import (
-    get_jwt_identity,
-    verify_jwt_in_request
-)
 from flask import request
-from app.extensions import db, ma, jwt, migrate, socketio
+from app.extensions import db, ma, jwt, migrate, socketio, scheduler
 from app.filters import register_filters
 from app.config import config
 from app.models import User
+from app.services.login_throttle_service import login_throttle
+from app.services.image_pipeline_service import image_pipeline
+from app.services.db_runtime_service import install_green_driver
+from app.services.offload_service import offloader
+from app.services.query_stats_service import query_stats
+from app.services.request_profiler_service import request_profiler
+from app.services.metrics_service import metrics
+from app.services.socket_rooms_service import socket_rooms
+from app.services.cache_service import app_cache
+from app.services.layout_service import layout_fragments, lazy_current_user
+from app.services.static_assets_service import static_assets
+from app.services.json_provider_service import install_json_provider
+from app.services.compression_service import response_compressor
 
 
 def create_app(config_name=None):
@@ -19,13 +33,26 @@ def create_app(config_name=None):
         "ENV", "development"
     )
     app.config.from_object(config[config_name])
+    install_json_provider(app)
 
     # Init extensions
+    install_green_driver(app)  # before the pool opens any connection
     db.init_app(app)
     ma.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
     socketio.init_app(app, async_mode="eventlet")
+    login_throttle.init_app(app)
+    image_pipeline.init_app(app)
+    offloader.init_app(app)
+    query_stats.init_app(app)  # before other before_request hooks so their queries count
+    request_profiler.init_app(app)
+    metrics.init_app(app)
+    socket_rooms.init_app(app)
+    app_cache.init_app(app)
+    static_assets.init_app(app)  # before the layout fragments render their url_for('static') links
+    response_compressor.init_app(app)
+    layout_fragments.init_app(app)
 
     # CORS (configurable)
     CORS(
@@ -47,17 +74,10 @@ def create_app(config_name=None):
     def unauthorized_callback(error):
         return redirect(url_for("auth.login_page"))
 
-    # Inject current user
+    # Inject current user; loaded on first use, so pages that never read it skip the query
     @app.context_processor
     def inject_user():
-        try:
-            verify_jwt_in_request(optional=True)
-            identity = get_jwt_identity()
-            if identity:
-                return {"user": User.query.get(identity)}
-        except Exception:
-            pass
-        return {"user": None}
+        return {"user": lazy_current_user}
 
     register_filters(app)
 
@@ -69,6 +89,7 @@ def create_app(config_name=None):
     from app.routes.coach import coach_bp
     from app.routes.dashboard import dashboard_bp
     from app.routes.player import athlete_bp
+    from app.routes.media import media_bp
 
     app.register_blueprint(home_bp)
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
@@ -77,23 +98,229 @@ def create_app(config_name=None):
     app.register_blueprint(coach_bp, url_prefix="/coach")
     app.register_blueprint(athlete_bp, url_prefix="/athlete")
     app.register_blueprint(dashboard_bp)
+    app.register_blueprint(media_bp, url_prefix="/media")
+    layout_fragments.warm(app)
+
+    register_background_jobs(app)
+    register_cli_commands(app)
+
+    # Once any user exists setup is done for good, so the check stops querying
+    setup_state = {"done": False}
 
     @app.before_request
     def check_first_run():
-        allowed_endpoints = ['admin.super_setup_page', 'admin.super_setup_post', 'static']
+        allowed_endpoints = ['admin.super_setup_page', 'admin.super_setup_post', 'static', 'media.image_variant']
         
-        if request.endpoint in allowed_endpoints:
+        if setup_state["done"] or request.endpoint in allowed_endpoints:
             return
 
         try:
             if User.query.first() is None:
                 return redirect(url_for('admin.super_setup_page'))
+            setup_state["done"] = True
         except Exception:
             pass
 
     return app
 
 
+def register_cli_commands(app):
+    """Register maintenance and benchmarking commands"""
+
+    @app.cli.command("compact-heart-rate")
+    def compact_heart_rate_command():
+        """Move legacy WorkoutLog.heart_rate_data JSON into the compact sample store."""
+        from app.services.heart_rate_store_service import migrate_legacy_heart_rate
+        print(f"Migrated {migrate_legacy_heart_rate()} workouts")
+
+    @app.cli.command("install-scheduling-constraints")
+    def install_scheduling_constraints_command():
+        """Add the session overlap exclusion constraint and range indexes to an existing database."""
+        from app.services.scheduling_service import install_range_constraints
+        created = install_range_constraints()
+        print(f"Created: {', '.join(created)}" if created else "Nothing to create")
+
+    @app.cli.command("benchmark-json")
+    @click.option("--repeat", default=20, help="Encodings per payload; the best one is reported.")
+    @click.option("--endpoint", "only", multiple=True, help="Only run these benchmarks (repeatable).")
+    def benchmark_json_command(repeat, only):
+        """Compare JSON encoding time and compressed sizes of the hot endpoints (needs seed-benchmark-data)."""
+        from app.services.benchmark_service import BenchmarkError, run_payload_benchmarks
+        try:
+            print(json.dumps(run_payload_benchmarks(app, repeat=repeat, only=only), indent=2))
+        except BenchmarkError as e:
+            raise click.ClickException(str(e))
+
+    @app.cli.command("benchmark-db-concurrency")
+    @click.option("--concurrency", default=10, help="Slow queries started at once.")
+    @click.option("--sleep", "sleep_seconds", default=0.5, help="Seconds each query sleeps in pg_sleep().")
+    def benchmark_db_concurrency_command(concurrency, sleep_seconds):
+        """Compare concurrent slow queries with blocking and cooperative psycopg2 (needs FLASK_APP=run.py)."""
+        from app.services.db_runtime_service import benchmark_concurrent_queries
+        print(json.dumps(benchmark_concurrent_queries(concurrency, sleep_seconds), indent=2))
+
+    @app.cli.command("benchmark-workout-lists")
+    @click.option("--limit", default=1000, help="Workouts serialized per run.")
+    @click.option("--repeat", default=5, help="Runs per path; the best one is reported.")
+    def benchmark_workout_lists_command(limit, repeat):
+        """Compare ORM to_dict() serialization of workout lists with projected summary rows."""
+        from app.services.workout_list_service import benchmark_serialization
+        print(json.dumps(benchmark_serialization(limit=limit, repeat=repeat), indent=2))
+
+    @app.cli.command("collect-static")
+    @click.option("--output", default=None, help="Build folder (default: STATIC_BUILD_DIR or instance/static-build).")
+    @click.option("--no-compress", is_flag=True, help="Skip the .br/.gz variants.")
+    def collect_static_command(output, no_compress):
+        """Fingerprint and precompress app/static for STATIC_BUILD_ENABLED serving."""
+        from app.services.static_assets_service import StaticBuildError, collect_static
+        output = output or app.config.get("STATIC_BUILD_DIR") or os.path.join(app.instance_path, "static-build")
+        try:
+            stats = collect_static(app.static_folder, output, compress=not no_compress)
+        except StaticBuildError as e:
+            raise click.ClickException(str(e))
+        print(json.dumps(stats, indent=2))
+        if not stats["brotli"] and not no_compress:
+            print("brotli is not installed; only gzip variants were written")
+
+    @app.cli.command("seed-benchmark-data")
+    @click.option("--coaches", default=5, help="Coaches to create.")
+    @click.option("--athletes-per-coach", default=20, help="Athletes assigned to each coach.")
+    @click.option("--years", default=2, help="Years of workouts, health records, logins, messages and payments.")
+    @click.option("--seed", default=42, help="Random seed; the same seed yields the same rows.")
+    @click.option("--clear", is_flag=True, help="Only remove the benchmark population.")
+    @click.confirmation_option(prompt="This writes to the configured database. Continue?")
+    def seed_benchmark_data_command(coaches, athletes_per_coach, years, seed, clear):
+        """Replace the synthetic benchmark population (accounts under @bench.local)."""
+        from app.services.benchmark_service import clear_population, seed_population
+        if clear:
+            print(f"Removed {clear_population()} benchmark users")
+            return
+        print(json.dumps(seed_population(coaches, athletes_per_coach, years, seed), indent=2))
+
+    @app.cli.command("benchmark-endpoints")
+    @click.option("--requests", "requests_per_endpoint", default=20, help="Timed requests per endpoint.")
+    @click.option("--endpoint", "only", multiple=True, help="Only run these benchmarks (repeatable).")
+    @click.option("--baseline", default=None, help="Baseline JSON file (default: instance/benchmark_baseline.json).")
+    @click.option("--tolerance", default=0.2, help="Allowed relative growth of latency and memory.")
+    @click.option("--save-baseline", is_flag=True, help="Store this run as the new baseline.")
+    @click.option("--output", default=None, help="Also write this run's results to a file.")
+    def benchmark_endpoints_command(requests_per_endpoint, only, baseline, tolerance, save_baseline, output):
+        """Time the hot endpoints against the seeded population and flag regressions."""
+        from app.services.benchmark_service import (
+            BenchmarkError,
+            compare_to_baseline,
+            load_baseline,
+            run_endpoint_benchmarks,
+            save_baseline as write_results
+        )
+        baseline = baseline or os.path.join(app.instance_path, "benchmark_baseline.json")
+        try:
+            results = run_endpoint_benchmarks(app, requests_per_endpoint, only=only)
+        except BenchmarkError as e:
+            raise click.ClickException(str(e))
+
+        previous = load_baseline(baseline)
+        results["regressions"] = compare_to_baseline(results, previous, tolerance) if previous else []
+        print(json.dumps(results, indent=2))
+        if output:
+            write_results(output, results)
+        if save_baseline or previous is None:
+            write_results(baseline, results)
+            print(f"Baseline written to {baseline}")
+        if results["regressions"]:
+            raise click.ClickException(f"{len(results['regressions'])} regression(s) against {baseline}")
+
+
+def register_background_jobs(app):
+    """Register the CLI equivalents of the periodic jobs; the scheduler itself starts in start_background_jobs()"""
+    from app.services.subscription_lifecycle_service import sweep_subscriptions
+    from app.services.usage_metering_service import run_scheduled_flush
+    from app.services import login_throttle_service
+    from app.services.goal_progress_service import compact_progress_logs
+
+    @app.cli.command("sweep-subscriptions")
+    def sweep_subscriptions_command():
+        """Apply pending subscription expiry, trial-end and renewal transitions."""
+        print(json.dumps(sweep_subscriptions(), indent=2))
+
+    @app.cli.command("compact-goal-logs")
+    @click.option("--older-than-days", default=None, type=int, help="Only fold entries older than this.")
+    def compact_goal_logs_command(older_than_days):
+        """Fold old goal progress log entries into one summary row per goal and day."""
+        days = older_than_days or app.config.get("GOAL_LOG_COMPACT_AFTER_DAYS", 30)
+        print(json.dumps(compact_progress_logs(days), indent=2))
+
+    if not app.config.get("BACKGROUND_JOBS_ENABLED"):
+        return
+
+    # Buffered usage and login rows are per process, so every process flushes its own on exit
+    atexit.register(run_scheduled_flush, app)
+    atexit.register(login_throttle_service.run_scheduled_flush, app)
+
+
+def start_background_jobs(app):
+    """Start the periodic jobs; called by the server entry point (run.py), never by create_app.
+
+    ``flask`` CLI commands import the same entry point, so nothing starts
+    while a click command is running. Database-wide jobs are wrapped in
+    ``exclusive_job`` so several server processes do not run them at once.
+    """
+    if not app.config.get("BACKGROUND_JOBS_ENABLED") or click.get_current_context(silent=True) is not None:
+        return
+
+    from app.services.subscription_lifecycle_service import run_scheduled_sweep
+    from app.services.usage_metering_service import run_scheduled_flush
+    from app.services import login_throttle_service
+    from app.services.goal_progress_service import run_scheduled_compaction
+    from app.services.job_lock_service import exclusive_job
+
+    scheduler.init_app(app)
+    if app.config.get("SUBSCRIPTION_SWEEPER_ENABLED"):
+        scheduler.add_job(
+            id="subscription_sweeper",
+            func=exclusive_job("subscription_sweeper", run_scheduled_sweep),
+            args=[app],
+            trigger="interval",
+            minutes=app.config.get("SUBSCRIPTION_SWEEP_INTERVAL_MINUTES", 15),
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+    scheduler.add_job(
+        id="usage_meter_flush",
+        func=run_scheduled_flush,
+        args=[app],
+        trigger="interval",
+        seconds=app.config.get("USAGE_FLUSH_INTERVAL_SECONDS", 30),
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.add_job(
+        id="login_log_flush",
+        func=login_throttle_service.run_scheduled_flush,
+        args=[app],
+        trigger="interval",
+        seconds=app.config.get("LOGIN_LOG_FLUSH_INTERVAL_SECONDS", 10),
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    if app.config.get("GOAL_LOG_COMPACTION_ENABLED"):
+        scheduler.add_job(
+            id="goal_log_compaction",
+            func=exclusive_job("goal_log_compaction", run_scheduled_compaction),
+            args=[app],
+            trigger="interval",
+            hours=app.config.get("GOAL_LOG_COMPACTION_INTERVAL_HOURS", 24),
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+    if not scheduler.running:
+        scheduler.start()
+
 
 @jwt.user_lookup_loader
 def user_lookup_callback(_jwt_header, jwt_data):
@@ -3,10 +3,26 @@ from datetime import timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
+
+
+def engine_options(pool_size, max_overflow, pool_recycle):
+    """SQLAlchemy pool settings; each can be overridden through the environment"""
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', pool_size)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', max_overflow)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', pool_recycle)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    }
+
+
 class Config:
     # Database
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=10, max_overflow=20, pool_recycle=1800)
+    # auto: make psycopg2 yield to eventlet when run.py has monkey patched; on/off to force
+    DB_GREEN_DRIVER = os.getenv('DB_GREEN_DRIVER', 'auto').lower()
 
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
@@ -30,6 +46,42 @@ class Config:
     # File Upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
     UPLOAD_EXTENSIONS = ['.jpg', '.png', '.pdf', '.csv']
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))  # thumbnail/WebP rendering threads
+
+    # CPU-bound calls (password hashing, PDF layout, predictions) run at most this many at once
+    OFFLOAD_MAX_WORKERS = int(os.getenv('OFFLOAD_MAX_WORKERS', 8))
+
+    # Per-request SQL counts/timings; X-DB-* response headers default to on in debug only
+    SQL_STATS_ENABLED = os.getenv('SQL_STATS_ENABLED', 'true').lower() == 'true'
+    SQL_STATS_HEADERS = os.getenv('SQL_STATS_HEADERS', '').lower() == 'true' if os.getenv('SQL_STATS_HEADERS') else None
+
+    # Slow-request log and sampled cProfile profiles (adjustable at runtime via /admin/api/profiling)
+    PROFILING_SLOW_LOG_ENABLED = os.getenv('PROFILING_SLOW_LOG_ENABLED', 'true').lower() == 'true'
+    PROFILING_SLOW_REQUEST_MS = int(os.getenv('PROFILING_SLOW_REQUEST_MS', 1000))
+    PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+    PROFILING_ENDPOINTS = [e for e in os.getenv('PROFILING_ENDPOINTS', '').split(',') if e]
+    PROFILING_MAX_PROFILES = int(os.getenv('PROFILING_MAX_PROFILES', 20))
+
+    # Bearer token a Prometheus scraper can use for /admin/metrics instead of an admin session
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Application cache for reference data (memory, redis or null); entries expire on commit of tagged tables
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', 300))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 2048))
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+    # Serve the output of `flask collect-static` (hashed names, precompressed variants); default instance/static-build
+    STATIC_BUILD_ENABLED = os.getenv('STATIC_BUILD_ENABLED', 'false').lower() == 'true'
+    STATIC_BUILD_DIR = os.getenv('STATIC_BUILD_DIR')
+
+    # JSON responses go through orjson when installed; compression applies to buffered responses above the threshold
+    JSON_FAST_SERIALIZER = os.getenv('JSON_FAST_SERIALIZER', 'true').lower() == 'true'
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+    COMPRESS_OFFLOAD_BYTES = int(os.getenv('COMPRESS_OFFLOAD_BYTES', 256 * 1024))
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
 
     # Password Policy
     PASSWORD_MIN_LENGTH = 8
@@ -41,21 +93,41 @@ class Config:
     # Account Protection
     MAX_LOGIN_ATTEMPTS = 5
     ACCOUNT_LOCKOUT_DURATION = timedelta(minutes=30)
+    LOGIN_IP_MAX_ATTEMPTS = 20
+    LOGIN_IP_WINDOW = timedelta(minutes=15)
+    REGISTRATION_IP_LIMIT_PER_HOUR = 5
+    # memory:// keeps counters per process; use redis://host:port to share them
+    LOGIN_THROTTLE_STORAGE_URI = os.getenv('LOGIN_THROTTLE_STORAGE_URI', 'memory://')
 
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 
+    # Background jobs
+    BACKGROUND_JOBS_ENABLED = os.getenv('BACKGROUND_JOBS_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_API_ENABLED = False
+    SUBSCRIPTION_SWEEPER_ENABLED = os.getenv('SUBSCRIPTION_SWEEPER_ENABLED', 'true').lower() == 'true'
+    SUBSCRIPTION_SWEEP_INTERVAL_MINUTES = int(os.getenv('SUBSCRIPTION_SWEEP_INTERVAL_MINUTES', 15))
+    USAGE_FLUSH_INTERVAL_SECONDS = int(os.getenv('USAGE_FLUSH_INTERVAL_SECONDS', 30))
+    LOGIN_LOG_FLUSH_INTERVAL_SECONDS = int(os.getenv('LOGIN_LOG_FLUSH_INTERVAL_SECONDS', 10))
+    GOAL_LOG_COMPACTION_ENABLED = os.getenv('GOAL_LOG_COMPACTION_ENABLED', 'true').lower() == 'true'
+    GOAL_LOG_COMPACT_AFTER_DAYS = int(os.getenv('GOAL_LOG_COMPACT_AFTER_DAYS', 30))
+    GOAL_LOG_COMPACTION_INTERVAL_HOURS = int(os.getenv('GOAL_LOG_COMPACTION_INTERVAL_HOURS', 24))
+
 class DevelopmentConfig(Config):
     DEBUG = True
     JWT_COOKIE_SECURE = False
     SESSION_COOKIE_SECURE = False
     SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=5, max_overflow=5, pool_recycle=3600)
 
 class ProductionConfig(Config):
     DEBUG = False
     JWT_COOKIE_SECURE = True
     SESSION_COOKIE_SECURE = True
     PREFERRED_URL_SCHEME = 'https'
+    STATIC_BUILD_ENABLED = os.getenv('STATIC_BUILD_ENABLED', 'true').lower() == 'true'
+    # Green threads share the pool, so size it for concurrent requests rather than CPU cores
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=20, max_overflow=30, pool_recycle=1800)
 
     # Safety checks
     def __init__(self):
@@ -65,8 +137,11 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # in-memory SQLite keeps a single connection
+    DB_GREEN_DRIVER = 'off'
     WTF_CSRF_ENABLED = False
     JWT_COOKIE_SECURE = False
+    BACKGROUND_JOBS_ENABLED = False
 
 config = {
     'development': DevelopmentConfig,
@@ -3,10 +3,12 @@ from flask_marshmallow import Marshmallow
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from flask_socketio import SocketIO
+from flask_apscheduler import APScheduler
 
 db = SQLAlchemy()
 ma = Marshmallow()
 jwt = JWTManager()
 migrate = Migrate()
 socketio = SocketIO(cors_allowed_origins="*")
+scheduler = APScheduler()
 
@@ -14,6 +14,7 @@ from .subscription import Subscription
 from .activity_log import ActivityLog
 from .workout_file import WorkoutFile
 from .workout_log import WorkoutLog
+from .workout_heart_rate import WorkoutHeartRateStream
 from .readiness_scores import ReadinessScore
 from .ml_insight import MLInsight
 from .message import Message
@@ -56,7 +57,7 @@ __all__ = [
     "CoachProfile", "AthleteProfile", "AdminProfile",
     "TrainingGroup", "TrainingPlan","Feedback",
     "AthleteGroup", "AthletePlan", "CoachAthlete",
-    "Subscription", "ActivityLog", "WorkoutFile", "WorkoutLog","ReadinessScore" , "MLInsight",
+    "Subscription", "ActivityLog", "WorkoutFile", "WorkoutLog", "WorkoutHeartRateStream","ReadinessScore" , "MLInsight",
     "Message",
     "AthleteGoal", "AthleteSchedule", "AthleteProgress","readiness_scores", "InjuryRecord","HealthRecord"
     ,"UserSettings", "WorkoutSession", "NutritionPlan", "Notification", "SessionSchedule"
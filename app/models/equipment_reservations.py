@@ -3,6 +3,7 @@
 # ================================
 from datetime import datetime
 from app.extensions import db
+from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import JSONB
 
 class EquipmentReservation(db.Model):
@@ -25,3 +26,26 @@ class EquipmentReservation(db.Model):
     # Relationships
     equipment = db.relationship("Equipment", back_populates="reservations")
     user = db.relationship("User", back_populates="equipment_reservations")  # Added back_populates
+
+    __table_args__ = (
+        db.CheckConstraint("end_time > start_time", name="check_reservation_period"),
+        db.Index("idx_equipment_reservations_equipment_start", "equipment_id", "start_time"),
+        db.Index(
+            "idx_equipment_reservations_period",
+            equipment_id,
+            func.tsrange(start_time, end_time, "[)"),
+            postgresql_using="gist",
+            postgresql_where=status == "active",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'equipment_id': self.equipment_id,
+            'user_id': self.user_id,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -1,5 +1,6 @@
 # في ملف جديد مثل app/models/goal_progress_log.py
 from app.extensions import db
+from sqlalchemy import false
 from datetime import datetime
 
 class GoalProgressLog(db.Model):
@@ -11,6 +12,12 @@ class GoalProgressLog(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
     recorded_value = db.Column(db.Float, nullable=False)
-    
+    # Set on rows the compaction job folded a day of entries into
+    is_summary = db.Column(db.Boolean, nullable=False, default=False, server_default=false())
+    sample_count = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
-    goal = db.relationship("AthleteGoal", back_populates="progress_logs")
\ No newline at end of file
+    goal = db.relationship("AthleteGoal", back_populates="progress_logs")
+
+    __table_args__ = (
+        db.Index("idx_goal_progress_logs_goal_recorded_at", "goal_id", "recorded_at"),
+    )
@@ -32,4 +32,5 @@ class HealthRecord(db.Model):
     __table_args__ = (
         db.Index("idx_health_athlete_id", "athlete_id"),
         db.Index("idx_health_recorded_at", "recorded_at"),
+        db.Index("idx_health_athlete_recorded_at", "athlete_id", "recorded_at"),
     )
\ No newline at end of file
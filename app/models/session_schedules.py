@@ -1,6 +1,18 @@
 from datetime import datetime, timedelta
+from sqlalchemy import DDL, event, func, literal_column
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from app.extensions import db
 
+# Statuses that hold the coach's time; pending/rejected/cancelled requests never conflict
+BOOKED_STATUSES = ("scheduled", "in_progress")
+
+
+def session_period(scheduled_at, duration):
+    """``tsrange`` covering a session, half-open so back-to-back sessions do not overlap"""
+    ends_at = scheduled_at + literal_column("interval '1 minute'") * func.coalesce(duration, 0)
+    return func.tsrange(scheduled_at, ends_at, "[)")
+
+
 class SessionSchedule(db.Model):
     __tablename__ = "session_schedules"
 
@@ -28,4 +40,22 @@ class SessionSchedule(db.Model):
     
     __table_args__ = (
         db.Index("idx_session_schedules_coach_athlete", "coach_id", "athlete_id"),
-    )
\ No newline at end of file
+        db.Index("idx_session_schedules_coach_scheduled_at", "coach_id", "scheduled_at"),
+        # GiST-backed: a second booked session overlapping a coach's time is rejected
+        # by the database itself, and overlap lookups use the same index
+        ExcludeConstraint(
+            (coach_id, "="),
+            (session_period(scheduled_at, duration), "&&"),
+            name="excl_session_schedules_coach_overlap",
+            using="gist",
+            where=status.in_(BOOKED_STATUSES),
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+# btree_gist lets integer equality share a GiST index with range overlap
+event.listen(
+    db.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql")
+)
\ No newline at end of file
@@ -53,6 +53,9 @@ class Subscription(db.Model):
         db.Index("idx_subscription_user_id", "user_id"),
         db.Index("idx_subscription_status", "status"),
         db.Index("idx_subscription_end_date", "end_date"),
+        db.Index("idx_subscription_status_end_date", "status", "end_date"),
+        db.Index("idx_subscription_status_trial_end", "status", "trial_end_date"),
+        db.Index("idx_subscription_status_next_billing", "status", "next_billing_date"),
     )
     
     @property
@@ -34,7 +34,9 @@ class SubscriptionPlan(db.Model):
     def active_subscriptions_count(self):
         return self.subscriptions.filter_by(status='active').count()
     
-    def to_dict(self):
+    def to_dict(self, active_subscriptions=None):
+        if active_subscriptions is None:
+            active_subscriptions = self.active_subscriptions_count
         return {
             'id': self.id,
             'name': self.name,
@@ -51,6 +53,6 @@ class SubscriptionPlan(db.Model):
             'api_access': self.api_access,
             'is_active': self.is_active,
             'sort_order': self.sort_order,
-            'active_subscriptions': self.active_subscriptions_count
+            'active_subscriptions': active_subscriptions
         }
 
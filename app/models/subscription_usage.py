@@ -6,6 +6,9 @@ from app.extensions import db
 
 class SubscriptionUsage(db.Model):
     __tablename__ = "subscription_usage"
+
+    # Storage is metered in MB while its limit is kept in GB, like the plan
+    LIMIT_SCALE = {'storage': 1024}
     
     id = db.Column(db.Integer, primary_key=True)
     subscription_id = db.Column(db.Integer, db.ForeignKey("subscriptions.id"), nullable=False)
@@ -24,15 +27,19 @@ class SubscriptionUsage(db.Model):
         db.Index('idx_subscription_usage_feature', 'subscription_id', 'feature'),
     )
     
+    @property
+    def scaled_limit(self):
+        return (self.usage_limit or 0) * self.LIMIT_SCALE.get(self.feature, 1)
+
     @property
     def usage_percentage(self):
-        if self.usage_limit and self.usage_limit > 0:
-            return min(100, round((self.usage_count / self.usage_limit) * 100, 1))
+        if self.scaled_limit > 0:
+            return min(100, round(((self.usage_count or 0) / self.scaled_limit) * 100, 1))
         return 0
     
     @property
     def is_over_limit(self):
-        return self.usage_limit and self.usage_count > self.usage_limit
+        return self.usage_limit and self.usage_count > self.scaled_limit
     
     def __repr__(self):
         return f'<SubscriptionUsage {self.feature}: {self.usage_count}/{self.usage_limit}>'
@@ -42,4 +42,6 @@ class TrainingPlan(db.Model):
 
     __table_args__ = (
         db.CheckConstraint("status IN ('active','completed','archived')", name="check_status"),
+        db.Index("idx_training_plans_coach_dates", "coach_id", "start_date", "end_date"),
+        db.Index("idx_training_plans_coach_id_id", "coach_id", "id"),  # keyset pages, newest first
     )
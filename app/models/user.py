@@ -1,5 +1,5 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.offload_service import hash_password, verify_password
 from app.extensions import db
 from flask import url_for
 
@@ -126,11 +126,12 @@ class User(db.Model):
     equipments = db.relationship("Equipment", back_populates="owner", foreign_keys="[Equipment.owner_id]", lazy="dynamic", cascade="all, delete-orphan")    
 
     # Helpers
+    # PBKDF2 is deliberately slow; both run off the eventlet hub
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     __table_args__ = (
         db.Index("idx_users_email", "email"),
@@ -162,4 +163,14 @@ class User(db.Model):
     
     @property
     def profile_image_url(self):
-        return self.profile_image or url_for('static', filename='uploads/profile/default.jpg')
\ No newline at end of file
+        return self.profile_image or url_for('static', filename='uploads/profile/default.jpg')
+
+    def avatar_url(self, variant='thumb'):
+        """URL of a resized avatar; falls back to the stored file for legacy uploads"""
+        from app.services.image_pipeline_service import content_digest
+        if not self.profile_image or self.profile_image in ('default.jpg', 'default.jpeg'):
+            return url_for('static', filename='uploads/profile/default.jpg')
+        digest = content_digest(self.profile_image)
+        if digest:
+            return url_for('media.image_variant', digest=digest, variant=variant)
+        return url_for('static', filename='uploads/profile/' + self.profile_image)
\ No newline at end of file
@@ -0,0 +1,24 @@
+from datetime import datetime
+from app.extensions import db
+
+class WorkoutHeartRateStream(db.Model):
+    __tablename__ = "workout_heart_rate_streams"
+
+    workout_log_id = db.Column(db.Integer, db.ForeignKey("workout_logs.id", ondelete="CASCADE"), primary_key=True)
+    encoding = db.Column(db.SmallInteger, nullable=False, default=1)  # sample codec version
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    duration_seconds = db.Column(db.Integer, nullable=False, default=0)  # offset of the last sample
+    data = db.Column(db.LargeBinary, nullable=False)  # zlib-compressed delta-encoded (t, bpm) pairs
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    workout_log = db.relationship("WorkoutLog", back_populates="heart_rate_stream")
+
+    def to_dict(self):
+        return {
+            "workout_log_id": self.workout_log_id,
+            "sample_count": self.sample_count,
+            "duration_seconds": self.duration_seconds,
+            "stored_bytes": len(self.data) if self.data else 0,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
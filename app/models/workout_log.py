@@ -23,6 +23,8 @@ class WorkoutLog(db.Model):
     calories_burned = db.Column(db.Integer, default=0)
     avg_heart_rate = db.Column(db.Integer)
     max_heart_rate = db.Column(db.Integer)
+    min_heart_rate = db.Column(db.Integer)
+    hr_sample_count = db.Column(db.Integer, default=0)  # samples in heart_rate_stream
     
     # Heart rate zones (percentages)
     hr_zone_anaerobic = db.Column(db.Float, default=0.0)  # 90-100%
@@ -62,7 +64,7 @@ class WorkoutLog(db.Model):
     # JSON fields for flexible data
     workout_details = db.Column(JSONB, server_default="{}", default=dict)
     metrics = db.Column(JSONB, default={})
-    heart_rate_data = db.Column(JSONB, default={})  # detailed HR data points
+    heart_rate_data = db.Column(JSONB, default={})  # legacy HR data points, moved to heart_rate_stream
     
     # Relationships
     athlete = db.relationship("User", back_populates="workout_logs")
@@ -71,14 +73,28 @@ class WorkoutLog(db.Model):
         back_populates="workout_log",
         cascade="all, delete-orphan"
     )
+    heart_rate_stream = db.relationship(
+        "WorkoutHeartRateStream",
+        back_populates="workout_log",
+        uselist=False,
+        lazy="select",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
 
     __table_args__ = (
         db.Index("idx_workout_logs_athlete_date", "athlete_id", "date"),
         db.Index("idx_workout_logs_type", "workout_type"),
+        db.Index("idx_workout_logs_athlete_start_time", "athlete_id", "start_time"),
     )
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_heart_rate=False):
+        """Serialize the workout with its heart-rate summary.
+
+        The raw HR stream is only read from the sample store when
+        ``include_heart_rate`` is set; list endpoints never ship it.
+        """
+        data = {
             "id": self.id,
             "title": self.title,
             "workout_type": self.workout_type,
@@ -89,6 +105,8 @@ class WorkoutLog(db.Model):
             "calories_burned": self.calories_burned,
             "avg_heart_rate": self.avg_heart_rate,
             "max_heart_rate": self.max_heart_rate,
+            "min_heart_rate": self.min_heart_rate,
+            "hr_sample_count": self.hr_sample_count or 0,
             "hr_zones": {
                 "anaerobic": self.hr_zone_anaerobic,
                 "aerobic": self.hr_zone_aerobic,
@@ -110,6 +128,9 @@ class WorkoutLog(db.Model):
             "notes": self.notes,
             "image_url": self.image_url,
             "workout_details": self.workout_details or {},
-            "metrics": self.metrics or {},
-            "heart_rate_data": self.heart_rate_data or {}
+            "metrics": self.metrics or {}
         }
+        if include_heart_rate:
+            from app.services.heart_rate_store_service import read_samples
+            data["heart_rate_data"] = {"samples": read_samples(self)}
+        return data
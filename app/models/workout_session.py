@@ -6,7 +6,7 @@ class WorkoutSession(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     athlete_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
-    plan_id = db.Column(db.Integer, db.ForeignKey("training_plans.id"), nullable=True)
+    plan_id = db.Column(db.Integer, db.ForeignKey("training_plans.id"), nullable=True, index=True)
     name = db.Column(db.String(150), nullable=False)
     type = db.Column(db.String(50))  # e.g. cardio, strength
     duration = db.Column(db.Integer)  # minutes
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify, render_template, url_for, redirect
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
-from werkzeug.security import generate_password_hash
+from app.services.offload_service import hash_password
 from sqlalchemy import and_, or_, func, desc
+from sqlalchemy.orm import aliased
 from datetime import datetime, timedelta
 from app import db
 from app.models import (
@@ -9,6 +10,9 @@ from app.models import (
     AthleteProfile, WorkoutLog
 )
 from app.utils.decorators import inject_user_to_template 
+from app.services.usage_metering_service import usage_meter
+from app.services.cache_service import cached
+from app.services.query_stats_service import query_budget
 from . import admin_bp
 
 # =========================================================
@@ -67,7 +71,7 @@ def add_admin():
     if User.query.filter_by(email=email).first():
         return jsonify({"msg": "Email already exists"}), 409
 
-    password_hash = generate_password_hash(password)
+    password_hash = hash_password(password)
     new_user = User(
         name=name,
         email=email,
@@ -266,6 +270,7 @@ def reset_password(user_id):
 # =========================================================
 
 @admin_bp.route("/unassigned-athletes", methods=["GET"])
+@query_budget(3)
 @jwt_required()
 def get_unassigned_athletes():
     """Get all unassigned athletes"""
@@ -293,12 +298,16 @@ def get_unassigned_athletes():
             CoachAthlete.id == None
         ).all()
         
-        # Get athletes with unassigned status
+        # Get athletes with unassigned status, with the coach who released them
+        PreviousCoach = aliased(User)
         unassigned_by_coach = db.session.query(
             User,
-            CoachAthlete
+            CoachAthlete,
+            PreviousCoach
         ).join(
             CoachAthlete, CoachAthlete.athlete_id == User.id
+        ).outerjoin(
+            PreviousCoach, PreviousCoach.id == CoachAthlete.coach_id
         ).filter(
             User.role == 'athlete',
             User.is_deleted == False,
@@ -326,8 +335,7 @@ def get_unassigned_athletes():
         for record in unassigned_by_coach:
             user = record[0]
             coach_link = record[1]
-            
-            previous_coach = User.query.get(coach_link.coach_id)
+            previous_coach = record[2]
             
             athlete_list.append({
                 "id": user.id,
@@ -381,6 +389,10 @@ def assign_athlete_to_coach():
             coach_id=coach_id,
             athlete_id=athlete_id
         ).first()
+
+        newly_linked = not (existing_link and existing_link.is_active)
+        if newly_linked and not usage_meter.check(coach_id, 'athletes'):
+            return jsonify({"msg": "Coach has reached the athlete limit of their subscription plan"}), 403
         
         if existing_link:
             # Reactivate existing link
@@ -411,6 +423,7 @@ def assign_athlete_to_coach():
         for link in other_links:
             link.is_active = False
             link.status = 'unassigned'
+        released_coach_ids = [link.coach_id for link in other_links]
         
         # Log activity
         activity = ActivityLog(
@@ -428,6 +441,11 @@ def assign_athlete_to_coach():
         db.session.add(activity)
         
         db.session.commit()
+
+        if newly_linked:
+            usage_meter.record(coach_id, 'athletes')
+        for released_coach_id in released_coach_ids:
+            usage_meter.record(released_coach_id, 'athletes', -1)
         
         return jsonify({
             "msg": message,
@@ -440,6 +458,7 @@ def assign_athlete_to_coach():
         return jsonify({"msg": f"Error assigning athlete: {str(e)}"}), 500
 
 @admin_bp.route("/bulk-assign", methods=["POST"])
+@query_budget(10)
 @jwt_required()
 def bulk_assign_athletes():
     """Bulk assign athletes to a coach"""
@@ -463,19 +482,42 @@ def bulk_assign_athletes():
             return jsonify({"msg": "Coach not found"}), 404
         
         success_count = 0
+        newly_linked = 0
+        released_coach_ids = []
         failed_athletes = []
+
+        # Load the athletes and all their links up front instead of per athlete
+        coach_id = coach.id
+        athlete_ids = list(dict.fromkeys(
+            int(athlete_id) if str(athlete_id).isdigit() else athlete_id
+            for athlete_id in athlete_ids
+        ))
+        found_ids = {
+            row.id for row in db.session.query(User.id).filter(
+                User.id.in_([i for i in athlete_ids if isinstance(i, int)]),
+                User.role == 'athlete'
+            )
+        }
+        links_by_athlete = {}
+        for link in CoachAthlete.query.filter(CoachAthlete.athlete_id.in_(found_ids)).all():
+            links_by_athlete.setdefault(link.athlete_id, []).append(link)
         
         for athlete_id in athlete_ids:
-            athlete = User.query.filter_by(id=athlete_id, role='athlete').first()
-            if not athlete:
+            if athlete_id not in found_ids:
                 failed_athletes.append({"id": athlete_id, "reason": "Athlete not found"})
                 continue
             
             # Check existing link
-            existing_link = CoachAthlete.query.filter_by(
-                coach_id=coach_id,
-                athlete_id=athlete_id
-            ).first()
+            athlete_links = links_by_athlete.get(athlete_id, [])
+            existing_link = next(
+                (link for link in athlete_links if link.coach_id == coach_id), None
+            )
+
+            if not (existing_link and existing_link.is_active):
+                if not usage_meter.check(coach_id, 'athletes', newly_linked + 1):
+                    failed_athletes.append({"id": athlete_id, "reason": "Coach athlete limit reached"})
+                    continue
+                newly_linked += 1
             
             if existing_link:
                 existing_link.is_active = True
@@ -493,15 +535,15 @@ def bulk_assign_athletes():
                 db.session.add(new_link)
             
             # Deactivate other links
-            other_links = CoachAthlete.query.filter(
-                CoachAthlete.athlete_id == athlete_id,
-                CoachAthlete.coach_id != coach_id,
-                CoachAthlete.is_active == True
-            ).all()
+            other_links = [
+                link for link in athlete_links
+                if link.coach_id != coach_id and link.is_active
+            ]
             
             for link in other_links:
                 link.is_active = False
                 link.status = 'unassigned'
+                released_coach_ids.append(link.coach_id)
             
             success_count += 1
         
@@ -521,6 +563,10 @@ def bulk_assign_athletes():
         db.session.add(activity)
         
         db.session.commit()
+
+        usage_meter.record(coach_id, 'athletes', newly_linked)
+        for released_coach_id in released_coach_ids:
+            usage_meter.record(released_coach_id, 'athletes', -1)
         
         return jsonify({
             "msg": f"Bulk assignment completed. {success_count} athletes assigned.",
@@ -532,7 +578,34 @@ def bulk_assign_athletes():
         db.session.rollback()
         return jsonify({"msg": f"Error in bulk assignment: {str(e)}"}), 500
 
+@cached(tags=(User, CoachAthlete), name="coach_choices")
+def coach_choices():
+    """Active coaches with their number of approved athletes, from one grouped query"""
+    assigned = (
+        db.session.query(CoachAthlete.coach_id, func.count(CoachAthlete.id).label('assigned'))
+        .filter(CoachAthlete.is_active == True, CoachAthlete.status == 'approved')
+        .group_by(CoachAthlete.coach_id)
+        .subquery()
+    )
+    coaches = (
+        db.session.query(User.id, User.name, User.email, User.status, assigned.c.assigned)
+        .outerjoin(assigned, assigned.c.coach_id == User.id)
+        .filter(User.role == 'coach', User.is_deleted == False, User.status == 'active')
+        .all()
+    )
+    return [
+        {
+            "id": coach.id,
+            "name": coach.name,
+            "email": coach.email,
+            "assigned_athletes": coach.assigned or 0,
+            "status": coach.status
+        }
+        for coach in coaches
+    ]
+
 @admin_bp.route("/coaches-list", methods=["GET"])
+@query_budget(2)
 @jwt_required()
 def get_coaches_list():
     """Get all coaches for assignment dropdown"""
@@ -543,29 +616,7 @@ def get_coaches_list():
         return jsonify({"msg": "Unauthorized"}), 403
 
     try:
-        coaches = User.query.filter_by(
-            role='coach',
-            is_deleted=False,
-            status='active'
-        ).all()
-        
-        coach_list = []
-        for coach in coaches:
-            assigned_count = CoachAthlete.query.filter_by(
-                coach_id=coach.id,
-                is_active=True,
-                status='approved'
-            ).count()
-            
-            coach_list.append({
-                "id": coach.id,
-                "name": coach.name,
-                "email": coach.email,
-                "assigned_athletes": assigned_count,
-                "status": coach.status
-            })
-        
-        return jsonify(coach_list), 200
+        return jsonify(coach_choices()), 200
         
     except Exception as e:
         return jsonify({"msg": f"Error: {str(e)}"}), 500
@@ -793,7 +844,7 @@ def add_user():
         if User.query.filter_by(email=email).first():
             return jsonify({"msg": "Email already exists"}), 409
 
-        password_hash = generate_password_hash(password)
+        password_hash = hash_password(password)
         new_user = User(
             name=name,
             email=email,
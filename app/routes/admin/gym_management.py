@@ -9,6 +9,17 @@ from app.models import (
     Equipment, Event, WorkoutType, User, SessionSchedule,
     EquipmentReservation, CoachAthlete, TrainingPlan
 )
+from app.services.cache_service import cached
+from app.services.calendar_service import CalendarRangeError, parse_timestamp, parse_window
+from app.services.scheduling_service import (
+    SchedulingConflict,
+    SchedulingError,
+    book_session,
+    equipment_free_slots,
+    parse_slot_minutes,
+    reserve_equipment,
+    upcoming
+)
 from . import admin_bp
 import json
 
@@ -16,6 +27,17 @@ def is_admin(user_id):
     user = User.query.get(user_id)
     return user and user.role == "admin"
 
+@cached(tags=(Equipment,), name="equipment_list")
+def equipment_list():
+    return [equipment.to_dict() for equipment in Equipment.query.order_by(Equipment.id).all()]
+
+@cached(tags=(WorkoutType,), name="workout_type_list")
+def workout_type_list():
+    return [
+        {"id": wt.id, "name": wt.name, "description": wt.description or ""}
+        for wt in WorkoutType.query.order_by(WorkoutType.id).all()
+    ]
+
 @admin_bp.route("/gym_management", methods=["GET"])
 @jwt_required()
 def gym_management():
@@ -24,9 +46,9 @@ def gym_management():
         return jsonify({"msg": "Unauthorized"}), 403
 
     # Stats for the cards
-    equipments = Equipment.query.all()
+    equipments = equipment_list()
     upcoming_events = Event.query.filter(Event.date >= date.today()).order_by(Event.date).all()
-    workout_types = WorkoutType.query.all()
+    workout_types = workout_type_list()
     upcoming_sessions = SessionSchedule.query.filter(SessionSchedule.scheduled_at >= datetime.utcnow()).count()
     
     # Data for the modals and lists
@@ -140,6 +162,46 @@ def toggle_equipment_status(equipment_id):
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 400
 
+@admin_bp.route("/api/equipment/<int:equipment_id>/reservations", methods=["POST"])
+@jwt_required()
+def reserve_equipment_api(equipment_id):
+    identity = get_jwt_identity()
+    if not is_admin(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    data = request.get_json() or {}
+    try:
+        start = parse_timestamp(data.get("start_time"))
+        end = parse_timestamp(data.get("end_time"))
+        reservation = reserve_equipment(equipment_id, data.get("user_id") or identity, start, end)
+        return jsonify({"success": True, "reservation": reservation.to_dict()}), 201
+    except SchedulingConflict as e:
+        return jsonify({"success": False, "error": str(e), "conflicts": e.conflicts}), 409
+    except (CalendarRangeError, SchedulingError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@admin_bp.route("/api/equipment/<int:equipment_id>/free-slots", methods=["GET"])
+@jwt_required()
+def equipment_free_slots_api(equipment_id):
+    identity = get_jwt_identity()
+    if not is_admin(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    equipment = Equipment.query.get_or_404(equipment_id)
+    try:
+        start, end = parse_window(request.args)
+    except CalendarRangeError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    minutes = parse_slot_minutes(request.args.get("duration", type=int))
+    return jsonify({
+        "success": True,
+        "equipment_id": equipment.id,
+        "capacity": equipment.max_users or 1,
+        "duration": minutes,
+        "slots": equipment_free_slots(equipment, upcoming(start), end, minutes)
+    })
+
 # ================================
 # Event Management APIs
 # ================================
@@ -337,9 +399,10 @@ def add_session():
             location=data.get("location"),
             meeting_link=data.get("meeting_link")
         )
-        db.session.add(session)
-        db.session.commit()
+        book_session(session)
         return jsonify({"success": True, "message": "Session added successfully!"})
+    except SchedulingConflict as e:
+        return jsonify({"success": False, "error": str(e), "conflicts": e.conflicts}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 400
@@ -365,8 +428,10 @@ def update_session(session_id):
         session.meeting_link = data.get("meeting_link", session.meeting_link)
         session.status = data.get("status", session.status)
         
-        db.session.commit()
+        book_session(session)
         return jsonify({"success": True, "message": "Session updated successfully!"})
+    except SchedulingConflict as e:
+        return jsonify({"success": False, "error": str(e), "conflicts": e.conflicts}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 400
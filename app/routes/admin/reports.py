@@ -17,6 +17,7 @@ from app.models import (
     User, CoachAthlete, TrainingPlan, WorkoutLog, 
     AthleteProgress, Equipment
 )
+from app.services.offload_service import offloader
 from . import admin_bp
 
 def is_admin(user_id):
@@ -137,8 +138,8 @@ def get_reports_stats():
         "success": True,
         "stats": stats,
         "date_range": {
-            "start": start_date.isoformat(),
-            "end": end_date.isoformat()
+            "start": start_date,
+            "end": end_date
         }
     })
 
@@ -161,7 +162,7 @@ def get_coaches_performance_api():
             "coach_id": coach.coach_id,
             "coach_name": coach.coach_name,
             "total_athletes": coach.total_athletes,
-            "avg_progress": float(coach.avg_progress) if coach.avg_progress else 0.0
+            "avg_progress": coach.avg_progress or 0.0
         } for coach in coaches_performance
     ]
     
@@ -321,7 +322,8 @@ def export_pdf_report(stats, coaches_performance, start_date, end_date):
     
     elements.append(coach_table)
     
-    doc.build(elements)
+    # Layout is pure-Python CPU work; keep it off the hub
+    offloader.run(doc.build, elements, name="pdf_report")
     buffer.seek(0)
     
     return send_file(
@@ -1,18 +1,26 @@
 from flask import Blueprint, jsonify, render_template, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.extensions import db
+from app.extensions import db, socketio
 from app.models.user import User
 from app.models.subscription import Subscription
 from app.models.subscription_plans import SubscriptionPlan
 from app.models.payments import Payment
 from app.models.payment_methods import PaymentMethod
 from app.models.subscription_usage import SubscriptionUsage
+from app.services.subscription_bulk_service import BulkSubscriptionActions
+from app.services import subscription_lifecycle_service
+from app.services.usage_metering_service import usage_meter
+from app.services.plan_catalog_service import plan_catalog
+from app.services.socket_rooms_service import user_room
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import func, and_, or_
 import logging
 
 from . import admin_bp  # Assuming admin_bp is defined in __init__.py of the admin package
 
+BULK_ACTIONS = ('extend', 'cancel', 'change_plan', 'send_notification')
+BULK_PROGRESS_THRESHOLD = 1000
+
 def is_admin(identity):
     """Check if the user is an admin"""
     user = User.query.filter_by(id=identity).first()
@@ -265,11 +273,18 @@ def get_subscriptions():
             page=page, per_page=per_page, error_out=False
         )
         
+        # Athlete usage of the whole page in one query, keyed by subscription
+        page_ids = [sub.id for sub in subscriptions.items]
+        athletes_usage_by_sub = {
+            u.subscription_id: u for u in SubscriptionUsage.query.filter(
+                SubscriptionUsage.subscription_id.in_(page_ids),
+                SubscriptionUsage.feature == 'athletes'
+            ).all()
+        } if page_ids else {}
+
         subscription_data = []
         for sub in subscriptions.items:
-            # Get usage data
-            usage_records = sub.usage_records.all()
-            athletes_usage = next((u for u in usage_records if u.feature == 'athletes'), None)
+            athletes_usage = athletes_usage_by_sub.get(sub.id)
             
             subscription_data.append({
                 'id': sub.id,
@@ -406,6 +421,7 @@ def create_subscription():
 
         db.session.add_all(usage_records)
         db.session.commit()
+        usage_meter.invalidate(user_id)
 
         return jsonify({
             "success": True, 
@@ -447,9 +463,9 @@ def get_subscription(id):
             })
 
         # Get usage records
-        usage_records = sub.usage_records.all()
-        athletes_usage = next((u for u in usage_records if u.feature == 'athletes'), None)
-        storage_usage = next((u for u in usage_records if u.feature == 'storage'), None)
+        usage_by_feature = {u.feature: u for u in sub.usage_records.all()}
+        athletes_usage = usage_by_feature.get('athletes')
+        storage_usage = usage_by_feature.get('storage')
 
         subscription_data = {
             'id': sub.id,
@@ -529,6 +545,7 @@ def cancel_subscription(id):
 
         sub.cancel_subscription(reason=reason, immediate=immediate)
         db.session.commit()
+        usage_meter.invalidate(sub.user_id)
 
         return jsonify({
             "success": True, 
@@ -587,58 +604,89 @@ def bulk_actions():
         if not ids:
             return jsonify({"success": False, "error": "No subscriptions selected"}), 400
 
-        subscriptions = Subscription.query.filter(Subscription.id.in_(ids)).all()
-        if not subscriptions:
-            return jsonify({"success": False, "error": "No valid subscriptions found"}), 404
+        if action not in BULK_ACTIONS:
+            return jsonify({"success": False, "error": "Invalid action"}), 400
+
+        def report_progress(done, total):
+            logging.info(f"Bulk action '{action}': {done}/{total} subscription(s)")
+            socketio.emit('subscription_bulk_progress', {
+                'action': action,
+                'done': done,
+                'total': total
+            }, to=user_room(identity))
+
+        bulk = BulkSubscriptionActions(
+            identity,
+            ids,
+            progress=report_progress if len(ids) > BULK_PROGRESS_THRESHOLD else None
+        )
 
-        processed_count = 0
-        
         if action == 'extend':
             extend_days = int(data.get('extend_days', 30))
-            months = max(1, extend_days // 30)
-            for sub in subscriptions:
-                sub.extend_subscription(months=months)
-                processed_count += 1
-                
+            bulk.extend(months=max(1, extend_days // 30))
+
         elif action == 'cancel':
-            reason = data.get('reason', 'Bulk cancellation by admin')
-            for sub in subscriptions:
-                if sub.status in ['active', 'trial']:
-                    sub.cancel_subscription(reason=reason, immediate=True)
-                    processed_count += 1
-                    
+            bulk.cancel(reason=data.get('reason', 'Bulk cancellation by admin'))
+
         elif action == 'change_plan':
-            new_plan_id = data.get('new_plan_id')
-            new_plan = SubscriptionPlan.query.get(new_plan_id)
+            new_plan = SubscriptionPlan.query.get(data.get('new_plan_id'))
             if not new_plan:
                 return jsonify({"success": False, "error": "Invalid plan ID"}), 404
-            for sub in subscriptions:
-                sub.plan_id = new_plan_id
-                sub.end_date = datetime.now(tz=timezone.utc) + timedelta(days=30 * new_plan.duration_months)
-                sub.current_period_end = sub.end_date
-                processed_count += 1
-                
+            bulk.change_plan(new_plan)
+
         elif action == 'send_notification':
             message = data.get('message')
             if not message:
                 return jsonify({"success": False, "error": "Message is required for notification"}), 400
-            # TODO: Implement notification logic
-            processed_count = len(subscriptions)
-            
-        else:
-            return jsonify({"success": False, "error": "Invalid action"}), 400
+            bulk.send_notification(message, title=data.get('title'))
+
+        if bulk.processed == 0 and action != 'cancel':
+            db.session.rollback()
+            return jsonify({"success": False, "error": "No valid subscriptions found"}), 404
 
         db.session.commit()
-        
+        usage_meter.invalidate()
+
         return jsonify({
-            "success": True, 
-            "message": f"Bulk action '{action}' executed successfully on {processed_count} subscription(s)"
+            "success": True,
+            "message": f"Bulk action '{action}' executed successfully on {bulk.processed} subscription(s)",
+            "processed": bulk.processed,
+            "chunks": bulk.chunks
         })
     except Exception as e:
         db.session.rollback()
         logging.error(f"Error in bulk actions: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@admin_bp.route('/api/subscriptions/sweeper', methods=['GET'])
+@jwt_required()
+def get_sweeper_stats():
+    """Fetch statistics of the last subscription lifecycle sweep"""
+    identity = get_jwt_identity()
+    if not is_admin(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    return jsonify({
+        "success": True,
+        "last_run": subscription_lifecycle_service.last_run_stats or None
+    })
+
+@admin_bp.route('/api/subscriptions/sweeper', methods=['POST'])
+@jwt_required()
+def run_sweeper():
+    """Run the subscription lifecycle sweep immediately"""
+    identity = get_jwt_identity()
+    if not is_admin(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    try:
+        stats = subscription_lifecycle_service.sweep_subscriptions()
+        return jsonify({"success": True, "last_run": stats})
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error running subscription sweep: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @admin_bp.route('/api/plans', methods=['GET'])
 @jwt_required()
 def get_plans():
@@ -648,29 +696,7 @@ def get_plans():
         return jsonify({"msg": "Unauthorized"}), 403
 
     try:
-        plans = SubscriptionPlan.query.order_by(
-            SubscriptionPlan.sort_order, 
-            SubscriptionPlan.name
-        ).all()
-        
-        plan_data = []
-        for plan in plans:
-            plan_data.append({
-                'id': plan.id,
-                'name': plan.name,
-                'description': plan.description,
-                'price': float(plan.price),
-                'max_athletes': plan.max_athletes,
-                'max_workouts': plan.max_workouts,
-                'storage_gb': plan.storage_gb,
-                'features': plan.features or [],
-                'duration_months': plan.duration_months,
-                'is_active': plan.is_active,
-                'sort_order': plan.sort_order,
-                'active_subscriptions': plan.active_subscriptions_count
-            })
-            
-        return jsonify({"success": True, "plans": plan_data})
+        return jsonify({"success": True, "plans": plan_catalog.all_plans()})
     except Exception as e:
         logging.error(f"Error getting plans: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -714,7 +740,7 @@ def create_plan():
             features=features,
             duration_months=int(data.get('duration_months', 1)),
             is_active=is_active,
-            sort_order=SubscriptionPlan.query.count() + 1,
+            sort_order=plan_catalog.next_sort_order(),
             priority_support=data.get('priority_support', False),
             analytics_access=data.get('analytics_access', False),
             custom_branding=data.get('custom_branding', False),
@@ -1,10 +1,18 @@
-from flask import Blueprint, request, jsonify, render_template, flash
+from flask import Blueprint, Response, current_app, request, jsonify, render_template, flash, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import hmac
 from datetime import datetime, timedelta
+import io
 from sqlalchemy import func, and_
 from app import db
 from app.models.user import User
 from app.models.login_logs import LoginLog
+from app.services.login_throttle_service import login_throttle
+from app.services.offload_service import offloader
+from app.services.query_stats_service import query_stats
+from app.services.request_profiler_service import request_profiler
+from app.services.metrics_service import metrics
+from app.services.cache_service import cached
 from app.models.support_tickets import SupportTicket
 from . import admin_bp
 
@@ -166,6 +174,7 @@ def block_ip():
         })
         
         db.session.commit()
+        login_throttle.block_ip(ip_address)
         
         return jsonify({
             "success": True, 
@@ -385,34 +394,124 @@ def get_dashboard_stats():
         return jsonify({"msg": "Unauthorized"}), 403
     
     try:
-        today = datetime.utcnow().date()
-        today_start = datetime.combine(today, datetime.min.time())
-        
-        stats = {
-            'login_stats': {
-                'total': LoginLog.query.count(),
-                'today': LoginLog.query.filter(LoginLog.created_at >= today_start).count(),
-                'failed': LoginLog.query.filter_by(status='failed').count(),
-                'suspicious': LoginLog.query.filter_by(is_suspicious=True).count()
-            },
-            'ticket_stats': {
-                'total': SupportTicket.query.count(),
-                'pending': SupportTicket.query.filter_by(status='pending').count(),
-                'in_progress': SupportTicket.query.filter_by(status='in_progress').count(),
-                'resolved': SupportTicket.query.filter_by(status='resolved').count(),
-                'high_priority': SupportTicket.query.filter_by(priority='high').count()
-            },
-            'security_stats': {
-                'blocked_ips': LoginLog.query.filter_by(is_suspicious=True).distinct(LoginLog.ip_address).count(),
-                'active_sessions': 247,  # You can implement actual session counting
-                'alerts': 8
-            }
-        }
-        
         return jsonify({
             "success": True,
-            "stats": stats
+            "stats": dashboard_counters(datetime.utcnow().date())
         })
         
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@cached(tags=(LoginLog, SupportTicket), ttl=60, name="admin_dashboard_counters")
+def dashboard_counters(today):
+    today_start = datetime.combine(today, datetime.min.time())
+    return {
+        'login_stats': {
+            'total': LoginLog.query.count(),
+            'today': LoginLog.query.filter(LoginLog.created_at >= today_start).count(),
+            'failed': LoginLog.query.filter_by(status='failed').count(),
+            'suspicious': LoginLog.query.filter_by(is_suspicious=True).count()
+        },
+        'ticket_stats': {
+            'total': SupportTicket.query.count(),
+            'pending': SupportTicket.query.filter_by(status='pending').count(),
+            'in_progress': SupportTicket.query.filter_by(status='in_progress').count(),
+            'resolved': SupportTicket.query.filter_by(status='resolved').count(),
+            'high_priority': SupportTicket.query.filter_by(priority='high').count()
+        },
+        'security_stats': {
+            'blocked_ips': LoginLog.query.filter_by(is_suspicious=True).distinct(LoginLog.ip_address).count(),
+            'active_sessions': 247,  # You can implement actual session counting
+            'alerts': 8
+        }
+    }
+
+# API to inspect the CPU offload pool (queue depth and per-task timings)
+@admin_bp.route('/api/offload-stats', methods=['GET'])
+@jwt_required()
+def get_offload_stats():
+    identity = get_jwt_identity()
+    if not is_admin(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    return jsonify({"success": True, "stats": offloader.snapshot()})
+
+# API for per-endpoint SQL counts, DB time and repeated (N+1) statements
+@admin_bp.route('/api/query-report', methods=['GET'])
+@jwt_required()
+def get_query_report():
+    identity = get_jwt_identity()
+    if not is_admin(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    sort = request.args.get('sort', 'queries_avg')
+    if sort not in ('queries_avg', 'queries_max', 'db_ms_avg', 'db_ms_max', 'duplicates_avg', 'requests'):
+        return jsonify({"success": False, "error": "Invalid sort"}), 400
+    if request.args.get('reset') == 'true':
+        query_stats.reset()
+        return jsonify({"success": True, "endpoints": []})
+
+    return jsonify({"success": True, "endpoints": query_stats.report(sort)})
+
+# API to inspect and adjust request profiling at runtime (slow log threshold, sampling, endpoints)
+@admin_bp.route('/api/profiling', methods=['GET', 'PUT'])
+@jwt_required()
+def profiling_settings():
+    identity = get_jwt_identity()
+    if not is_admin(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    if request.method == 'PUT':
+        try:
+            request_profiler.update(request.get_json() or {})
+        except (TypeError, ValueError) as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+    return jsonify({
+        "success": True,
+        "settings": request_profiler.settings(),
+        "profiles": request_profiler.profiles()
+    })
+
+# API to drop the stored profiles
+@admin_bp.route('/api/profiling/profiles', methods=['DELETE'])
+@jwt_required()
+def clear_profiles():
+    identity = get_jwt_identity()
+    if not is_admin(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    request_profiler.clear()
+    return jsonify({"success": True})
+
+# API to download a stored profile as pstats (.prof), speedscope JSON or a text report
+@admin_bp.route('/api/profiling/profiles/<int:profile_id>', methods=['GET'])
+@jwt_required()
+def download_profile(profile_id):
+    identity = get_jwt_identity()
+    if not is_admin(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    try:
+        exported = request_profiler.export(profile_id, request.args.get('format', 'pstats'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if exported is None:
+        return jsonify({"success": False, "error": "Profile not found"}), 404
+
+    data, filename, mimetype = exported
+    return send_file(io.BytesIO(data), mimetype=mimetype, as_attachment=True, download_name=filename)
+
+# Prometheus scrape endpoint: admin session, or "Authorization: Bearer <METRICS_TOKEN>"
+@admin_bp.route('/metrics', methods=['GET'])
+@jwt_required(optional=True)
+def prometheus_metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    supplied = request.headers.get('Authorization', '')
+    scraper = bool(token) and hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode())
+    if not scraper:
+        identity = get_jwt_identity()
+        if not identity or not is_admin(identity):
+            return jsonify({"msg": "Unauthorized"}), 403
+
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
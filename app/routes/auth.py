@@ -6,8 +6,6 @@ from flask_jwt_extended import (
     set_access_cookies,
     unset_jwt_cookies
 )
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from werkzeug.security import generate_password_hash
 import io
 import csv
@@ -17,6 +15,7 @@ from datetime import datetime, timedelta
 from app import db
 from app.models.user import User
 from app.schemas.user import UserSchema
+from app.services.login_throttle_service import login_throttle, login_log_buffer
 
 auth_bp = Blueprint("auth", __name__)
 user_schema = UserSchema()
@@ -43,9 +42,16 @@ def validate_password(password):
 def register_page():
     return render_template("auth/register.html")
 
+def too_many_attempts(retry_after):
+    response = jsonify({"msg": "Too many attempts. Please try again later."})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 429
+
 @auth_bp.route("/register", methods=["POST"])
-# @limiter.limit("5 per hour")
 def register():
+    if not login_throttle.allow_registration(request.remote_addr):
+        return too_many_attempts(3600)
+
     data = request.get_json()
     name = data.get("name", "").strip()
     email = data.get("email", "").strip().lower()
@@ -92,7 +98,6 @@ def login_page():
     return render_template("auth/login.html")
 
 @auth_bp.route("/login", methods=["POST"])
-# @limiter.limit("10 per 15 minutes")
 def login_post():
     if not request.is_json:
         return jsonify({"msg": "Missing JSON"}), 400
@@ -104,19 +109,31 @@ def login_post():
     if not email or not password:
         return jsonify({"msg": "Email and password are required"}), 400
 
+    ip_address = request.remote_addr
+    user_agent = request.headers.get("User-Agent")
+
+    # Reserve the attempt before any lookup or password hashing, so concurrent
+    # attempts cannot all pass the check; locked-out emails and IPs are rejected here
+    retry_after = login_throttle.retry_after(ip_address, email) or login_throttle.reserve(ip_address, email)
+    if retry_after:
+        login_log_buffer.add(
+            "failed", ip_address, user_agent=user_agent,
+            details=f"Locked out: too many failed attempts for {email}",
+            is_suspicious=True
+        )
+        return too_many_attempts(retry_after)
+
     user = User.query.filter_by(email=email).first()
     
-    # if not user or not user.check_password(password):
-    #     return jsonify({"msg": "Invalid credentials"}), 401
-    if not user:
-        print(f"Login failed: User with email {email} not found.")
+    if not user or not user.check_password(password):
+        login_log_buffer.add(
+            "failed", ip_address, user_id=user.id if user else None, user_agent=user_agent,
+            details="Incorrect password" if user else f"Unknown email {email}"
+        )
         return jsonify({"msg": "Invalid credentials"}), 401
 
-    if user.check_password(password):
-        print(f"Login successful for user {user.email}")
-    else:
-        print(f"Login failed: Incorrect password for user {user.email}")
-        return jsonify({"msg": "Invalid credentials"}), 401
+    login_throttle.register_success(ip_address, email)
+    login_log_buffer.add("success", ip_address, user_id=user.id, user_agent=user_agent)
 
 
     if user.status == "pending":
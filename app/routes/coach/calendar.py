@@ -1,8 +1,8 @@
-from flask import Blueprint, jsonify, render_template
+from flask import Blueprint, jsonify, render_template, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
-from app import db
-from app.models import User, CoachAthlete, SessionSchedule, TrainingPlan
+from app.models import User
+from app.services.calendar_service import CalendarRangeError, coach_events, parse_window
+from app.services.query_stats_service import query_budget
 
 from . import coach_bp
 
@@ -20,39 +20,23 @@ def calendar():
     return render_template("coach/calendar.html")
 
 @coach_bp.route("/calendar_events", methods=["GET"])
+@query_budget(4)
 @jwt_required()
 def calendar_events():
     identity = get_jwt_identity()
     if not is_coach(identity):
         return jsonify({"msg": "Unauthorized"}), 403
 
-    sessions = (
-        db.session.query(SessionSchedule)
-        .join(CoachAthlete, CoachAthlete.athlete_id == SessionSchedule.athlete_id)
-        .filter(CoachAthlete.coach_id == identity, CoachAthlete.is_active == True)
-        .all()
-    )
-    plans = (
-        db.session.query(TrainingPlan)
-        .join(CoachAthlete, CoachAthlete.athlete_id == TrainingPlan.athlete_id)
-        .filter(CoachAthlete.coach_id == identity, CoachAthlete.is_active == True)
-        .all()
-    )
-
-    events = []
-    for session in sessions:
-        events.append({
-            "title": f"{session.title} ({session.athlete.name})",
-            "start": session.scheduled_at.isoformat(),
-            "end": session.scheduled_at.isoformat(),
-            "color": "green" if session.type == "virtual" else "blue"
-        })
-    for plan in plans:
-        events.append({
-            "title": f"{plan.title} ({plan.athlete.name})",
-            "start": plan.start_date.isoformat(),
-            "end": plan.end_date.isoformat() if plan.end_date else None,
-            "color": "purple"
-        })
-
-    return jsonify(events)
\ No newline at end of file
+    try:
+        start, end = parse_window(request.args)
+    except CalendarRangeError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    response = jsonify(coach_events(identity, start, end))
+    # Strong validator over the body: an unchanged window answers 304
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Authorization")
+    response.vary.add("Cookie")
+    return response.make_conditional(request)
@@ -6,6 +6,7 @@ from sqlalchemy import func, and_
 from datetime import datetime, timedelta
 from app import db
 from app.models import User, CoachAthlete, TrainingPlan, WorkoutLog, Feedback, Message, ActivityLog, AthleteProgress, HealthRecord, ReadinessScore, InjuryRecord, AthletePlan, AthleteProfile, WorkoutSession, NutritionPlan
+from app.services.training_plan_service import plan_rows
 from werkzeug.security import generate_password_hash
 
 from . import coach_bp
@@ -249,7 +250,7 @@ def edit_plans_list():
     if not is_coach(identity):
         return redirect(url_for("auth.login"))
 
-    plans = TrainingPlan.query.filter_by(coach_id=identity).all()
+    plans = plan_rows(TrainingPlan.coach_id == identity)
     return render_template("coach/manage_plans.html", plans=plans)
 
 # Delete a training plan
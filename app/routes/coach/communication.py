@@ -38,7 +38,7 @@ def get_chats():
                 {
                     'id': user.id,
                     'name': user.name,
-                    'profile_image': user.profile_image or '/static/images/default.jpg',
+                    'profile_image': user.avatar_url('thumb'),
                     'is_online': user.status == 'active' and user.last_active > func.now() - func.interval('15 minutes'),
                     'last_seen': user.last_active.isoformat() if user.last_active else None
                 } for user in users
@@ -127,7 +127,7 @@ def get_chats():
             chats.append({
                 'id': user.id,
                 'name': user.name,
-                'profile_image': user.profile_image or '/static/images/default.jpg',
+                'profile_image': user.avatar_url('thumb'),
                 'last_message': last_message or '',
                 'last_message_time': last_message_time.isoformat() if last_message_time else '',
                 'is_online': user.status == 'active' and user.last_active > func.now() - func.interval('15 minutes'),
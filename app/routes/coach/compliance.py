@@ -1,15 +1,22 @@
-from flask import Blueprint, jsonify, render_template
+from flask import Blueprint, jsonify, render_template, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
 from app import db
-from app.models import User, CoachAthlete, WorkoutLog
+from app.models import User
+from app.services.compliance_service import MAX_WINDOW_DAYS, WINDOW_DAYS, coach_compliance
 
 from . import coach_bp
 
+
 def is_coach(user_id):
     user = User.query.get(user_id)
     return user and user.role == "coach"
 
+def _report_args():
+    days = min(max(request.args.get("days", WINDOW_DAYS, type=int) or WINDOW_DAYS, 1), MAX_WINDOW_DAYS)
+    sort = request.args.get("sort", "compliance_rate")
+    descending = request.args.get("order", "desc") != "asc"
+    return days, sort, descending
+
 @coach_bp.route("/compliance", methods=["GET"])
 @jwt_required()
 def compliance():
@@ -17,35 +24,17 @@ def compliance():
     if not is_coach(identity):
         return jsonify({"msg": "Unauthorized"}), 403
 
-    athletes = (
-        db.session.query(User)
-        .join(CoachAthlete, CoachAthlete.athlete_id == User.id)
-        .filter(CoachAthlete.coach_id == identity, CoachAthlete.is_active == True)
-        .all()
-    )
-    compliance_data = []
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30)
-
-    for athlete in athletes:
-        total_logs = WorkoutLog.query.filter(
-            WorkoutLog.athlete_id == athlete.id,
-            WorkoutLog.logged_at >= start_date,
-            WorkoutLog.logged_at <= end_date
-        ).count()
-        completed_logs = WorkoutLog.query.filter(
-            WorkoutLog.athlete_id == athlete.id,
-            WorkoutLog.logged_at >= start_date,
-            WorkoutLog.logged_at <= end_date,
-            WorkoutLog.compliance_status == "completed"
-        ).count()
-        compliance_rate = round((completed_logs / total_logs * 100) if total_logs > 0 else 0, 1)
-        compliance_data.append({
-            "athlete_id": athlete.id,
-            "name": athlete.name,
-            "compliance_rate": compliance_rate,
-            "total_logs": total_logs,
-            "completed_logs": completed_logs
-        })
-
-    return render_template("coach/compliance.html", compliance_data=compliance_data)
\ No newline at end of file
+    days, sort, descending = _report_args()
+    report = coach_compliance(identity, days=days, sort=sort, descending=descending)
+    return render_template("coach/athlete_compliance.html", compliance_data=report["athletes"], report=report)
+
+@coach_bp.route("/api/compliance", methods=["GET"])
+@jwt_required()
+def compliance_api():
+    """Team compliance for a window of ``days`` with per-athlete trend, sorted by ``sort``/``order``"""
+    identity = get_jwt_identity()
+    if not is_coach(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    days, sort, descending = _report_args()
+    return jsonify(coach_compliance(identity, days=days, sort=sort, descending=descending)), 200
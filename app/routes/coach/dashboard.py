@@ -8,6 +8,7 @@ from app.models import (
     ReadinessScore, TrainingPlan, AthleteProfile,
     ActivityLog, MLInsight
 )
+from app.services.compliance_service import completion_totals
 import traceback
 
 from . import coach_bp
@@ -54,32 +55,16 @@ def dashboard():
         
         avg_readiness = round(sum(readiness_scores) / len(readiness_scores), 1) if readiness_scores else "N/A"
         
-        # Total workouts
-        total_workouts_count = db.session.query(func.count(WorkoutLog.id)).filter(
-            WorkoutLog.athlete_id.in_(athlete_ids)
-        ).scalar() or 0
+        # Total workouts and team completion rate
+        team_workouts = completion_totals(athlete_ids)
+        total_workouts_count = team_workouts['total_logs']
         
         # Total plans
         total_plans_count = db.session.query(func.count(TrainingPlan.id)).filter(
             TrainingPlan.coach_id == identity
         ).scalar() or 0
 
-        # Team completion rate
-        workout_stats = db.session.query(
-            func.count(WorkoutLog.id).label('total'),
-            func.sum(
-                db.case(
-                    (WorkoutLog.completion_status == 'completed', 1),
-                    else_=0
-                )
-            ).label('completed')
-        ).filter(WorkoutLog.athlete_id.in_(athlete_ids)).first()
-        
-        total_workouts = workout_stats.total or 0
-        completed_workouts = workout_stats.completed or 0
-        team_completion_rate = 0
-        if total_workouts > 0:
-            team_completion_rate = round((completed_workouts / total_workouts) * 100, 1)
+        team_completion_rate = team_workouts['compliance_rate']
 
         # Find athletes needing attention
         attention_needed_athletes = []
@@ -7,13 +7,15 @@ from flask import Blueprint, request, jsonify, render_template, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import func, desc, and_, or_
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash
+from app.services.offload_service import hash_password
 from app import db
 from app.models import (
     User, CoachAthlete, TrainingPlan, WorkoutLog,
     ActivityLog, AthleteProgress, AthleteProfile, AthletePlan,
     ReadinessScore, MLInsight
 )
+from app.services.usage_metering_service import usage_meter
+from app.services.offload_service import offloader
 from . import coach_bp
 
 # ✅ استيراد مكتبة traceback للحصول على تفاصيل الخطأ
@@ -77,12 +79,15 @@ def run_prediction_service(athlete_id, input_data):
         except (ValueError, TypeError):
             return default
 
-    try:
+    # Read the profile here; the worker thread has no app context to lazy-load with
+    profile_age, profile_weight, profile_height = athlete_profile.age, athlete_profile.weight, athlete_profile.height
+
+    def predict():
         # Prepare data for the new injury prediction model
         ml_input_df = pd.DataFrame([{
-            "Player_Age": safe_int("Player_Age", athlete_profile.age),
-            "Player_Weight": safe_float("Player_Weight", athlete_profile.weight),
-            "Player_Height": safe_float("Player_Height", athlete_profile.height),
+            "Player_Age": safe_int("Player_Age", profile_age),
+            "Player_Weight": safe_float("Player_Weight", profile_weight),
+            "Player_Height": safe_float("Player_Height", profile_height),
             "Previous_Injuries": safe_int("Previous_Injuries", input_data.get("previous_injuries", 0)),
             "Training_Intensity": safe_float("Training_Intensity", input_data.get("training_intensity", 5.0)),
             "Recovery_Time": safe_float("Recovery_Time", input_data.get("recovery_time", 1.0))
@@ -129,6 +134,9 @@ def run_prediction_service(athlete_id, input_data):
             "readiness_score": int(readiness_score)
         }, 200
 
+    try:
+        # pandas feature engineering and the model run on a worker thread, not the hub
+        return offloader.run(predict, name="injury_prediction")
     except Exception as e:
         print("--- PREDICTION SERVICE ERROR ---")
         print(f"Error Details: {str(e)}")
@@ -227,7 +235,7 @@ def get_coach_athletes():
             else:
                 last_activity = "N/A"
 
-            profile_image_url = url_for('static', filename='uploads/profile/' + (user.profile_image or 'default.jpeg'))
+            profile_image_url = user.avatar_url('thumb')
 
             athlete_list.append({
                 "id": user.id,
@@ -315,7 +323,7 @@ def get_athlete_details(athlete_id):
 
     recent_activities = get_recent_activities(athlete_id)
     
-    profile_image_url = url_for('static', filename='uploads/profile/' + (athlete.profile_image or 'default.jpeg'))
+    profile_image_url = athlete.avatar_url('avatar')
 
     # ✅ تم إضافة الحقول الجديدة إلى الـ JSON response
     return jsonify({
@@ -487,6 +495,7 @@ def delete_athlete(athlete_id):
     if not link:
         return jsonify({"msg": "Not your athlete"}), 403
     try:
+        was_active = link.is_active
         link.is_active = False
         link.status = "unassigned"
         athlete = User.query.get(athlete_id)
@@ -498,6 +507,8 @@ def delete_athlete(athlete_id):
         )
         db.session.add(activity)
         db.session.commit()
+        if was_active:
+            usage_meter.record(identity, "athletes", -1)
         return jsonify({"msg": "Athlete unassigned successfully. Admin can reassign to another coach.","status": "unassigned"}), 200
     except Exception as e:
         db.session.rollback()
@@ -674,11 +685,13 @@ def add_athlete():
             return jsonify({"msg": f"Missing required field: {field}"}), 400
     if User.query.filter_by(email=data.get("email")).first():
         return jsonify({"msg": "Email already registered"}), 400
+    if not usage_meter.check(identity, "athletes"):
+        return jsonify({"msg": "Athlete limit reached for your subscription plan"}), 403
     try:
         new_athlete = User(
             name=data.get("name"),
             email=data.get("email"),
-            password_hash=generate_password_hash(data.get("password")),
+            password_hash=hash_password(data.get("password")),
             role="athlete",
             status="active",
             created_at=datetime.utcnow()
@@ -711,6 +724,7 @@ def add_athlete():
         )
         db.session.add(activity)
         db.session.commit()
+        usage_meter.record(identity, "athletes")
         return jsonify({"msg": "Athlete added successfully", "athlete_id": new_athlete.id}), 201
     except Exception as e:
         db.session.rollback()
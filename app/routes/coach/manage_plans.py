@@ -1,14 +1,15 @@
 from flask import Blueprint, request, jsonify, render_template
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from app import db
 from app.models import User, CoachAthlete, TrainingPlan, WorkoutSession, NutritionPlan
+from app.services.compliance_service import MAX_WINDOW_DAYS, WINDOW_DAYS, completion_totals
+from app.services.image_pipeline_service import ImageUploadError, image_pipeline
+from app.services.query_stats_service import query_budget
+from app.services.training_plan_service import limit_arg, plan_detail, plan_page
 from sqlalchemy import desc, and_, or_
-import os
-from werkzeug.utils import secure_filename
 from . import coach_bp
 
-UPLOAD_FOLDER = 'static/uploads/plans'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
 def allowed_file(filename):
@@ -37,6 +38,7 @@ def training_plans_management():
     return render_template("coach/training_plans.html", athletes=athletes)
 
 @coach_bp.route("/api/training-plans", methods=["GET"])
+@query_budget(3)
 @jwt_required()
 def get_all_plans():
     """Get all training plans for coach's athletes"""
@@ -49,51 +51,36 @@ def get_all_plans():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
 
-    # Base query
-    query = (
-        db.session.query(TrainingPlan)
-        .filter(TrainingPlan.coach_id == identity)
-    )
+    criteria = [TrainingPlan.coach_id == identity]
 
     # Apply filters
     if athlete_id:
-        query = query.filter(TrainingPlan.athlete_id == athlete_id)
+        criteria.append(TrainingPlan.athlete_id == athlete_id)
     
     if status and status != 'all':
-        query = query.filter(TrainingPlan.status == status)
-    
-    if start_date:
-        query = query.filter(TrainingPlan.start_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+        criteria.append(TrainingPlan.status == status)
     
-    if end_date:
-        query = query.filter(TrainingPlan.end_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-
-    plans = query.order_by(desc(TrainingPlan.created_at)).all()
-
-    result = []
-    for plan in plans:
-        plan_dict = {
-            'id': plan.id,
-            'athlete_id': plan.athlete_id,
-            'athlete_name': plan.athlete.name if plan.athlete else 'Unknown',
-            'title': plan.title,
-            'description': plan.description,
-            'start_date': plan.start_date.isoformat(),
-            'end_date': plan.end_date.isoformat() if plan.end_date else None,
-            'duration_weeks': plan.duration_weeks,
-            'status': plan.status,
-            'image_url': plan.image_url,
-            'exercises': plan.exercises or {},
-            'created_at': plan.created_at.isoformat() if plan.created_at else None
-        }
-        
-        # Count associated workouts
-        workout_count = WorkoutSession.query.filter_by(plan_id=plan.id).count() if hasattr(WorkoutSession, 'plan_id') else 0
-        plan_dict['workout_count'] = workout_count
+    try:
+        if start_date:
+            criteria.append(TrainingPlan.start_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
         
-        result.append(plan_dict)
+        if end_date:
+            criteria.append(TrainingPlan.end_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    except ValueError:
+        return jsonify({"msg": "Invalid date format"}), 400
+
+    # Athlete names and workout counts come from the same grouped query;
+    # exercises are left out and served by the detail endpoint
+    plans, next_cursor = plan_page(
+        *criteria,
+        after=request.args.get('after', type=int),
+        limit=limit_arg(request.args)
+    )
 
-    return jsonify(result), 200
+    response = jsonify(plans)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response, 200
 
 @coach_bp.route("/api/training-plans/<int:plan_id>", methods=["GET"])
 @jwt_required()
@@ -103,27 +90,11 @@ def get_plan_detail(plan_id):
     if not is_coach(identity):
         return jsonify({"msg": "Unauthorized"}), 403
 
-    plan = TrainingPlan.query.filter_by(id=plan_id, coach_id=identity).first()
+    plan_dict = plan_detail(plan_id, TrainingPlan.coach_id == identity)
 
-    if not plan:
+    if not plan_dict:
         return jsonify({"msg": "Plan not found"}), 404
 
-    plan_dict = {
-        'id': plan.id,
-        'athlete_id': plan.athlete_id,
-        'athlete_name': plan.athlete.name if plan.athlete else 'Unknown',
-        'athlete_email': plan.athlete.email if plan.athlete else 'Unknown',
-        'title': plan.title,
-        'description': plan.description,
-        'start_date': plan.start_date.isoformat(),
-        'end_date': plan.end_date.isoformat() if plan.end_date else None,
-        'duration_weeks': plan.duration_weeks,
-        'status': plan.status,
-        'image_url': plan.image_url,
-        'exercises': plan.exercises or {},
-        'created_at': plan.created_at.isoformat() if plan.created_at else None
-    }
-
     return jsonify(plan_dict), 200
 
 @coach_bp.route("/api/training-plans", methods=["POST"])
@@ -155,11 +126,7 @@ def create_plan():
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(f"{athlete_id}_{datetime.now().timestamp()}_{file.filename}")
-                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(file_path)
-                image_url = f'/static/uploads/plans/{filename}'
+                image_url = image_pipeline.store(file, 'plans', user_id=identity).url
 
         # Parse exercises if provided
         exercises = {}
@@ -203,6 +170,9 @@ def create_plan():
 
         return jsonify({"msg": "Training plan created successfully", "plan": result}), 201
 
+    except ImageUploadError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": f"Error creating plan: {str(e)}"}), 500
@@ -245,11 +215,7 @@ def update_plan(plan_id):
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(f"{plan.athlete_id}_{datetime.now().timestamp()}_{file.filename}")
-                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(file_path)
-                plan.image_url = f'/static/uploads/plans/{filename}'
+                plan.image_url = image_pipeline.store(file, 'plans', user_id=identity).url
 
         db.session.commit()
 
@@ -262,6 +228,9 @@ def update_plan(plan_id):
 
         return jsonify({"msg": "Plan updated successfully", "plan": result}), 200
 
+    except ImageUploadError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": f"Error updating plan: {str(e)}"}), 500
@@ -351,13 +320,17 @@ def get_athlete_plan_stats(athlete_id):
         return jsonify({"msg": "Not authorized for this athlete"}), 403
 
     plans = TrainingPlan.query.filter_by(athlete_id=athlete_id, coach_id=identity).all()
+    window_days = min(max(request.args.get('days', WINDOW_DAYS, type=int) or WINDOW_DAYS, 1), MAX_WINDOW_DAYS)
+    workouts = completion_totals([athlete_id], start=date.today() - timedelta(days=window_days - 1))
+    workouts['window_days'] = window_days
     
     if not plans:
         return jsonify({
             "total_plans": 0,
             "active_plans": 0,
             "completed_plans": 0,
-            "avg_duration_weeks": 0
+            "avg_duration_weeks": 0,
+            "workouts": workouts
         }), 200
 
     active = [p for p in plans if p.status == 'active']
@@ -370,7 +343,8 @@ def get_athlete_plan_stats(athlete_id):
         "archived_plans": len([p for p in plans if p.status == 'archived']),
         "avg_duration_weeks": round(sum(p.duration_weeks for p in plans) / len(plans), 1) if plans else 0,
         "oldest_plan_date": min(p.start_date for p in plans).isoformat() if plans else None,
-        "newest_plan_date": max(p.start_date for p in plans).isoformat() if plans else None
+        "newest_plan_date": max(p.start_date for p in plans).isoformat() if plans else None,
+        "workouts": workouts
     }
 
     return jsonify(stats), 200
\ No newline at end of file
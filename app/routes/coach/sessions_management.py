@@ -5,8 +5,15 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from app import db
 from app.models import User, CoachAthlete, SessionSchedule, Notification
-from sqlalchemy import or_, and_
-from sqlalchemy.sql import func
+from app.services.calendar_service import CalendarRangeError, parse_window
+from app.services.scheduling_service import (
+    SchedulingConflict,
+    SchedulingError,
+    confirm_session,
+    coach_free_slots,
+    parse_slot_minutes,
+    upcoming
+)
 
 from . import coach_bp
 
@@ -72,6 +79,26 @@ def get_coach_sessions():
     return jsonify(events)
 
 
+@coach_bp.route("/api/sessions/free-slots", methods=["GET"])
+@jwt_required()
+def get_free_slots():
+    """Open time in the coach's schedule over a start/end window"""
+    identity = get_jwt_identity()
+    if not is_coach(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+    
+    try:
+        start, end = parse_window(request.args)
+    except CalendarRangeError as e:
+        return jsonify({"msg": str(e)}), 400
+    
+    minutes = parse_slot_minutes(request.args.get("duration", type=int))
+    return jsonify({
+        "duration": minutes,
+        "slots": coach_free_slots(identity, upcoming(start), end, minutes)
+    })
+
+
 @coach_bp.route("/api/sessions/<int:session_id>/approve", methods=["POST"])
 @jwt_required()
 def approve_session(session_id):
@@ -91,28 +118,17 @@ def approve_session(session_id):
     if session.status != "pending":
         return jsonify({"msg": "Session is not pending"}), 400
     
-    # Check for overlapping sessions
-    scheduled_end = session.scheduled_at + timedelta(minutes=session.duration)
-    
-    overlapping_session = SessionSchedule.query.filter(
-        SessionSchedule.coach_id == identity,
-        SessionSchedule.id != session_id,
-        SessionSchedule.status.in_(["scheduled", "in_progress"]),
-        and_(
-            SessionSchedule.scheduled_at < scheduled_end,
-            (SessionSchedule.scheduled_at + func.make_interval(0, 0, 0, 0, 0, SessionSchedule.duration)) > session.scheduled_at
-        )
-    ).first()
-    
-    if overlapping_session:
+    # The overlap check and the status change commit together
+    try:
+        confirm_session(session)
+    except SchedulingConflict as e:
         return jsonify({
-            "msg": "Time slot conflicts with another approved session",
-            "success": False
+            "msg": str(e),
+            "success": False,
+            "conflicts": e.conflicts
         }), 409
-    
-    # Approve the session
-    session.status = "scheduled"
-    db.session.commit()
+    except SchedulingError as e:
+        return jsonify({"msg": str(e), "success": False}), 400
     
     # Send notification to athlete
     athlete = User.query.get(session.athlete_id)
@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from app import db
 from app.models import User, CoachAthlete, WorkoutLog, HealthRecord, AthleteGoal
+from app.services.compliance_service import completion_totals
 
 from . import coach_bp
 
@@ -59,18 +60,7 @@ def progress_data(athlete_id):
         "goals": []
     }
 
-    total_planned = WorkoutLog.query.filter(
-        WorkoutLog.athlete_id == athlete_id,
-        WorkoutLog.logged_at >= start_date,
-        WorkoutLog.logged_at <= end_date
-    ).count()
-    completed_logs = WorkoutLog.query.filter(
-        WorkoutLog.athlete_id == athlete_id,
-        WorkoutLog.logged_at >= start_date,
-        WorkoutLog.logged_at <= end_date,
-        WorkoutLog.compliance_status == "completed"
-    ).count()
-    data["compliance"] = round((completed_logs / total_planned * 100) if total_planned > 0 else 0, 1)
+    data["compliance"] = completion_totals([athlete_id], start_date.date(), end_date.date())["compliance_rate"]
 
     if progress_type == "weight":
         progress_data = HealthRecord.query.filter(
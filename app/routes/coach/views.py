@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, session, redirect, url_for, render_template, flash
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
-from werkzeug.security import generate_password_hash
+from app.services.offload_service import hash_password
 from flask_jwt_extended import JWTManager
 from flask import current_app
 
@@ -11,6 +11,7 @@ from app.schemas.user import UserSchema
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 
 from app.models import User, CoachAthlete, TrainingPlan, Feedback, WorkoutLog, TrainingGroup, AthleteGroup, ActivityLog, Subscription, WorkoutFile, ReadinessScore, MLInsight, Message
+from app.services.training_plan_service import plan_rows
 
 from . import coach_bp
 
@@ -176,7 +177,7 @@ def add_coach():
             email=email,
             role="coach",
             status='active',
-            password_hash=generate_password_hash(password)
+            password_hash=hash_password(password)
         )
 
         db.session.add(new_coach)
@@ -406,13 +407,13 @@ def get_plans_api():
     if not coach or coach.role != "coach":
         return jsonify({"msg": "Unauthorized"}), 403
 
-    plans = TrainingPlan.query.filter_by(coach_id=coach.id).all()
+    plans = plan_rows(TrainingPlan.coach_id == coach.id)
     
     return jsonify([
         {
             "id": p.id,
             "title": p.title,
-            "athlete": p.athlete.name if p.athlete else "Unassigned",
+            "athlete": p.athlete_name or "Unassigned",
             "start_date": p.start_date.isoformat() if p.start_date else None,
             "end_date": p.end_date.isoformat() if p.end_date else None,
             "status": p.status
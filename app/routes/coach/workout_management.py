@@ -3,14 +3,17 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, date
 from app import db
 from app.models import User, CoachAthlete, WorkoutLog
-from sqlalchemy import desc, and_, or_
-import os
-from werkzeug.utils import secure_filename
+from app.services.usage_metering_service import usage_meter
+from app.services.heart_rate_store_service import read_samples
+from app.services.workout_list_service import (
+    fetch_list, summary_query
+)
+from app.services.image_pipeline_service import ImageUploadError, image_pipeline
+from sqlalchemy import desc, and_, or_, select
 import json
 
 from . import coach_bp
 
-UPLOAD_FOLDER = 'static/uploads/workouts'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
 def allowed_file(filename):
@@ -51,34 +54,31 @@ def get_all_workouts():
     workout_type = request.args.get('workout_type')
 
     # Base query - get workouts for all coach's athletes
-    query = (
-        db.session.query(WorkoutLog)
-        .join(CoachAthlete, CoachAthlete.athlete_id == WorkoutLog.athlete_id)
-        .filter(CoachAthlete.coach_id == identity, CoachAthlete.is_active == True)
-    )
+    criteria = [
+        WorkoutLog.athlete_id.in_(
+            select(CoachAthlete.athlete_id).where(
+                CoachAthlete.coach_id == identity,
+                CoachAthlete.is_active == True
+            )
+        )
+    ]
 
     # Apply filters
     if athlete_id:
-        query = query.filter(WorkoutLog.athlete_id == athlete_id)
+        criteria.append(WorkoutLog.athlete_id == athlete_id)
     
     if start_date_str:
-        query = query.filter(WorkoutLog.date >= datetime.strptime(start_date_str, '%Y-%m-%d').date())
+        criteria.append(WorkoutLog.date >= datetime.strptime(start_date_str, '%Y-%m-%d').date())
     
     if end_date_str:
-        query = query.filter(WorkoutLog.date <= datetime.strptime(end_date_str, '%Y-%m-%d').date())
+        criteria.append(WorkoutLog.date <= datetime.strptime(end_date_str, '%Y-%m-%d').date())
     
     if workout_type and workout_type != 'all':
-        query = query.filter(WorkoutLog.workout_type == workout_type)
+        criteria.append(WorkoutLog.workout_type == workout_type)
 
-    workouts = query.order_by(desc(WorkoutLog.date), desc(WorkoutLog.logged_at)).all()
+    result, headers = fetch_list(summary_query(*criteria), request.args)
 
-    result = []
-    for workout in workouts:
-        workout_dict = workout.to_dict()
-        workout_dict['athlete_name'] = workout.athlete.name if workout.athlete else 'Unknown'
-        result.append(workout_dict)
-
-    return jsonify(result), 200
+    return jsonify(result), 200, headers
 
 @coach_bp.route("/api/workouts/<int:workout_id>", methods=["GET"])
 @jwt_required()
@@ -102,12 +102,45 @@ def get_workout_detail(workout_id):
     if not workout:
         return jsonify({"msg": "Workout not found"}), 404
 
-    workout_dict = workout.to_dict()
+    workout_dict = workout.to_dict(include_heart_rate=True)
     workout_dict['athlete_name'] = workout.athlete.name if workout.athlete else 'Unknown'
     workout_dict['athlete_email'] = workout.athlete.email if workout.athlete else 'Unknown'
 
     return jsonify(workout_dict), 200
 
+@coach_bp.route("/api/workouts/<int:workout_id>/heart-rate", methods=["GET"])
+@jwt_required()
+def get_workout_heart_rate(workout_id):
+    """Raw HR samples of an athlete's workout, optionally limited to an offset range in seconds"""
+    identity = get_jwt_identity()
+    if not is_coach(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    workout = (
+        db.session.query(WorkoutLog)
+        .join(CoachAthlete, CoachAthlete.athlete_id == WorkoutLog.athlete_id)
+        .filter(
+            WorkoutLog.id == workout_id,
+            CoachAthlete.coach_id == identity,
+            CoachAthlete.is_active == True
+        )
+        .first()
+    )
+    if not workout:
+        return jsonify({"msg": "Workout not found"}), 404
+
+    samples = read_samples(
+        workout,
+        start=request.args.get('start', type=int),
+        end=request.args.get('end', type=int),
+        max_points=min(request.args.get('max_points', 0, type=int), 5000) or None
+    )
+    return jsonify({
+        "workout_id": workout.id,
+        "sample_count": workout.hr_sample_count or 0,
+        "samples": samples
+    }), 200
+
 # ================================
 # Coach Workout API
 # ================================
@@ -128,6 +161,8 @@ def create_workout():
         link = CoachAthlete.query.filter_by(coach_id=identity, athlete_id=athlete_id, is_active=True).first()
         if not link:
             return jsonify({"msg": "Not authorized for this athlete"}), 403
+        if not usage_meter.check(identity, 'workouts'):
+            return jsonify({"msg": "Workout limit reached for your subscription plan"}), 403
 
         # ✅ Handle custom workout type
         workout_type_value = request.form.get('workout_type', 'other')
@@ -139,11 +174,7 @@ def create_workout():
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(f"{athlete_id}_{datetime.now().timestamp()}_{file.filename}")
-                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(file_path)
-                image_url = f'/static/uploads/workouts/{filename}'
+                image_url = image_pipeline.store(file, 'workouts', user_id=identity).url
 
         # Create workout
         workout = WorkoutLog(
@@ -166,12 +197,16 @@ def create_workout():
 
         db.session.add(workout)
         db.session.commit()
+        usage_meter.record(identity, 'workouts')
 
         result = workout.to_dict()
         result['athlete_name'] = workout.athlete.name
 
         return jsonify({"msg": "Workout created successfully", "workout": result}), 201
 
+    except ImageUploadError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": f"Error creating workout: {str(e)}"}), 500
@@ -213,17 +248,16 @@ def update_workout(workout_id):
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(f"{workout.athlete_id}_{datetime.now().timestamp()}_{file.filename}")
-                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(file_path)
-                workout.image_url = f'/static/uploads/workouts/{filename}'
+                workout.image_url = image_pipeline.store(file, 'workouts', user_id=identity).url
 
         db.session.commit()
         result = workout.to_dict()
         result['athlete_name'] = workout.athlete.name
         return jsonify({"msg": "Workout updated successfully", "workout": result}), 200
 
+    except ImageUploadError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": f"Error updating workout: {str(e)}"}), 500
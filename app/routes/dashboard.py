@@ -1,6 +1,7 @@
-from flask import Blueprint,render_template, abort, redirect, url_for
-from flask_jwt_extended import jwt_required,get_jwt
+from flask import Blueprint,render_template, abort, redirect, url_for, jsonify, make_response, request
+from flask_jwt_extended import jwt_required,get_jwt, get_jwt_identity
 from app.models import TrainingPlan, Feedback, User
+from app.services.layout_service import layout_fragments, user_summary
 dashboard_bp = Blueprint("dashboard", __name__)
 
 
@@ -21,54 +22,51 @@ def dashboard():
         
 
 
-##### sidebar #####
+##### layout fragments #####
+def _fragment_response(kind):
+    """A role fragment from the in-memory cache; revalidates with its ETag"""
+    fragment = layout_fragments.get(kind, get_jwt().get("role"))
+    if fragment is None:
+        abort(403)
+
+    response = make_response(fragment.html)
+    response.set_etag(fragment.etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = 300
+    response.vary.add("Cookie")
+    return response.make_conditional(request)
+
+
 @dashboard_bp.route("/sidebar")
 @jwt_required()
 def sidebar():
-    claims = get_jwt()
-    role = claims.get("role")
-    
-
-    if role == 'admin':
-        return render_template('shared/admin_sidebar.html')
-    elif role == 'coach':
-        return render_template('shared/coach_sidebar.html')
-    elif role == 'athlete':
-        return render_template('shared/athlete_sidebar.html')
-    else:
-        abort(403)
+    return _fragment_response("sidebar")
 
 
-##### navbar #####
 @dashboard_bp.route("/navbar")
 @jwt_required()
 def navbar():
-    claims = get_jwt()
-    role = claims.get("role")
-
-    if role == 'admin':
-        return render_template('shared/admin_navbar.html')
-    elif role == 'coach':
-        return render_template('shared/coach_navbar.html')
-    elif role == 'athlete':
-        return render_template('shared/athlete_navbar.html')
-    else:
-        abort(403)
+    return _fragment_response("navbar")
 
 
 @dashboard_bp.route("/header")
 @jwt_required()
 def header():
-    claims = get_jwt()
-    role = claims.get("role")
+    # The navbar fragment is the page header
+    return _fragment_response("navbar")
 
-    if role == 'admin':
-        return render_template('shared/admin_header.html')
-    elif role == 'coach':
-        return render_template('shared/coach_header.html')
-    elif role == 'athlete':
-        return render_template('shared/athlete_header.html')
-    else:
-        abort(403)
-        
 
+@dashboard_bp.route("/me")
+@jwt_required()
+def me():
+    """Name, avatar and permissions the layout fragments are personalised with"""
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"msg": "User not found"}), 404
+
+    response = jsonify(user_summary(user))
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+    return response.make_conditional(request)
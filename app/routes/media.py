@@ -0,0 +1,34 @@
+import os
+from flask import Blueprint, abort, send_file
+from app.services.image_pipeline_service import (
+    DIGEST_PATTERN,
+    VARIANT_MAX_AGE,
+    VARIANTS,
+    image_pipeline
+)
+from app.services.metrics_service import metrics
+from app.services.offload_service import offloader
+
+media_bp = Blueprint("media", __name__)
+
+
+@media_bp.route("/<digest>/<variant>.webp")
+def image_variant(digest, variant):
+    """Serve a resized WebP variant; its URL changes whenever the content does"""
+    if variant not in VARIANTS or not DIGEST_PATTERN.match(digest):
+        abort(404)
+
+    path = image_pipeline.variant_path(digest, variant)
+    rendered = os.path.exists(path)
+    metrics.cache_lookup("image_variants", rendered)
+    if not rendered:
+        # Requested before the worker pool got to it
+        source_path = image_pipeline.find_original(digest)
+        if source_path is None:
+            abort(404)
+        offloader.run(image_pipeline.render_variant, digest, variant, source_path, name="image_variants")
+
+    response = send_file(path, mimetype="image/webp", max_age=VARIANT_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -4,7 +4,7 @@ from app.models.user import User
 from app.models.health_record import HealthRecord
 from app.models.athlete_profile import AthleteProfile
 from app.extensions import db
-from werkzeug.utils import secure_filename
+from app.services.image_pipeline_service import ImageUploadError, image_pipeline, is_shared_upload
 import os
 from . import athlete_bp
 
@@ -75,26 +75,27 @@ def upload_profile_image():
 
     try:
         # حفظ الصورة
-        filename = secure_filename(f"profile_{user_id}_{file.filename}")
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        stored = image_pipeline.store(file, "profile", user_id=user_id)
 
         # حذف الصورة القديمة (اختياري)
-        if user.profile_image and user.profile_image != "default.jpg":
+        if user.profile_image and user.profile_image != "default.jpg" and not is_shared_upload(user.profile_image):
             old_path = os.path.join(UPLOAD_FOLDER, user.profile_image)
             if os.path.exists(old_path):
                 os.remove(old_path)
 
         # تحديث قاعدة البيانات
-        user.profile_image = filename
+        user.profile_image = stored.filename
         db.session.commit()
 
         return jsonify({
             "msg": "Image uploaded successfully",
-            "image_url": f"/static/uploads/{filename}"
+            "image_url": stored.url,
+            "avatar_url": stored.variant_url("avatar"),
+            "thumb_url": stored.variant_url("thumb")
         }), 200
 
+    except ImageUploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -206,7 +207,7 @@ def get_profile_data():
             "name": user.name,
             "email": user.email,
             "role": user.role,
-            "profile_image": f"/static/uploads/{user.profile_image}" if user.profile_image else None,
+            "profile_image": user.avatar_url("avatar") if user.profile_image else None,
             "created_at": user.created_at.isoformat() if user.created_at else None
         },
         "profile": {
@@ -240,7 +241,7 @@ def delete_profile_image():
 
     try:
         # حذف الملف من السيرفر
-        if user.profile_image and user.profile_image != "default.jpg":
+        if user.profile_image and user.profile_image != "default.jpg" and not is_shared_upload(user.profile_image):
             old_path = os.path.join(UPLOAD_FOLDER, user.profile_image)
             if os.path.exists(old_path):
                 os.remove(old_path)
@@ -5,9 +5,16 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from app import db
 from app.models import User, CoachAthlete, SessionSchedule, Notification
-from sqlalchemy import or_, and_
-from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy import or_
+from app.services.calendar_service import CalendarRangeError, parse_window
+from app.services.scheduling_service import (
+    SchedulingConflict,
+    SchedulingError,
+    book_session,
+    coach_free_slots,
+    parse_slot_minutes,
+    upcoming
+)
 
 from . import athlete_bp
 
@@ -83,7 +90,6 @@ def book_session_api():
     
     try:
         scheduled_at = datetime.strptime(scheduled_at_str, "%Y-%m-%dT%H:%M")
-        scheduled_end = scheduled_at + timedelta(minutes=duration)
     except ValueError:
         return jsonify({"msg": "Invalid date format"}), 400
 
@@ -91,18 +97,6 @@ def book_session_api():
     if not link:
         return jsonify({"msg": "Not linked to this coach"}), 403
 
-    overlapping_session = SessionSchedule.query.filter(
-        SessionSchedule.coach_id == coach_id,
-        SessionSchedule.status.in_(["scheduled", "in_progress"]),
-        and_(
-            SessionSchedule.scheduled_at < scheduled_end,
-            (SessionSchedule.scheduled_at + func.make_interval(0, 0, 0, 0, 0, SessionSchedule.duration)) > scheduled_at
-        )
-    ).first()
-
-    if overlapping_session:
-        return jsonify({"msg": "This time slot is already booked with this coach."}), 409
-
     session = SessionSchedule(
         coach_id=coach_id,
         athlete_id=identity,
@@ -111,8 +105,14 @@ def book_session_api():
         scheduled_at=scheduled_at,
         status="scheduled"
     )
-    db.session.add(session)
-    db.session.commit()
+    # Checked and committed under the coach's schedule guard; the database's
+    # exclusion constraint rejects a concurrent booking that slips past the check
+    try:
+        book_session(session)
+    except SchedulingConflict as e:
+        return jsonify({"msg": str(e), "conflicts": e.conflicts}), 409
+    except SchedulingError as e:
+        return jsonify({"msg": str(e)}), 400
 
     # 4. Corrected Notification creation
     notification = Notification(
@@ -124,4 +124,28 @@ def book_session_api():
     db.session.add(notification)
     db.session.commit()
     
-    return jsonify({"msg": "Session booked successfully!", "id": session.id}), 201
\ No newline at end of file
+    return jsonify({"msg": "Session booked successfully!", "id": session.id}), 201
+
+
+@athlete_bp.route("/api/coaches/<int:coach_id>/free-slots", methods=["GET"])
+@jwt_required()
+def get_coach_free_slots(coach_id):
+    identity = get_jwt_identity()
+    if not is_athlete(identity):
+        return jsonify({"msg": "Unauthorized"}), 403
+
+    link = CoachAthlete.query.filter_by(coach_id=coach_id, athlete_id=identity, is_active=True).first()
+    if not link:
+        return jsonify({"msg": "Not linked to this coach"}), 403
+
+    try:
+        start, end = parse_window(request.args)
+    except CalendarRangeError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    minutes = parse_slot_minutes(request.args.get("duration", type=int))
+    return jsonify({
+        "coach_id": coach_id,
+        "duration": minutes,
+        "slots": coach_free_slots(coach_id, upcoming(start), end, minutes)
+    })
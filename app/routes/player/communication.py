@@ -76,7 +76,7 @@ def get_chats():
                     else:
                         last_seen = "Just now"
                 
-                profile_image_url = url_for('static', filename=f'uploads/{contact.profile_image}') if contact.profile_image and contact.profile_image != 'default.jpg' else url_for('static', filename='images/default.jpg')
+                profile_image_url = contact.avatar_url('thumb')
 
                 users_list.append({
                     "id": contact.id,
@@ -170,7 +170,7 @@ def get_chats():
                 else:
                     last_seen = "Just now"
             
-            profile_image_url = url_for('static', filename=f'uploads/{contact.profile_image}') if contact.profile_image and contact.profile_image != 'default.jpg' else url_for('static', filename='images/default.jpg')
+            profile_image_url = contact.avatar_url('thumb')
             
             chats.append({
                 "id": contact.id,
@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db
 from app.models.athlete_goals import AthleteGoal
 from app.models.goal_progress_log import GoalProgressLog
+from app.services.goal_progress_service import MAX_CHART_POINTS, progress_logs_by_goal
 from . import athlete_bp
 from datetime import date, datetime
 
@@ -12,6 +13,9 @@ from datetime import date, datetime
 def get_goals():
     user_id = get_jwt_identity()
     goals = AthleteGoal.query.filter_by(athlete_id=user_id).all()
+    max_points = min(max(request.args.get("points", MAX_CHART_POINTS, type=int) or MAX_CHART_POINTS, 3), 500)
+    # Every goal's chart points in one query instead of one per goal
+    logs_by_goal = progress_logs_by_goal([g.id for g in goals], max_points)
 
     result = []
     for g in goals:
@@ -31,13 +35,6 @@ def get_goals():
         else:
             status = "not started"
         
-        # Get progress log data for charting
-        progress_logs = GoalProgressLog.query.filter_by(goal_id=g.id).order_by(GoalProgressLog.recorded_at.asc()).all()
-        log_data = [{
-            "value": log.recorded_value,
-            "date": log.recorded_at.isoformat()
-        } for log in progress_logs]
-        
         # Get priority from goal or default to medium
         priority = getattr(g, 'priority', 'medium') or 'medium'
         
@@ -58,7 +55,7 @@ def get_goals():
             "description": description,
             "created_at": g.created_at.isoformat(),
             "image_url": g.image_url,
-            "log_data": log_data
+            "log_data": logs_by_goal.get(g.id, [])
         })
     return jsonify(result)
 
@@ -4,6 +4,9 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db
 from app.models.readiness_scores import ReadinessScore
 from app.models.health_record import HealthRecord
+from app.services.health_timeseries_service import (
+    AGGREGATES, BUCKETS, DEFAULT_POINTS, MAX_POINTS, MIN_POINTS, RANGES, health_series
+)
 from . import athlete_bp
 from datetime import datetime
 
@@ -20,22 +23,34 @@ def health_handler():
 
 
 def handle_get_health(user_id):
-    records = HealthRecord.query.filter_by(athlete_id=user_id).order_by(HealthRecord.recorded_at.asc()).all()
-    data = {
-        "weight": format_health_data(records, "weight"),
-        "sleep": format_health_data(records, "sleep_hours"),
-        "hr": format_health_data(records, "heart_rate"),
-        "calIn": format_health_data(records, "calories_intake"),
-        "calOut": format_health_data(records, "calories_burned"),
-        "bmi": [{"date": r.recorded_at.strftime("%Y-%m-%d"), "value": round(r.weight / ((r.height/100)**2),1)} for r in records if r.weight and r.height],
-        "bp_sys": records[-1].bp_sys if records else None,
-        "bp_dia": records[-1].bp_dia if records else None,
-        "spo2": getattr(records[-1], "spo2", None) if records else None,
-        "hrv": getattr(records[-1], "hrv", None) if records else None,
-        "mood": getattr(records[-1], "mood", None) if records else None,
-        "stress": getattr(records[-1], "stress", None) if records else None,
-        "hydration": getattr(records[-1], "hydration", None) if records else None,
-    }
+    range_key = request.args.get("range", "all")
+    bucket = request.args.get("bucket", "auto")
+    agg = request.args.get("agg", "avg")
+    points = min(max(request.args.get("points", DEFAULT_POINTS, type=int) or DEFAULT_POINTS, MIN_POINTS), MAX_POINTS)
+
+    if range_key not in RANGES:
+        return jsonify({"msg": f"Invalid range. Use one of: {', '.join(RANGES)}"}), 400
+    if bucket != "auto" and bucket not in BUCKETS:
+        return jsonify({"msg": f"Invalid bucket. Use auto or one of: {', '.join(BUCKETS)}"}), 400
+    if agg not in AGGREGATES:
+        return jsonify({"msg": f"Invalid agg. Use one of: {', '.join(AGGREGATES)}"}), 400
+
+    result = health_series(user_id, range_key=range_key, bucket=bucket, agg=agg, points=points)
+    latest = HealthRecord.query.filter_by(athlete_id=user_id).order_by(HealthRecord.recorded_at.desc()).first()
+
+    data = dict(result["series"])
+    data.update({
+        "bp_sys": latest.bp_sys if latest else None,
+        "bp_dia": latest.bp_dia if latest else None,
+        "spo2": getattr(latest, "spo2", None) if latest else None,
+        "hrv": getattr(latest, "hrv", None) if latest else None,
+        "mood": getattr(latest, "mood", None) if latest else None,
+        "stress": getattr(latest, "stress", None) if latest else None,
+        "hydration": getattr(latest, "hydration", None) if latest else None,
+        "bucket": result["bucket"],
+        "range": result["range"],
+        "agg": result["agg"],
+    })
     return jsonify(data)
 
 
@@ -64,10 +79,3 @@ def handle_post_health(user_id):
     db.session.add(record)
     db.session.commit()
     return jsonify({"msg": "Health record added"}), 201
-
-
-def format_health_data(records, attribute):
-    return [
-        {"date": r.recorded_at.strftime("%Y-%m-%d"), "value": getattr(r, attribute)}
-        for r in records if getattr(r, attribute, None)
-    ]
@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from app import db
 from app.models import User, WorkoutLog, HealthRecord, WorkoutFile
+from app.services.usage_metering_service import usage_meter
 import os
 
 from . import athlete_bp
@@ -25,13 +26,15 @@ def log_activity():
         try:
             # Log workout
             if data.get("session_type"):
+                if not usage_meter.check(identity, "workouts"):
+                    return jsonify({"msg": "Workout limit reached for your subscription plan"}), 403
                 workout_log = WorkoutLog(
                     athlete_id=identity,
                     date=datetime.utcnow(),
                     session_type=data.get("session_type"),
                     workout_details={"description": data.get("workout_details")},
                     metrics={"performance_score": float(data.get("performance_score") or 0)},
-                    compliance_status="completed",
+                    completion_status="completed",
                     logged_at=datetime.utcnow()
                 )
                 db.session.add(workout_log)
@@ -60,6 +63,8 @@ def log_activity():
                 db.session.add(workout_file)
 
             db.session.commit()
+            if data.get("session_type"):
+                usage_meter.record(identity, "workouts")
             return jsonify({"msg": "Activity logged successfully!"}), 200  # <-- JSON بدل redirect
         except Exception as e:
             db.session.rollback()
@@ -4,12 +4,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db
 from app.models.training_plan import TrainingPlan
 from . import athlete_bp
-import os
-from werkzeug.utils import secure_filename
-from flask import current_app
-
-
-UPLOAD_FOLDER = "static/uploads"
+from app.services.image_pipeline_service import ImageUploadError, image_pipeline
 
 @athlete_bp.route("/api/plans", methods=["GET"])
 @jwt_required()
@@ -40,11 +35,10 @@ def create_plan():
     image_file = request.files.get("image")
     image_url = None
     if image_file:
-        filename = secure_filename(image_file.filename)
-        save_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, filename)
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        image_file.save(save_path)
-        image_url = f"/{UPLOAD_FOLDER}/{filename}"
+        try:
+            image_url = image_pipeline.store(image_file, "plans", user_id=athlete_id).url
+        except ImageUploadError as e:
+            return jsonify({"msg": str(e)}), e.status_code
 
     plan = TrainingPlan(
         athlete_id=athlete_id,
@@ -86,11 +80,11 @@ def update_plan(plan_id):
 
     image_file = request.files.get("image")
     if image_file:
-        filename = secure_filename(image_file.filename)
-        save_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, filename)
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        image_file.save(save_path)
-        plan.image_url = f"/{UPLOAD_FOLDER}/{filename}"
+        try:
+            plan.image_url = image_pipeline.store(image_file, "plans", user_id=athlete_id).url
+        except ImageUploadError as e:
+            db.session.rollback()
+            return jsonify({"msg": str(e)}), e.status_code
 
     db.session.commit()
     return jsonify({"msg": "Plan updated", "image_url": plan.image_url, "progress": plan.progress if hasattr(plan, 'progress') else 0})
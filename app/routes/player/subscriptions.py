@@ -7,6 +7,9 @@ from app.models.subscription_plans import SubscriptionPlan
 from app.models.payments import Payment
 from app.models.payment_methods import PaymentMethod
 from app.models.subscription_usage import SubscriptionUsage
+from app.services.usage_metering_service import usage_meter
+from app.services.plan_catalog_service import plan_catalog
+from app.services.metrics_service import metrics
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import func, and_, or_
 import logging
@@ -15,6 +18,7 @@ import hashlib
 import hmac
 import json
 import os
+import time
 
 from . import athlete_bp
 
@@ -313,9 +317,7 @@ def subscriptions():
         user = User.query.get(identity)
         metrics = get_subscription_metrics(identity)
         
-        available_plans = SubscriptionPlan.query.filter_by(
-            is_active=True
-        ).order_by(SubscriptionPlan.sort_order, SubscriptionPlan.price).all()
+        available_plans = plan_catalog.active_plans()
         
         subscription_history = Subscription.query.filter_by(
             user_id=identity
@@ -443,6 +445,7 @@ def create_subscription():
             subscription.status = 'trial'
             create_usage_records(subscription)
             db.session.commit()
+            usage_meter.invalidate(identity)
             
             return jsonify({
                 "success": True,
@@ -534,8 +537,69 @@ def create_usage_records(subscription):
         raise
 
 
+def activate_paid_subscription(subscription, payment):
+    """Activate a subscription once its payment completes, extending it for renewals"""
+    if (payment.extra_data or {}).get('renewal'):
+        subscription.extend_subscription()
+    else:
+        subscription.status = 'active'
+    usage_meter.invalidate(subscription.user_id)
+
+
+def fail_subscription_payment(subscription, payment, reason):
+    """A failed renewal charge leaves the subscription in its grace period; a failed first payment cancels it"""
+    payment.status = 'failed'
+    payment.failure_reason = reason
+    subscription.status = 'past_due' if (payment.extra_data or {}).get('renewal') else 'canceled'
+    usage_meter.invalidate(subscription.user_id)
+
+
+@athlete_bp.route('/api/renewals/<int:payment_id>/pay', methods=['POST'])
+@jwt_required()
+def pay_renewal(payment_id):
+    """Send a queued renewal payment to the provider checkout"""
+    try:
+        identity = get_jwt_identity()
+        user = User.query.get(identity)
+        payment = Payment.query.get(payment_id)
+        if (not user or not payment or payment.subscription.user_id != user.id
+                or payment.status != 'pending' or not (payment.extra_data or {}).get('renewal')):
+            return jsonify({"success": False, "error": "Renewal payment not found"}), 404
+
+        payment_method = (request.get_json(silent=True) or {}).get('payment_method', 'card')
+        if payment_method == 'card':
+            payment.provider = 'paymob'
+            payment_result = PaymobGateway.initiate_payment(payment, user)
+        elif payment_method == 'paypal':
+            payment.provider = 'paypal'
+            payment_result = PayPalGateway.initiate_payment(payment, user)
+        else:
+            return jsonify({"success": False, "error": "Invalid payment method"}), 400
+
+        if not payment_result or not payment_result.get('success'):
+            db.session.rollback()
+            return jsonify({
+                "success": False,
+                "error": (payment_result or {}).get('error', 'Payment initiation failed')
+            }), 400
+
+        db.session.commit()
+        return jsonify({
+            "success": True,
+            "message": "Redirecting to payment gateway...",
+            "payment_url": payment_result['payment_url'],
+            "subscription_id": payment.subscription_id
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Exception in pay_renewal: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "error": f"Internal error: {str(e)}"}), 500
+
+
 @athlete_bp.route('/webhook/paymob', methods=['POST'])
 def paymob_webhook():
+    started = time.perf_counter()
     try:
         data = request.json
         
@@ -565,7 +629,7 @@ def paymob_webhook():
             payment.provider_transaction_id = str(transaction_id)
             
             subscription = payment.subscription
-            subscription.status = 'active'
+            activate_paid_subscription(subscription, payment)
             
             if not subscription.usage_records.first():
                 create_usage_records(subscription)
@@ -574,16 +638,16 @@ def paymob_webhook():
             
             logging.info(f"Payment {payment.id} completed successfully")
         else:
-            payment.status = 'failed'
-            payment.failure_reason = data.get('data', {}).get('message', 'Payment verification failed')
-            
-            subscription = payment.subscription
-            subscription.status = 'canceled'
+            fail_subscription_payment(
+                payment.subscription, payment,
+                data.get('data', {}).get('message', 'Payment verification failed')
+            )
             
             db.session.commit()
             
             logging.warning(f"Payment {payment.id} failed")
         
+        metrics.observe_webhook('paymob', data.get('created_at'), started)
         return jsonify({"status": "success"}), 200
         
     except Exception as e:
@@ -593,6 +657,7 @@ def paymob_webhook():
 
 @athlete_bp.route('/webhook/paypal', methods=['POST'])
 def paypal_webhook():
+    started = time.perf_counter()
     try:
         data = request.json
         event_type = data.get('event_type')
@@ -627,7 +692,7 @@ def paypal_webhook():
                         payment.processed_at = datetime.now(timezone.utc)
                         
                         subscription = payment.subscription
-                        subscription.status = 'active'
+                        activate_paid_subscription(subscription, payment)
                         
                         if not subscription.usage_records.first():
                             create_usage_records(subscription)
@@ -641,19 +706,16 @@ def paypal_webhook():
             payment.processed_at = datetime.now(timezone.utc)
             
             subscription = payment.subscription
-            subscription.status = 'active'
+            activate_paid_subscription(subscription, payment)
             
             db.session.commit()
         
         elif event_type in ['PAYMENT.CAPTURE.DENIED', 'CHECKOUT.ORDER.VOIDED']:
-            payment.status = 'failed'
-            payment.failure_reason = 'Payment denied or voided'
-            
-            subscription = payment.subscription
-            subscription.status = 'canceled'
+            fail_subscription_payment(payment.subscription, payment, 'Payment denied or voided')
             
             db.session.commit()
         
+        metrics.observe_webhook('paypal', data.get('create_time'), started)
         return jsonify({"status": "success"}), 200
         
     except Exception as e:
@@ -789,13 +851,10 @@ def cancel_subscription():
         if not subscription:
             return jsonify({"success": False, "error": "No active subscription found"}), 404
 
-        subscription.status = 'canceled' if immediate else 'cancelled_at_period_end'
-        subscription.auto_renew = False
-        subscription.next_billing_date = None if immediate else subscription.end_date
-        subscription.updated_at = datetime.now(timezone.utc)
-        subscription.cancellation_reason = reason
+        subscription.cancel_subscription(reason=reason, immediate=immediate)
 
         db.session.commit()
+        usage_meter.invalidate(identity)
 
         message = "Subscription cancelled immediately" if immediate else "Subscription will be cancelled at the end of current period"
 
@@ -1039,9 +1098,7 @@ def get_available_plans():
         return jsonify({"msg": "Unauthorized"}), 403
 
     try:
-        plans = SubscriptionPlan.query.filter_by(
-            is_active=True
-        ).order_by(SubscriptionPlan.sort_order, SubscriptionPlan.price).all()
+        plans = plan_catalog.active_plans()
         
         current_subscription = Subscription.query.filter(
             Subscription.user_id == identity,
@@ -1054,17 +1111,17 @@ def get_available_plans():
         plan_data = []
         for plan in plans:
             plan_data.append({
-                'id': plan.id,
-                'name': plan.name,
-                'description': plan.description,
-                'price': float(plan.price),
-                'duration_months': plan.duration_months,
-                'features': plan.features or [],
-                'max_athletes': plan.max_athletes,
-                'max_workouts': plan.max_workouts,
-                'storage_gb': plan.storage_gb,
-                'is_current': plan.id == current_plan_id,
-                'can_upgrade': plan.price > current_price if current_subscription else False
+                'id': plan['id'],
+                'name': plan['name'],
+                'description': plan['description'],
+                'price': plan['price'],
+                'duration_months': plan['duration_months'],
+                'features': plan['features'],
+                'max_athletes': plan['max_athletes'],
+                'max_workouts': plan['max_workouts'],
+                'storage_gb': plan['storage_gb'],
+                'is_current': plan['id'] == current_plan_id,
+                'can_upgrade': plan['price'] > current_price if current_subscription else False
             })
         
         return jsonify({
@@ -2,18 +2,22 @@ from flask import Blueprint, request, jsonify, render_template, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db
 from app.models import WorkoutLog, AthleteProgress, Exercise, User
+from app.services.usage_metering_service import usage_meter
+from app.services.cache_service import cached
+from app.services.heart_rate_store_service import store_samples, read_samples
+from app.services.image_pipeline_service import ImageUploadError, image_pipeline
+from app.services.workout_import_service import WorkoutImporter, WorkoutImportError
+from app.services.workout_list_service import (
+    fetch_list, fetch_rows, summary_query
+)
 from sqlalchemy import desc, func, and_, or_,cast, String
 from datetime import datetime, date, timedelta
 import os
-from werkzeug.utils import secure_filename
 import json
 import traceback
 
 from . import athlete_bp
 
-UPLOAD_FOLDER = 'app/static/uploads/workouts'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
 def allowed_file(filename):
@@ -37,8 +41,8 @@ def workout_hub_page():
 def get_workouts():
     try:
         athlete_id = get_jwt_identity()
-        workouts = WorkoutLog.query.filter_by(athlete_id=athlete_id).order_by(desc(WorkoutLog.date), desc(WorkoutLog.logged_at)).all()
-        return jsonify([workout.to_dict() for workout in workouts])
+        items, headers = fetch_list(summary_query(WorkoutLog.athlete_id == athlete_id), request.args)
+        return jsonify(items), 200, headers
     except Exception as e:
         print(f"Error in get_workouts: {e}")
         return jsonify({"msg": str(e)}), 400
@@ -48,14 +52,15 @@ def get_workouts():
 def handle_create_workout():
     try:
         athlete_id = get_jwt_identity()
+
+        if not usage_meter.check(athlete_id, 'workouts'):
+            return jsonify({"msg": "Workout limit reached for your subscription plan"}), 403
         
         image_url = None
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(f"{athlete_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}")
-                file.save(os.path.join(UPLOAD_FOLDER, filename))
-                image_url = f"/static/uploads/workouts/{filename}"
+                image_url = image_pipeline.store(file, 'workouts', user_id=athlete_id).url
         
         data = request.form
         
@@ -81,19 +86,46 @@ def handle_create_workout():
             date=datetime.strptime(data.get("date"), '%Y-%m-%d').date() if data.get("date") else date.today()
         )
         
+        if data.get("heart_rate_data"):
+            store_samples(new_workout, json.loads(data.get("heart_rate_data")))
+
         db.session.add(new_workout)
         db.session.commit()
+
+        usage_meter.record(athlete_id, 'workouts')
         
         return jsonify({
             "msg": "Workout created successfully!", 
             "id": new_workout.id
         }), 201
         
+    except ImageUploadError as e:
+        return jsonify({"msg": str(e)}), e.status_code
     except Exception as e:
         db.session.rollback()
         print(f"Error creating workout: {traceback.format_exc()}")
         return jsonify({"msg": str(e)}), 400
 
+@athlete_bp.route("/api/workouts/import", methods=["POST"])
+@jwt_required()
+def import_workouts():
+    """Bulk import workouts and daily health metrics from a CSV or wearable JSON export"""
+    try:
+        athlete_id = get_jwt_identity()
+        file = request.files.get('file')
+        if not file or file.filename == '':
+            return jsonify({"msg": "No file uploaded"}), 400
+
+        stats = WorkoutImporter(athlete_id, source=request.form.get('source') or None).run(file)
+        return jsonify({"msg": "Import finished", "stats": stats}), 200
+
+    except WorkoutImportError as e:
+        return jsonify({"msg": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error importing workouts: {traceback.format_exc()}")
+        return jsonify({"msg": str(e)}), 400
+
 @athlete_bp.route("/api/workouts/<int:workout_id>", methods=["PUT"])
 @jwt_required()
 def update_workout(workout_id):
@@ -122,9 +154,10 @@ def update_workout(workout_id):
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(f"{athlete_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}")
-                file.save(os.path.join(UPLOAD_FOLDER, filename))
-                workout.image_url = f"/static/uploads/workouts/{filename}"
+                workout.image_url = image_pipeline.store(file, 'workouts', user_id=athlete_id).url
+
+        if data.get("heart_rate_data"):
+            store_samples(workout, json.loads(data.get("heart_rate_data")))
         
         db.session.commit()
         return jsonify({
@@ -132,6 +165,9 @@ def update_workout(workout_id):
             "workout": workout.to_dict()
         })
         
+    except ImageUploadError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), e.status_code
     except Exception as e:
         db.session.rollback()
         print(f"Error updating workout: {traceback.format_exc()}")
@@ -151,6 +187,46 @@ def delete_workout(workout_id):
         print(f"Error deleting workout: {traceback.format_exc()}")
         return jsonify({"msg": str(e)}), 400
         
+@athlete_bp.route("/api/workouts/<int:workout_id>/heart-rate", methods=["GET"])
+@jwt_required()
+def get_workout_heart_rate(workout_id):
+    """Raw HR samples of a workout, optionally limited to an offset range in seconds"""
+    try:
+        athlete_id = get_jwt_identity()
+        workout = WorkoutLog.query.filter_by(id=workout_id, athlete_id=athlete_id).first_or_404()
+        samples = read_samples(
+            workout,
+            start=request.args.get('start', type=int),
+            end=request.args.get('end', type=int),
+            max_points=min(request.args.get('max_points', 0, type=int), 5000) or None
+        )
+        return jsonify({
+            "workout_id": workout.id,
+            "sample_count": workout.hr_sample_count or 0,
+            "samples": samples
+        })
+    except Exception as e:
+        print(f"Error in get_workout_heart_rate: {traceback.format_exc()}")
+        return jsonify({"msg": str(e)}), 400
+
+@athlete_bp.route("/api/workouts/<int:workout_id>/heart-rate", methods=["PUT"])
+@jwt_required()
+def upload_workout_heart_rate(workout_id):
+    """Replace the HR stream of a workout and recompute its zones and summary"""
+    try:
+        athlete_id = get_jwt_identity()
+        workout = WorkoutLog.query.filter_by(id=workout_id, athlete_id=athlete_id).first_or_404()
+        data = request.get_json() or {}
+        summary = store_samples(workout, data, max_hr=data.get('max_hr') or None, interval=data.get('interval', 1))
+        if summary is None:
+            return jsonify({"msg": "No valid heart rate samples"}), 400
+        db.session.commit()
+        return jsonify({"msg": "Heart rate data saved", "summary": summary})
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in upload_workout_heart_rate: {traceback.format_exc()}")
+        return jsonify({"msg": str(e)}), 400
+
 @athlete_bp.route("/api/progress", methods=["GET"])
 @jwt_required()
 def get_progress_data():
@@ -228,27 +304,27 @@ def filter_workouts_api():
         athlete_id = get_jwt_identity()
         filters = request.get_json()
         
-        query = WorkoutLog.query.filter_by(athlete_id=athlete_id)
+        criteria = [WorkoutLog.athlete_id == athlete_id]
         
         if filters.get('type'):
-            query = query.filter(WorkoutLog.workout_type == filters['type'])
+            criteria.append(WorkoutLog.workout_type == filters['type'])
         if filters.get('difficulty'):
-            query = query.filter(WorkoutLog.difficulty_level == filters['difficulty'])
+            criteria.append(WorkoutLog.difficulty_level == filters['difficulty'])
         if filters.get('status'):
-            query = query.filter(WorkoutLog.completion_status == filters['status'])
+            criteria.append(WorkoutLog.completion_status == filters['status'])
         if filters.get('duration'):
             duration_range = filters['duration']
             if '-' in duration_range:
                 min_dur, max_dur = map(int, duration_range.split('-'))
-                query = query.filter(
+                criteria += [
                     WorkoutLog.actual_duration >= min_dur,
                     WorkoutLog.actual_duration <= max_dur
-                )
+                ]
             elif duration_range == '60+':
-                query = query.filter(WorkoutLog.actual_duration >= 60)
+                criteria.append(WorkoutLog.actual_duration >= 60)
         
-        workouts = query.order_by(desc(WorkoutLog.date)).all()
-        return jsonify([w.to_dict() for w in workouts])
+        items, headers = fetch_list(summary_query(*criteria, order_by=(desc(WorkoutLog.date),)), request.args)
+        return jsonify(items), 200, headers
         
     except Exception as e:
         print(f"Error in filter_workouts_api: {traceback.format_exc()}")
@@ -261,23 +337,35 @@ def get_top_workouts_api():
         athlete_id = get_jwt_identity()
         sort_by = request.args.get('sort', 'calories')
         
-        query = WorkoutLog.query.filter_by(
-            athlete_id=athlete_id, 
-            completion_status='completed'
+        criteria = (
+            WorkoutLog.athlete_id == athlete_id,
+            WorkoutLog.completion_status == 'completed'
         )
         
         if sort_by == 'calories':
-            workouts = query.order_by(WorkoutLog.calories_burned.desc()).limit(10).all()
+            order_by = (WorkoutLog.calories_burned.desc(),)
         elif sort_by == 'duration':
-            workouts = query.order_by(WorkoutLog.actual_duration.desc()).limit(10).all()
+            order_by = (WorkoutLog.actual_duration.desc(),)
         else:  # recent
-            workouts = query.order_by(desc(WorkoutLog.date)).limit(10).all()
+            order_by = (desc(WorkoutLog.date),)
             
-        return jsonify([w.to_dict() for w in workouts])
+        return jsonify(fetch_rows(summary_query(*criteria, order_by=order_by), limit=10))
         
     except Exception as e:
         print(f"Error in get_top_workouts_api: {traceback.format_exc()}")
         return jsonify({"msg": str(e)}), 400
+@cached(tags=(Exercise,), name="exercise_catalog")
+def exercises_for_body_parts(body_parts):
+    """Active exercises whose muscle groups mention any of ``body_parts`` (a sorted tuple)"""
+    query = db.session.query(Exercise).filter(Exercise.is_active == True)
+
+    # Cast the JSON list to text and use ILIKE for case-insensitive matching
+    conditions = [cast(Exercise.muscle_groups, String).ilike(f'%{body_part}%') for body_part in body_parts]
+    if conditions:
+        query = query.filter(or_(*conditions))
+
+    return [ex.to_dict() for ex in query.all()]
+
 @athlete_bp.route("/api/exercises", methods=["GET"])
 @jwt_required()
 def get_exercises():
@@ -286,28 +374,8 @@ def get_exercises():
         if not body_parts_str:
             return jsonify({"msg": "Missing body part parameter"}), 400
         
-        body_parts = [part.strip().lower() for part in body_parts_str.split(',')]
-        
-        # Option 1: Using PostgreSQL's ?| operator correctly with text casting
-        # The ?| operator checks if any of the strings in an array exist as top-level keys
-        # We need to cast muscle_groups to text and use LIKE for flexible matching
-        
-        query = db.session.query(Exercise).filter(Exercise.is_active == True)
-        
-        # Build OR conditions for each body part
-        conditions = []
-        for body_part in body_parts:
-            # Cast JSON to text and use ILIKE for case-insensitive search
-            conditions.append(
-                cast(Exercise.muscle_groups, String).ilike(f'%{body_part}%')
-            )
-        
-        if conditions:
-            query = query.filter(or_(*conditions))
-        
-        exercises = query.all()
-        
-        return jsonify([ex.to_dict() for ex in exercises])
+        body_parts = tuple(sorted({part.strip().lower() for part in body_parts_str.split(',')}))
+        return jsonify(exercises_for_body_parts(body_parts))
         
     except Exception as e:
         print(f"Error in get_exercises: {traceback.format_exc()}")
@@ -1,19 +1,27 @@
 import os
 from flask import Blueprint, request, redirect, url_for, flash,jsonify, render_template
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
 from app.models.user import User
+from app.services.image_pipeline_service import ImageUploadError, image_pipeline, is_shared_upload
 from app import db
 from app.models import AdminProfile
 
 user_bp = Blueprint("user", __name__)
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
-UPLOAD_FOLDER = "app/static/uploads"
 
 default_image = 'default.jpg'
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def remove_profile_image(filename):
+    """Delete a legacy avatar from the profile upload folder; shared and default images stay"""
+    if not filename or filename in (default_image, "default.jpeg") or is_shared_upload(filename):
+        return
+    try:
+        os.remove(image_pipeline.original_path("profile", os.path.basename(filename)))
+    except OSError:
+        pass
+
 @user_bp.route("/profile/image", methods=["POST"])
 @jwt_required()
 def update_profile_image():
@@ -25,20 +33,16 @@ def update_profile_image():
 
     file = request.files["profile_image"]
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-
-        if user.profile_image != default_image:
-            try:
-                os.remove(os.path.join(UPLOAD_FOLDER, user.profile_image))
-            except Exception:
-                pass
+        try:
+            stored = image_pipeline.store(file, "profile", user_id=user_id)
+        except ImageUploadError as e:
+            return jsonify({"msg": str(e)}), e.status_code
 
-        user.profile_image = filename
+        remove_profile_image(user.profile_image)
+        user.profile_image = stored.filename
         db.session.commit()
 
-        return jsonify({"msg": "Image uploaded", "new_image": filename}), 200
+        return jsonify({"msg": "Image uploaded", "new_image": stored.filename, "thumb_url": stored.variant_url("thumb")}), 200
     return jsonify({"msg": "Invalid file type"}), 400
 
 @user_bp.route("/profile/image/delete", methods=["POST"])
@@ -48,10 +52,7 @@ def delete_profile_image():
     user = User.query.get(user_id)
 
     if user.profile_image != default_image:
-        try:
-            os.remove(os.path.join("static/uploads", user.profile_image))
-        except Exception:
-            pass
+        remove_profile_image(user.profile_image)
         user.profile_image = default_image
         db.session.commit()
 
@@ -86,22 +87,15 @@ def update_profile():
     # handle image
     if image_file and image_file.filename != "":
         if allowed_file(image_file.filename):
-            filename = secure_filename(image_file.filename)
-            image_path = os.path.join(UPLOAD_FOLDER, filename)
-
-            # ✅ تأكدي إن الفولدر موجود
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-            image_file.save(image_path)
+            try:
+                stored = image_pipeline.store(image_file, "profile", user_id=identity)
+            except ImageUploadError as e:
+                return jsonify({"msg": str(e)}), e.status_code
 
             # حذف الصورة القديمة لو مش الديفولت
-            if user.profile_image and user.profile_image != "default.jpg":
-                try:
-                    os.remove(os.path.join(UPLOAD_FOLDER, user.profile_image))
-                except Exception:
-                    pass
+            remove_profile_image(user.profile_image)
 
-            user.profile_image = filename
+            user.profile_image = stored.filename
 
     db.session.commit()
     return jsonify({"msg": "Profile updated", "new_image": user.profile_image}), 200
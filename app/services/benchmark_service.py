@@ -0,0 +1,486 @@
+# app/services/benchmark_service.py
+from datetime import date, datetime, time as dtime, timedelta
+import json
+import math
+import os
+import random
+import time
+import tracemalloc
+
+from flask_jwt_extended import create_access_token, get_csrf_token
+from sqlalchemy import delete, func, insert, or_, select
+
+from app.extensions import db
+from app.models.athlete_profile import AthleteProfile
+from app.models.coach_athlete import CoachAthlete
+from app.models.coach_profile import CoachProfile
+from app.models.health_record import HealthRecord
+from app.models.login_logs import LoginLog
+from app.models.message import Message
+from app.models.payments import Payment
+from app.models.subscription import Subscription
+from app.models.subscription_plans import SubscriptionPlan
+from app.models.user import User
+from app.models.workout_log import WorkoutLog
+from app.services.offload_service import hash_password
+from app.services.query_stats_service import query_stats
+
+# Every generated account lives under this domain, which is how clear_population() finds them
+BENCH_DOMAIN = "bench.local"
+BENCH_PASSWORD = "benchmark"
+BENCH_PLAN_NAME = "Benchmark plan"
+INSERT_BATCH = 2000
+
+# Regressions are only flagged when a latency grows by the tolerance *and* this many milliseconds
+MIN_LATENCY_DELTA_MS = 5.0
+
+WORKOUT_TYPES = ("strength", "cardio", "mobility", "hiit", "endurance")
+DIFFICULTIES = ("beginner", "intermediate", "advanced")
+COMPLETION = ("completed",) * 8 + ("partial", "missed")
+CHAT_LINES = (
+    "How did today's session feel?", "Legs are still sore from Tuesday.",
+    "Let's move the long run to Saturday.", "Great pace on the intervals!",
+    "Remember to log your sleep tonight.", "Can we go over the new plan?",
+)
+
+# (name, role, method, path, JSON body); {athlete_id} is one of the benchmark coach's athletes
+HOT_ENDPOINTS = (
+    ("coach_roster", "coach", "GET", "/coach/athletes", None),
+    ("coach_dashboard", "coach", "GET", "/coach/dashboard", None),
+    ("coach_chat_list", "coach", "GET", "/coach/chats", None),
+    ("coach_athlete_progress", "coach", "GET", "/coach/progress_tracking_data/{athlete_id}", None),
+    ("coach_calendar", "coach", "GET", "/coach/calendar_events", None),
+    ("athlete_progress", "athlete", "GET", "/athlete/api/progress?period=3months", None),
+    ("admin_dashboard", "admin", "GET", "/admin/dashboard", None),
+    ("admin_dashboard_stats", "admin", "GET", "/admin/api/dashboard-stats", None),
+    ("admin_report_stats", "admin", "GET", "/admin/api/reports/stats", None),
+    ("admin_coaches_performance", "admin", "GET", "/admin/api/reports/coaches-performance", None),
+    ("admin_member_activity", "admin", "GET", "/admin/api/reports/member-activity", None),
+    ("admin_export_login_logs", "admin", "GET", "/admin/api/export-login-logs", None),
+    ("admin_export_report_csv", "admin", "POST", "/admin/api/reports/export",
+     {"format": "csv", "report_type": "overview", "date_range": 90}),
+)
+
+
+class BenchmarkError(RuntimeError):
+    """The benchmark cannot run (no seeded population, unknown endpoint, ...)"""
+
+
+def _bench_email(kind, index):
+    return f"bench-{kind}-{index}@{BENCH_DOMAIN}"
+
+
+class _Batches:
+    """Buffers generated rows per model and writes them with executemany inserts"""
+
+    def __init__(self):
+        self._rows = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        rows = self._rows.setdefault(model, [])
+        rows.append(row)
+        if len(rows) >= INSERT_BATCH:
+            self._write(model)
+
+    def _write(self, model):
+        rows = self._rows.pop(model, None)
+        if rows:
+            db.session.execute(insert(model), rows)
+            self.counts[model.__tablename__] = self.counts.get(model.__tablename__, 0) + len(rows)
+
+    def flush(self):
+        for model in list(self._rows):
+            self._write(model)
+
+
+def _insert_users(rows):
+    return db.session.execute(
+        insert(User).returning(User.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+
+
+def clear_population():
+    """Delete every row the generator created; returns the number of users removed"""
+    user_ids = select(User.id).where(User.email.like(f"%@{BENCH_DOMAIN}")).scalar_subquery()
+    subscription_ids = select(Subscription.id).where(Subscription.user_id.in_(user_ids)).scalar_subquery()
+
+    db.session.execute(delete(Payment).where(Payment.subscription_id.in_(subscription_ids)))
+    db.session.execute(delete(Subscription).where(Subscription.user_id.in_(user_ids)))
+    db.session.execute(delete(LoginLog).where(LoginLog.user_id.in_(user_ids)))
+    db.session.execute(delete(Message).where(or_(Message.sender_id.in_(user_ids), Message.receiver_id.in_(user_ids))))
+    db.session.execute(delete(HealthRecord).where(HealthRecord.athlete_id.in_(user_ids)))
+    db.session.execute(delete(WorkoutLog).where(WorkoutLog.athlete_id.in_(user_ids)))
+    db.session.execute(delete(CoachAthlete).where(or_(CoachAthlete.coach_id.in_(user_ids), CoachAthlete.athlete_id.in_(user_ids))))
+    db.session.execute(delete(CoachProfile).where(CoachProfile.user_id.in_(user_ids)))
+    db.session.execute(delete(AthleteProfile).where(AthleteProfile.user_id.in_(user_ids)))
+    removed = db.session.execute(delete(User).where(User.email.like(f"%@{BENCH_DOMAIN}"))).rowcount
+    db.session.execute(delete(SubscriptionPlan).where(SubscriptionPlan.name == BENCH_PLAN_NAME))
+    db.session.commit()
+    return removed
+
+
+def seed_population(coaches=5, athletes_per_coach=20, years=2, seed=42, today=None):
+    """Generate a reproducible population of coaches, athletes and their history.
+
+    The same ``seed`` always yields the same rows, so runs against a freshly
+    seeded database are comparable. Any earlier benchmark population is
+    removed first. Per athlete this writes a workout every two to three
+    days, a daily health record, login entries, a monthly payment, and a
+    running chat with their coach, all spread over ``years``.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    first_day = today - timedelta(days=365 * years)
+    password_hash = hash_password(BENCH_PASSWORD)
+    clear_population()
+
+    admin_id, = _insert_users([{
+        "email": _bench_email("admin", 0), "name": "Benchmark Admin", "password_hash": password_hash,
+        "role": "admin", "status": "active", "created_at": datetime.combine(first_day, dtime.min),
+    }])
+    coach_ids = _insert_users([
+        {"email": _bench_email("coach", i), "name": f"Coach {i}", "password_hash": password_hash,
+         "role": "coach", "status": "active", "created_at": datetime.combine(first_day, dtime.min)}
+        for i in range(coaches)
+    ])
+    athlete_ids = _insert_users([
+        {"email": _bench_email("athlete", i), "name": f"Athlete {i}", "password_hash": password_hash,
+         "role": "athlete", "status": "active",
+         "created_at": datetime.combine(first_day + timedelta(days=rng.randrange(30)), dtime.min)}
+        for i in range(coaches * athletes_per_coach)
+    ])
+
+    plan_id = db.session.execute(
+        insert(SubscriptionPlan).returning(SubscriptionPlan.id),
+        [{"name": BENCH_PLAN_NAME, "price": 29, "duration_months": 1}]
+    ).scalar_one()
+
+    batches = _Batches()
+    for coach_id in coach_ids:
+        batches.add(CoachProfile, {"user_id": coach_id, "sport_type": rng.choice(("running", "cycling", "strength")),
+                                   "experience_years": rng.randint(1, 20)})
+
+    days = (today - first_day).days
+    for index, athlete_id in enumerate(athlete_ids):
+        coach_id = coach_ids[index // athletes_per_coach]
+        batches.add(AthleteProfile, {"user_id": athlete_id, "age": rng.randint(16, 45),
+                                     "gender": rng.choice(("male", "female")),
+                                     "weight": round(rng.uniform(55, 95), 1), "height": round(rng.uniform(155, 195), 1)})
+        batches.add(CoachAthlete, {"coach_id": coach_id, "athlete_id": athlete_id, "status": "approved",
+                                   "approved_by": admin_id, "is_active": True,
+                                   "assigned_at": datetime.combine(first_day, dtime.min)})
+
+        weight = rng.uniform(60, 90)
+        day = first_day
+        while day < today:
+            started = datetime.combine(day, dtime(rng.randint(6, 20), rng.choice((0, 15, 30, 45))))
+            duration = rng.randint(25, 95)
+            avg_hr = rng.randint(110, 165)
+            batches.add(WorkoutLog, {
+                "athlete_id": athlete_id, "title": "Training session", "workout_type": rng.choice(WORKOUT_TYPES),
+                "session_type": "workout", "planned_duration": duration, "actual_duration": duration,
+                "total_time": duration, "calories_burned": duration * rng.randint(7, 12),
+                "avg_heart_rate": avg_hr, "max_heart_rate": avg_hr + rng.randint(10, 30),
+                "min_heart_rate": avg_hr - rng.randint(30, 50), "completion_status": rng.choice(COMPLETION),
+                "difficulty_level": rng.choice(DIFFICULTIES), "date": day, "start_time": started,
+                "end_time": started + timedelta(minutes=duration), "logged_at": started + timedelta(minutes=duration + 5),
+                "workout_details": {}, "metrics": {}, "heart_rate_data": {},
+            })
+            day += timedelta(days=rng.choice((2, 2, 3)))
+
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            weight += rng.uniform(-0.15, 0.14)
+            batches.add(HealthRecord, {
+                "athlete_id": athlete_id, "weight": round(weight, 1), "heart_rate": rng.randint(50, 75),
+                "sleep_hours": round(rng.uniform(5, 9), 1), "steps": rng.randint(3000, 16000),
+                "calories_intake": rng.randint(1800, 3200), "hydration": round(rng.uniform(1.2, 3.5), 1),
+                "mood": rng.randint(1, 5), "stress_level": rng.randint(1, 5), "hrv": round(rng.uniform(35, 110), 1),
+                "recorded_at": datetime.combine(day, dtime(7, 30)),
+            })
+            if rng.random() < 0.5:
+                batches.add(LoginLog, {
+                    "user_id": athlete_id, "ip_address": f"10.{index % 250}.{offset % 250}.{rng.randint(1, 254)}",
+                    "status": "success" if rng.random() < 0.95 else "failed", "is_suspicious": False,
+                    "user_agent": "benchmark", "created_at": datetime.combine(day, dtime(rng.randint(6, 22), 0)),
+                })
+            if rng.random() < 0.3:
+                sender, receiver = (coach_id, athlete_id) if rng.random() < 0.5 else (athlete_id, coach_id)
+                batches.add(Message, {
+                    "sender_id": sender, "receiver_id": receiver, "content": rng.choice(CHAT_LINES),
+                    "sent_at": datetime.combine(day, dtime(rng.randint(7, 22), rng.randrange(60))),
+                    "is_read": offset < days - 3,
+                })
+
+        batches.flush()
+        subscription_id = db.session.execute(
+            insert(Subscription).returning(Subscription.id),
+            [{"user_id": athlete_id, "plan_id": plan_id, "status": "active", "billing_cycle": "monthly",
+              "start_date": datetime.combine(first_day, dtime.min), "current_period_start": datetime.combine(today, dtime.min),
+              "current_period_end": datetime.combine(today + timedelta(days=30), dtime.min),
+              "end_date": datetime.combine(today + timedelta(days=30), dtime.min)}]
+        ).scalar_one()
+        for month in range(years * 12):
+            paid_at = datetime.combine(first_day + timedelta(days=30 * month), dtime(9, 0))
+            batches.add(Payment, {
+                "subscription_id": subscription_id, "amount": 29, "currency": "USD",
+                "status": "completed" if rng.random() < 0.97 else "failed", "provider": "stripe",
+                "processed_at": paid_at, "created_at": paid_at, "updated_at": paid_at,
+            })
+
+    batches.flush()
+    db.session.commit()
+
+    counts = {"users": 1 + len(coach_ids) + len(athlete_ids)}
+    counts.update(batches.counts)
+    return counts
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return None
+    rank = max(math.ceil(fraction * len(samples)), 1)
+    return samples[min(rank, len(samples)) - 1]
+
+
+def _bench_users():
+    coach = db.session.execute(
+        select(User.id).where(User.email == _bench_email("coach", 0))
+    ).scalar()
+    admin = db.session.execute(
+        select(User.id).where(User.email == _bench_email("admin", 0))
+    ).scalar()
+    if coach is None or admin is None:
+        raise BenchmarkError("No benchmark population found; run `flask seed-benchmark-data` first")
+    athlete = db.session.execute(
+        select(CoachAthlete.athlete_id).where(CoachAthlete.coach_id == coach).order_by(CoachAthlete.athlete_id).limit(1)
+    ).scalar()
+    return {"admin": admin, "coach": coach, "athlete": athlete}
+
+
+def _client_for(app, user_id, role):
+    """A test client holding the same JWT cookies a browser gets at login"""
+    client = app.test_client()
+    token = create_access_token(identity=str(user_id), additional_claims={"role": role})
+    client.set_cookie(app.config.get("JWT_ACCESS_COOKIE_NAME", "access_token_cookie"), token)
+    return client, {"X-CSRF-TOKEN": get_csrf_token(token)}
+
+
+def _population_counts():
+    bench_users = select(User.id).where(User.email.like(f"%@{BENCH_DOMAIN}")).scalar_subquery()
+    return {
+        "users": db.session.execute(
+            select(func.count(User.id)).where(User.email.like(f"%@{BENCH_DOMAIN}"))).scalar(),
+        "workout_logs": db.session.execute(
+            select(func.count(WorkoutLog.id)).where(WorkoutLog.athlete_id.in_(bench_users))).scalar(),
+        "health_records": db.session.execute(
+            select(func.count(HealthRecord.id)).where(HealthRecord.athlete_id.in_(bench_users))).scalar(),
+        "messages": db.session.execute(
+            select(func.count(Message.id)).where(Message.sender_id.in_(bench_users))).scalar(),
+    }
+
+
+def run_endpoint_benchmarks(app, requests_per_endpoint=20, warmup=2, only=None):
+    """Time the hot endpoints through the Flask test client.
+
+    Each endpoint gets ``warmup`` untimed requests, then
+    ``requests_per_endpoint`` timed ones for latency percentiles and query
+    counts, then one more under ``tracemalloc`` for peak Python memory (kept
+    separate so tracing does not inflate the latencies).
+    """
+    users = _bench_users()
+    endpoints = [endpoint for endpoint in HOT_ENDPOINTS if not only or endpoint[0] in only]
+    if only and len(endpoints) != len(set(only)):
+        known = {endpoint[0] for endpoint in HOT_ENDPOINTS}
+        raise BenchmarkError(f"Unknown endpoints: {', '.join(sorted(set(only) - known))}")
+
+    clients = {role: _client_for(app, user_id, role) for role, user_id in users.items() if role != "athlete"}
+    if users["athlete"] is not None:
+        clients["athlete"] = _client_for(app, users["athlete"], "athlete")
+
+    results = {}
+    for name, role, method, path, body in endpoints:
+        client, headers = clients[role]
+        path = path.format(athlete_id=users["athlete"])
+
+        def call():
+            return client.open(path, method=method, json=body, headers=headers if method != "GET" else None)
+
+        for _ in range(warmup):
+            call()
+        db.session.remove()
+
+        latencies, statuses, queries = [], {}, []
+        for _ in range(requests_per_endpoint):
+            with query_stats.capture() as stats:
+                started = time.perf_counter()
+                response = call()
+                latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            queries.append(stats.count)
+            db.session.remove()
+
+        tracemalloc.start()
+        try:
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        db.session.remove()
+
+        latencies.sort()
+        results[name] = {
+            "method": method,
+            "path": path,
+            "requests": len(latencies),
+            "statuses": {str(code): count for code, count in sorted(statuses.items())},
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p90_ms": round(percentile(latencies, 0.90), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "queries": max(queries),
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "database": db.engine.dialect.name,
+        "population": _population_counts(),
+        "endpoints": results,
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """Regressions of ``results`` against an earlier run.
+
+    Latency (p50/p95) and peak memory regress when they grow by more than
+    ``tolerance``; latency must also grow by ``MIN_LATENCY_DELTA_MS`` so
+    noise on very fast endpoints is not flagged. Any increase in the query
+    count, and any new non-2xx status, is a regression.
+    """
+    regressions = []
+    previous_endpoints = baseline.get("endpoints", {})
+    for name, current in results["endpoints"].items():
+        previous = previous_endpoints.get(name)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            before, after = previous.get(metric), current[metric]
+            if before is not None and after > before * (1 + tolerance) and after - before >= MIN_LATENCY_DELTA_MS:
+                regressions.append({"endpoint": name, "metric": metric, "baseline": before, "current": after})
+        before = previous.get("peak_memory_kb")
+        if before is not None and current["peak_memory_kb"] > before * (1 + tolerance):
+            regressions.append({"endpoint": name, "metric": "peak_memory_kb",
+                                "baseline": before, "current": current["peak_memory_kb"]})
+        before = previous.get("queries")
+        if before is not None and current["queries"] > before:
+            regressions.append({"endpoint": name, "metric": "queries", "baseline": before, "current": current["queries"]})
+        failing = sorted(code for code in current["statuses"] if not code.startswith("2"))
+        if failing and failing != sorted(code for code in previous.get("statuses", {}) if not code.startswith("2")):
+            regressions.append({"endpoint": name, "metric": "status", "baseline": previous.get("statuses"),
+                                "current": current["statuses"]})
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_baseline(path, results):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+
+
+def _best_ms(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_payload_benchmarks(app, repeat=20, only=None):
+    """Serialization time and response size of the hot JSON endpoints.
+
+    Each endpoint's payload is fetched once uncompressed and decoded, then
+    encoded ``repeat`` times with Flask's stock provider and with the
+    app's provider (best run reported). Sizes are given uncompressed,
+    gzipped and brotli-compressed, and ``wire_bytes`` is what a browser
+    sending ``Accept-Encoding: br, gzip`` actually receives. The decoded
+    payload holds plain strings where routes used to pass datetimes, so
+    the times cover the structure rather than type conversion.
+    """
+    from flask.json.provider import DefaultJSONProvider
+    from app.services.compression_service import brotli, compress, response_compressor
+
+    users = _bench_users()
+    endpoints = [endpoint for endpoint in HOT_ENDPOINTS if not only or endpoint[0] in only]
+    if only and len(endpoints) != len(set(only)):
+        known = {endpoint[0] for endpoint in HOT_ENDPOINTS}
+        raise BenchmarkError(f"Unknown endpoints: {', '.join(sorted(set(only) - known))}")
+
+    clients = {role: _client_for(app, user_id, role) for role, user_id in users.items() if role != "athlete"}
+    if users["athlete"] is not None:
+        clients["athlete"] = _client_for(app, users["athlete"], "athlete")
+    stock = DefaultJSONProvider(app)
+    provider = app.json
+    encode = getattr(provider, "dumps_bytes", lambda obj: provider.dumps(obj).encode("utf-8"))
+
+    results, skipped = {}, {}
+    for name, role, method, path, body in endpoints:
+        client, csrf_headers = clients[role]
+        path = path.format(athlete_id=users["athlete"])
+
+        def call(accept_encoding):
+            headers = {"Accept-Encoding": accept_encoding}
+            if method != "GET":
+                headers.update(csrf_headers)
+            return client.open(path, method=method, json=body, headers=headers)
+
+        plain = call("identity")
+        wire = call("br, gzip")
+        db.session.remove()
+        if plain.mimetype != "application/json":
+            skipped[name] = plain.mimetype
+            continue
+
+        payload = plain.get_json()
+        stock_bytes = stock.dumps(payload, separators=(",", ":")).encode("utf-8")
+        fast_bytes = encode(payload)
+        stock_ms = _best_ms(lambda: stock.dumps(payload, separators=(",", ":")), repeat)
+        fast_ms = _best_ms(lambda: encode(payload), repeat)
+        results[name] = {
+            "path": path,
+            "status": plain.status_code,
+            "stock_ms": round(stock_ms, 3),
+            "provider_ms": round(fast_ms, 3),
+            "speedup": round(stock_ms / fast_ms, 2) if fast_ms else None,
+            "stock_bytes": len(stock_bytes),
+            "provider_bytes": len(fast_bytes),
+            "gzip_bytes": len(compress(fast_bytes, "gzip", response_compressor.gzip_level)),
+            "br_bytes": len(compress(fast_bytes, "br", brotli_quality=response_compressor.brotli_quality))
+            if brotli is not None else None,
+            "wire_bytes": len(wire.get_data()),
+            "wire_encoding": wire.headers.get("Content-Encoding", "identity"),
+        }
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "json_provider": type(provider).__name__,
+        "orjson": bool(getattr(provider, "use_orjson", False)),
+        "population": _population_counts(),
+        "endpoints": results,
+        "skipped": skipped,
+    }
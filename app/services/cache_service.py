@@ -0,0 +1,253 @@
+# app/services/cache_service.py
+from collections import OrderedDict
+from functools import wraps
+import logging
+import pickle
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.services.metrics_service import metrics
+
+try:
+    import redis
+except ImportError:  # only needed for CACHE_BACKEND=redis
+    redis = None
+
+DEFAULT_TTL_SECONDS = 300
+MAX_ENTRIES = 2048
+_MISSING = object()
+
+
+def tag_name(tag):
+    """Tags are table names; models and tables are accepted too"""
+    if isinstance(tag, str):
+        return tag
+    return getattr(tag, "__tablename__", None) or tag.name
+
+
+class MemoryBackend:
+    """Per-process LRU with a TTL per entry and a cap on the number of entries"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, tags):
+        with self._lock:
+            return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisBackend:
+    """Shared store so every worker process sees the same entries and tag versions"""
+
+    def __init__(self, url, prefix="cache:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis needs the redis package")
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._client.set(self.prefix + key, pickle.dumps(value), ex=max(int(ttl), 1))
+
+    def versions(self, tags):
+        if not tags:
+            return ()
+        return tuple(int(value or 0) for value in self._client.mget([f"{self.prefix}tag:{tag}" for tag in tags]))
+
+    def bump(self, tags):
+        pipeline = self._client.pipeline()
+        for tag in tags:
+            pipeline.incr(f"{self.prefix}tag:{tag}")
+        pipeline.execute()
+
+    def clear(self):
+        for key in self._client.scan_iter(f"{self.prefix}*"):
+            self._client.delete(key)
+
+
+class NullBackend:
+    """Caches nothing; every call runs the wrapped function"""
+
+    def get(self, key):
+        return _MISSING
+
+    def set(self, key, value, ttl):
+        pass
+
+    def versions(self, tags):
+        return ()
+
+    def bump(self, tags):
+        pass
+
+    def clear(self):
+        pass
+
+
+class AppCache:
+    """Read-through cache for reference data and aggregates, invalidated by table tags.
+
+    ``@cached(tags=(...))`` stores a function's result under its arguments
+    together with the current version of each tag. Committing a session
+    that inserted, updated or deleted rows of a tagged table bumps that
+    tag's version, so every entry that depends on it misses on its next
+    read; routes never invalidate by hand. Calls made while the session
+    has unflushed or uncommitted writes to a tagged table bypass the
+    cache, so uncommitted data is never stored.
+
+    Cached values are shared between requests and must be treated as
+    read-only. With the in-process backend other worker processes only
+    notice a change when their copy expires; use the redis backend where
+    that matters.
+    """
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.default_ttl = DEFAULT_TTL_SECONDS
+
+    def init_app(self, app):
+        kind = app.config.get("CACHE_BACKEND", "memory")
+        self.default_ttl = app.config.get("CACHE_DEFAULT_TTL", DEFAULT_TTL_SECONDS)
+        if kind == "redis":
+            self.backend = RedisBackend(app.config["CACHE_REDIS_URL"], app.config.get("CACHE_KEY_PREFIX", "cache:"))
+        elif kind == "null":
+            self.backend = NullBackend()
+        else:
+            self.backend = MemoryBackend(app.config.get("CACHE_MAX_ENTRIES", MAX_ENTRIES))
+
+    def cached(self, tags=(), ttl=None, name=None):
+        tags = tuple(sorted({tag_name(tag) for tag in tags}))
+
+        def decorator(func):
+            prefix = name or f"{func.__module__}.{func.__qualname__}"
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if _has_pending_writes(tags):
+                    return func(*args, **kwargs)
+
+                key = f"{prefix}:{args!r}:{sorted(kwargs.items())!r}"
+                try:
+                    versions = self.backend.versions(tags)
+                    entry = self.backend.get(key)
+                except Exception as e:
+                    logging.error(f"Cache read failed for {prefix}: {e}")
+                    return func(*args, **kwargs)
+
+                if entry is not _MISSING and entry[0] == versions:
+                    metrics.cache_lookup(prefix, True)
+                    return entry[1]
+
+                metrics.cache_lookup(prefix, False)
+                value = func(*args, **kwargs)
+                try:
+                    self.backend.set(key, (versions, value), ttl or self.default_ttl)
+                except Exception as e:
+                    logging.error(f"Cache write failed for {prefix}: {e}")
+                return value
+
+            wrapper.uncached = func
+            wrapper.cache_tags = tags
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags):
+        """Expire every entry depending on any of ``tags`` (for writes made outside a session)"""
+        names = sorted({tag_name(tag) for tag in tags})
+        if names:
+            self.backend.bump(names)
+
+    def clear(self):
+        self.backend.clear()
+
+
+app_cache = AppCache()
+cached = app_cache.cached
+
+
+def _has_pending_writes(tags):
+    if not tags:
+        return False
+    session = db.session()
+    written = session.info.get("cache_tags")
+    if written and written.intersection(tags):
+        return True
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj.__table__.name in tags:
+            return True
+    return False
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_written_tables(session, flush_context, instances):
+    """Remember which tables this transaction writes to"""
+    written = session.info.setdefault("cache_tags", set())
+    for obj in list(session.new) + list(session.deleted):
+        written.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            written.add(obj.__table__.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_writes(orm_execute_state):
+    """Bulk ``insert()``/``update()``/``delete()`` statements bypass the flush"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault("cache_tags", set()).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    written = session.info.pop("cache_tags", None)
+    if written:
+        try:
+            app_cache.invalidate(*written)
+        except Exception as e:
+            logging.error(f"Cache invalidation failed for {sorted(written)}: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_writes(session):
+    session.info.pop("cache_tags", None)
@@ -0,0 +1,136 @@
+# app/services/calendar_service.py
+from datetime import date, datetime, time, timedelta
+
+from dateutil import parser as date_parser
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.coach_athlete import CoachAthlete
+from app.models.session_schedules import SessionSchedule
+from app.models.training_plan import TrainingPlan
+from app.models.user import User
+
+MAX_WINDOW_DAYS = 62      # a month view plus the leading/trailing weeks it shows
+SESSION_LOOKBACK = timedelta(hours=24)  # sessions starting before the window may still overlap it
+
+SESSION_COLORS = {"virtual": "green"}
+DEFAULT_SESSION_COLOR = "blue"
+PLAN_COLOR = "purple"
+
+
+class CalendarRangeError(ValueError):
+    """Raised when a feed window cannot be parsed or is too wide"""
+
+
+def parse_timestamp(value):
+    try:
+        parsed = date_parser.isoparse(value)
+    except (TypeError, ValueError) as e:
+        raise CalendarRangeError(f"Invalid date: {value}") from e
+    if isinstance(parsed, datetime):
+        # Calendar widgets send the viewer's offset; sessions are stored naive
+        return parsed.replace(tzinfo=None)
+    return datetime.combine(parsed, time.min)
+
+
+def parse_window(args, today=None):
+    """``[start, end)`` from the ``start``/``end`` args calendar widgets send.
+
+    Without a window the current month is used.
+    """
+    if not args.get('start') and not args.get('end'):
+        today = today or date.today()
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return datetime.combine(start, time.min), datetime.combine(end, time.min)
+
+    if not args.get('start') or not args.get('end'):
+        raise CalendarRangeError("Both start and end are required")
+    start, end = parse_timestamp(args['start']), parse_timestamp(args['end'])
+    if end <= start:
+        raise CalendarRangeError("end must be after start")
+    if end - start > timedelta(days=MAX_WINDOW_DAYS):
+        raise CalendarRangeError(f"Window cannot exceed {MAX_WINDOW_DAYS} days")
+    return start, end
+
+
+def _active_athletes(coach_id):
+    return (
+        select(CoachAthlete.athlete_id)
+        .where(CoachAthlete.coach_id == coach_id, CoachAthlete.is_active == True)
+    )
+
+
+def coach_events(coach_id, start, end):
+    """Sessions and plans of a coach's active athletes that overlap ``[start, end)``.
+
+    Sessions are range-scanned on ``(coach_id, scheduled_at)`` and plans on
+    ``(coach_id, start_date, end_date)``; athlete names come from the same
+    query, so the feed costs two round trips whatever the window holds.
+    """
+    sessions = db.session.execute(
+        select(
+            SessionSchedule.id,
+            SessionSchedule.title,
+            SessionSchedule.type,
+            SessionSchedule.status,
+            SessionSchedule.scheduled_at,
+            SessionSchedule.duration,
+            SessionSchedule.athlete_id,
+            User.name.label('athlete_name'),
+        )
+        .join(User, User.id == SessionSchedule.athlete_id)
+        .where(
+            SessionSchedule.coach_id == coach_id,
+            SessionSchedule.scheduled_at >= start - SESSION_LOOKBACK,
+            SessionSchedule.scheduled_at < end,
+            SessionSchedule.athlete_id.in_(_active_athletes(coach_id)),
+        )
+        .order_by(SessionSchedule.scheduled_at, SessionSchedule.id)
+    ).all()
+
+    plans = db.session.execute(
+        select(
+            TrainingPlan.id,
+            TrainingPlan.title,
+            TrainingPlan.status,
+            TrainingPlan.start_date,
+            TrainingPlan.end_date,
+            TrainingPlan.athlete_id,
+            User.name.label('athlete_name'),
+        )
+        .join(User, User.id == TrainingPlan.athlete_id)
+        .where(
+            TrainingPlan.coach_id == coach_id,
+            TrainingPlan.start_date <= (end - timedelta(microseconds=1)).date(),
+            TrainingPlan.end_date >= start.date(),
+            TrainingPlan.athlete_id.in_(_active_athletes(coach_id)),
+        )
+        .order_by(TrainingPlan.start_date, TrainingPlan.id)
+    ).all()
+
+    events = []
+    for session in sessions:
+        session_end = session.scheduled_at + timedelta(minutes=session.duration or 0)
+        if session.scheduled_at < start and session_end <= start:
+            continue
+        events.append({
+            "id": f"session-{session.id}",
+            "title": f"{session.title} ({session.athlete_name})",
+            "start": session.scheduled_at.isoformat(),
+            "end": session_end.isoformat(),
+            "color": SESSION_COLORS.get(session.type, DEFAULT_SESSION_COLOR),
+            "extendedProps": {"kind": "session", "athlete_id": session.athlete_id, "status": session.status},
+        })
+    for plan in plans:
+        events.append({
+            "id": f"plan-{plan.id}",
+            "title": f"{plan.title} ({plan.athlete_name})",
+            "start": plan.start_date.isoformat(),
+            # All-day events end exclusively
+            "end": (plan.end_date + timedelta(days=1)).isoformat(),
+            "allDay": True,
+            "color": PLAN_COLOR,
+            "extendedProps": {"kind": "plan", "athlete_id": plan.athlete_id, "status": plan.status},
+        })
+    return events
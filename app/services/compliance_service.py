@@ -0,0 +1,110 @@
+# app/services/compliance_service.py
+from datetime import date, timedelta
+
+from sqlalchemy import and_, case, func, select
+
+from app.extensions import db
+from app.models.coach_athlete import CoachAthlete
+from app.models.user import User
+from app.models.workout_log import WorkoutLog
+
+WINDOW_DAYS = 30
+MAX_WINDOW_DAYS = 365
+STATUSES = ('completed', 'partial', 'missed')
+SORT_KEYS = ('compliance_rate', 'trend', 'name', 'total_logs', 'completed_logs', 'partial_logs', 'missed_logs')
+
+
+def _window_columns(window, prefix=''):
+    """``COUNT``-style aggregates of workouts whose date falls in ``window``"""
+    def count_where(*conditions):
+        return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
+    in_window = [WorkoutLog.id.isnot(None)]
+    start, end = window
+    if start is not None:
+        in_window.append(WorkoutLog.date >= start)
+    if end is not None:
+        in_window.append(WorkoutLog.date <= end)
+
+    columns = [count_where(*in_window).label(f'{prefix}total')]
+    for status in STATUSES:
+        columns.append(count_where(*in_window, WorkoutLog.completion_status == status).label(f'{prefix}{status}'))
+    return columns
+
+
+def _rates(row, prefix=''):
+    total = row[f'{prefix}total'] or 0
+    counts = {
+        'total_logs': total,
+        'completed_logs': row[f'{prefix}completed'] or 0,
+        'partial_logs': row[f'{prefix}partial'] or 0,
+        'missed_logs': row[f'{prefix}missed'] or 0,
+    }
+    counts['compliance_rate'] = round(counts['completed_logs'] / total * 100, 1) if total else 0
+    return counts
+
+
+def completion_totals(athlete_ids, start=None, end=None):
+    """Total/completed/partial/missed workouts of a set of athletes, in one query"""
+    if not athlete_ids:
+        return _rates({'total': 0, 'completed': 0, 'partial': 0, 'missed': 0})
+    row = db.session.execute(
+        select(*_window_columns((start, end))).where(WorkoutLog.athlete_id.in_(athlete_ids))
+    ).mappings().first()
+    return _rates(row)
+
+
+def coach_compliance(coach_id, days=WINDOW_DAYS, sort='compliance_rate', descending=True, today=None):
+    """Per-athlete compliance of a coach's active athletes over the last ``days``.
+
+    One grouped query counts statuses for both the current window and the
+    window of the same length before it, so every athlete gets a ``trend``
+    (change in compliance rate, in points) without extra round trips.
+    Athletes without workouts are included with zero counts.
+    """
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+    previous = (start - timedelta(days=days), start - timedelta(days=1))
+
+    rows = db.session.execute(
+        select(
+            User.id.label('athlete_id'),
+            User.name,
+            *_window_columns((start, today)),
+            *_window_columns(previous, prefix='prev_')
+        )
+        .select_from(CoachAthlete)
+        .join(User, User.id == CoachAthlete.athlete_id)
+        .outerjoin(WorkoutLog, and_(
+            WorkoutLog.athlete_id == CoachAthlete.athlete_id,
+            WorkoutLog.date >= previous[0],
+            WorkoutLog.date <= today
+        ))
+        .where(CoachAthlete.coach_id == coach_id, CoachAthlete.is_active == True)
+        .group_by(User.id, User.name)
+    ).mappings().all()
+
+    report = []
+    for row in rows:
+        current, before = _rates(row), _rates(row, prefix='prev_')
+        entry = {'athlete_id': row['athlete_id'], 'name': row['name'], **current}
+        entry['previous_compliance_rate'] = before['compliance_rate']
+        entry['previous_total_logs'] = before['total_logs']
+        entry['trend'] = round(current['compliance_rate'] - before['compliance_rate'], 1)
+        report.append(entry)
+
+    if sort not in SORT_KEYS:
+        sort = 'compliance_rate'
+    report.sort(key=lambda entry: ((entry[sort] or '').lower() if sort == 'name' else entry[sort], entry['athlete_id']),
+                reverse=descending)
+    team = _rates({
+        status: sum(entry[f'{status}_logs'] for entry in report)
+        for status in ('total',) + STATUSES
+    })
+    return {
+        'window_days': days,
+        'start_date': start.isoformat(),
+        'end_date': today.isoformat(),
+        'team': team,
+        'athletes': report,
+    }
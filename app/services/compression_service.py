@@ -0,0 +1,96 @@
+# app/services/compression_service.py
+import gzip
+
+from flask import request
+
+from app.services.offload_service import offloader
+
+try:
+    import brotli
+except ImportError:  # responses are gzipped only
+    brotli = None
+
+MIN_SIZE_BYTES = 1024
+OFFLOAD_SIZE_BYTES = 256 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+COMPRESSIBLE_MIMETYPES = frozenset({
+    "application/json", "application/javascript", "application/xml", "image/svg+xml",
+    "text/html", "text/css", "text/csv", "text/javascript", "text/plain", "text/xml",
+})
+
+
+def compress(data, encoding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class ResponseCompressor:
+    """Negotiated brotli/gzip compression of dynamic responses.
+
+    Applies to buffered responses of a compressible type above
+    ``COMPRESS_MIN_BYTES``, choosing the encoding from ``Accept-Encoding``
+    (brotli first when installed). Files sent with ``send_file``, streamed
+    exports, already encoded bodies (the precompressed static build) and
+    ``no-transform`` responses pass through untouched. Bodies above
+    ``COMPRESS_OFFLOAD_BYTES`` are compressed through the offloader so a
+    large export does not stall the hub. Strong ETags become weak, since
+    the compressed bytes differ from the ones they were computed over.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = MIN_SIZE_BYTES
+        self.offload_size = OFFLOAD_SIZE_BYTES
+        self.gzip_level = GZIP_LEVEL
+        self.brotli_quality = BROTLI_QUALITY
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("COMPRESS_ENABLED", True)
+        self.min_size = app.config.get("COMPRESS_MIN_BYTES", MIN_SIZE_BYTES)
+        self.offload_size = app.config.get("COMPRESS_OFFLOAD_BYTES", OFFLOAD_SIZE_BYTES)
+        self.gzip_level = app.config.get("COMPRESS_GZIP_LEVEL", GZIP_LEVEL)
+        self.brotli_quality = app.config.get("COMPRESS_BROTLI_QUALITY", BROTLI_QUALITY)
+        if self.enabled:
+            app.after_request(self._compress_response)
+
+    def negotiate(self):
+        return request.accept_encodings.best_match(self.encodings)
+
+    def _compressible(self, response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or response.is_streamed or "Content-Encoding" in response.headers:
+            return False
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or response.cache_control.no_transform:
+            return False
+        length = response.calculate_content_length()
+        return length is not None and length >= self.min_size
+
+    def _compress_response(self, response):
+        if not self._compressible(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) >= self.offload_size:
+            body = offloader.run(compress, data, encoding, self.gzip_level, self.brotli_quality, name="compress_response")
+        else:
+            body = compress(data, encoding, self.gzip_level, self.brotli_quality)
+        if len(body) >= len(data):
+            return response
+
+        response.set_data(body)
+        response.content_encoding = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+response_compressor = ResponseCompressor()
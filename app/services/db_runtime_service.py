@@ -0,0 +1,117 @@
+# app/services/db_runtime_service.py
+import logging
+import time
+
+import eventlet
+from eventlet import patcher
+from eventlet.hubs import trampoline
+from sqlalchemy import text
+
+from app.extensions import db
+
+try:
+    import psycopg2
+    from psycopg2 import extensions as pg_extensions
+except ImportError:  # SQLite-only environments (tests)
+    psycopg2 = None
+    pg_extensions = None
+
+
+def eventlet_wait_callback(conn, timeout=-1):
+    """psycopg2 wait callback that yields to the eventlet hub instead of blocking the process.
+
+    With it installed, psycopg2 runs every connection in non-blocking mode
+    and calls this whenever it would wait on the socket, so a slow query
+    only parks the green thread that issued it.
+    """
+    while True:
+        state = conn.poll()
+        if state == pg_extensions.POLL_OK:
+            return
+        if state == pg_extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == pg_extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+
+def green_driver_active():
+    return pg_extensions is not None and pg_extensions.get_wait_callback() is eventlet_wait_callback
+
+
+def _uses_psycopg2(uri):
+    return bool(uri) and uri.split(":", 1)[0] in ("postgres", "postgresql", "postgresql+psycopg2")
+
+
+def install_green_driver(app):
+    """Make psycopg2 cooperative when the server runs under eventlet.
+
+    ``DB_GREEN_DRIVER`` is ``auto`` (install when eventlet has patched the
+    socket module, as run.py does), ``on`` or ``off``. The callback is
+    process-wide and must be set before the pool opens its first connection.
+    """
+    mode = app.config.get("DB_GREEN_DRIVER", "auto")
+    if mode == "off" or psycopg2 is None or not _uses_psycopg2(app.config.get("SQLALCHEMY_DATABASE_URI")):
+        return False
+    if mode == "auto" and not patcher.is_monkey_patched("socket"):
+        return False
+
+    pg_extensions.set_wait_callback(eventlet_wait_callback)
+    logging.info("psycopg2 wait callback installed; queries yield to the eventlet hub")
+    return True
+
+
+def benchmark_concurrent_queries(concurrency=10, sleep_seconds=0.5):
+    """Run ``concurrency`` slow queries (``pg_sleep``) at once, with and without the wait callback.
+
+    Blocking psycopg2 makes green threads queue behind each other, so the
+    wall time approaches ``concurrency * sleep_seconds``; with the callback
+    it stays close to a single ``sleep_seconds``.
+    """
+    from flask import current_app
+
+    if db.engine.dialect.name != "postgresql" or psycopg2 is None:
+        return {"skipped": "benchmark needs PostgreSQL through psycopg2"}
+    if not patcher.is_monkey_patched("socket"):
+        return {"skipped": "eventlet is not monkey patched; run with FLASK_APP=run.py"}
+
+    app = current_app._get_current_object()
+    pool_capacity = db.engine.pool.size() + max(db.engine.pool._max_overflow, 0)
+    concurrency = min(concurrency, pool_capacity)
+
+    def slow_query(_):
+        with app.app_context():
+            started = time.perf_counter()
+            db.session.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": sleep_seconds})
+            db.session.remove()
+            return time.perf_counter() - started
+
+    def run():
+        # Connections pick up the wait callback when they are opened
+        db.engine.dispose()
+        started = time.perf_counter()
+        latencies = list(eventlet.GreenPool(concurrency).imap(slow_query, range(concurrency)))
+        return {
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "slowest_query_seconds": round(max(latencies), 3),
+        }
+
+    previous = pg_extensions.get_wait_callback()
+    try:
+        pg_extensions.set_wait_callback(None)
+        blocking = run()
+        pg_extensions.set_wait_callback(eventlet_wait_callback)
+        cooperative = run()
+    finally:
+        pg_extensions.set_wait_callback(previous)
+        db.engine.dispose()
+
+    return {
+        "concurrency": concurrency,
+        "sleep_seconds": sleep_seconds,
+        "blocking": blocking,
+        "cooperative": cooperative,
+        "speedup": round(blocking["wall_seconds"] / cooperative["wall_seconds"], 2)
+        if cooperative["wall_seconds"] else None,
+    }
@@ -0,0 +1,116 @@
+# app/services/goal_progress_service.py
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+import logging
+
+from sqlalchemy import bindparam, delete, select, update
+
+from app.extensions import db
+from app.models.goal_progress_log import GoalProgressLog
+from app.services.health_timeseries_service import lttb
+
+MAX_CHART_POINTS = 60
+COMPACT_AFTER_DAYS = 30
+COMPACTION_GOAL_BATCH = 200
+
+
+def progress_logs_by_goal(goal_ids, max_points=MAX_CHART_POINTS):
+    """Chart points of several goals from one ``IN`` query, downsampled per goal.
+
+    Returns ``{goal_id: [{"value", "date"}, ...]}`` in chronological order;
+    goals with more than ``max_points`` entries are reduced with LTTB so
+    their shape (plateaus and jumps) survives.
+    """
+    if not goal_ids:
+        return {}
+
+    rows = db.session.execute(
+        select(GoalProgressLog.goal_id, GoalProgressLog.recorded_at, GoalProgressLog.recorded_value)
+        .where(GoalProgressLog.goal_id.in_(goal_ids))
+        .order_by(GoalProgressLog.goal_id, GoalProgressLog.recorded_at, GoalProgressLog.id)
+    ).all()
+
+    grouped = defaultdict(list)
+    for row in rows:
+        if row.recorded_at is None:
+            continue
+        grouped[row.goal_id].append((row.recorded_at.timestamp(), row.recorded_value or 0, row.recorded_at))
+
+    return {
+        goal_id: [
+            {"value": value, "date": recorded_at.isoformat()}
+            for _, value, recorded_at in lttb(points, max_points)
+        ]
+        for goal_id, points in grouped.items()
+    }
+
+
+def compact_progress_logs(older_than_days=COMPACT_AFTER_DAYS, today=None):
+    """Fold fine-grained goal log entries older than ``older_than_days`` into one row per goal and day.
+
+    A day keeps its last entry (the goal's value at the end of that day),
+    flagged ``is_summary`` with ``sample_count`` set to the number of
+    entries it stands for; the other entries are deleted. Days that are
+    already a single summary row are left alone, so the job is idempotent.
+    """
+    cutoff = datetime.combine((today or date.today()) - timedelta(days=older_than_days), time.min)
+    stats = {"goals": 0, "days": 0, "deleted": 0}
+
+    goal_ids = db.session.execute(
+        select(GoalProgressLog.goal_id)
+        .where(GoalProgressLog.recorded_at < cutoff, GoalProgressLog.is_summary == False)
+        .distinct()
+    ).scalars().all()
+
+    for offset in range(0, len(goal_ids), COMPACTION_GOAL_BATCH):
+        batch = goal_ids[offset:offset + COMPACTION_GOAL_BATCH]
+        rows = db.session.execute(
+            select(GoalProgressLog.id, GoalProgressLog.goal_id, GoalProgressLog.recorded_at,
+                   GoalProgressLog.sample_count, GoalProgressLog.is_summary)
+            .where(GoalProgressLog.goal_id.in_(batch), GoalProgressLog.recorded_at < cutoff)
+            .order_by(GoalProgressLog.goal_id, GoalProgressLog.recorded_at, GoalProgressLog.id)
+        ).all()
+
+        days = defaultdict(list)
+        for row in rows:
+            days[(row.goal_id, row.recorded_at.date())].append(row)
+
+        summaries, doomed = [], []
+        for entries in days.values():
+            keeper = entries[-1]
+            if len(entries) == 1 and keeper.is_summary:
+                continue
+            summaries.append({
+                "log_id": keeper.id,
+                "count": sum(entry.sample_count or 1 for entry in entries)
+            })
+            doomed.extend(entry.id for entry in entries[:-1])
+
+        if summaries:
+            db.session.execute(
+                update(GoalProgressLog.__table__)
+                .where(GoalProgressLog.__table__.c.id == bindparam("log_id"))
+                .values(is_summary=True, sample_count=bindparam("count")),
+                summaries
+            )
+        if doomed:
+            db.session.execute(delete(GoalProgressLog).where(GoalProgressLog.id.in_(doomed)))
+        db.session.commit()
+
+        stats["goals"] += len(batch)
+        stats["days"] += len(summaries)
+        stats["deleted"] += len(doomed)
+
+    return stats
+
+
+def run_scheduled_compaction(app):
+    """Entry point for the scheduler, which runs outside of any app context"""
+    with app.app_context():
+        try:
+            stats = compact_progress_logs(app.config.get("GOAL_LOG_COMPACT_AFTER_DAYS", COMPACT_AFTER_DAYS))
+            if stats["deleted"]:
+                logging.info(f"Compacted goal progress logs: {stats}")
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error compacting goal progress logs: {e}")
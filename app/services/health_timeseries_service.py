@@ -0,0 +1,179 @@
+# app/services/health_timeseries_service.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import Float, and_, case, func, select, type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.sql.util import ClauseAdapter
+
+from app.extensions import db
+from app.models.health_record import HealthRecord
+
+RANGES = {
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+    '90d': timedelta(days=90),
+    '180d': timedelta(days=180),
+    '1y': timedelta(days=365),
+    'all': None,
+}
+BUCKETS = ('day', 'week', 'month')
+AGGREGATES = ('min', 'max', 'avg', 'last')
+DEFAULT_POINTS = 300
+MIN_POINTS = 3  # LTTB needs the two ends plus one bucket; below that it returns every point
+MAX_POINTS = 1000
+
+# Response key -> column expression
+METRICS = {
+    'weight': HealthRecord.weight,
+    'sleep': HealthRecord.sleep_hours,
+    'hr': HealthRecord.heart_rate,
+    'calIn': HealthRecord.calories_intake,
+    'calOut': HealthRecord.calories_burned,
+    'bmi': case(
+        (and_(HealthRecord.weight.isnot(None), HealthRecord.height > 0),
+         HealthRecord.weight / ((HealthRecord.height / 100.0) * (HealthRecord.height / 100.0))),
+        else_=None
+    ),
+}
+
+
+def auto_bucket(span):
+    """Pick the finest bucket that keeps a span to a few hundred points"""
+    if span is None or span <= timedelta(days=180):
+        return 'day'
+    if span <= timedelta(days=3 * 365):
+        return 'week'
+    return 'month'
+
+
+def _bucket_expression(bucket):
+    if db.engine.dialect.name == 'postgresql':
+        return func.date_trunc(bucket, HealthRecord.recorded_at)
+    # SQLite, used by the test configuration
+    formats = {'day': '%Y-%m-%d', 'week': '%Y-%W', 'month': '%Y-%m-01'}
+    return func.strftime(formats[bucket], HealthRecord.recorded_at)
+
+
+def _last_expression(column, bucket_expression, start=None):
+    """Latest non-null value of ``column`` in each bucket"""
+    if db.engine.dialect.name == 'postgresql':
+        ordered = func.array_agg(aggregate_order_by(column, HealthRecord.recorded_at.desc()))
+        return type_coerce(ordered.filter(column.isnot(None)), ARRAY(Float))[1]
+
+    # No ordered aggregates elsewhere: look the value up per bucket with a correlated subquery
+    latest = HealthRecord.__table__.alias('latest')
+    adapt = ClauseAdapter(latest).traverse
+    value = adapt(getattr(column, 'expression', column))  # mapped attributes carry their column here
+    lookup = select(value).where(
+        latest.c.athlete_id == HealthRecord.athlete_id,
+        adapt(bucket_expression) == bucket_expression,
+        value.isnot(None)
+    )
+    if start is not None:
+        lookup = lookup.where(latest.c.recorded_at >= start)
+    return func.max(lookup.order_by(latest.c.recorded_at.desc()).limit(1).scalar_subquery())
+
+
+def _aggregate_expression(agg, column, bucket_expression, start=None):
+    if agg == 'last':
+        return _last_expression(column, bucket_expression, start)
+    if agg not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate: {agg}")
+    return getattr(func, agg)(column)
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of ``(x, y, payload)`` points.
+
+    Keeps the first and last points and, for every intermediate bucket,
+    the point forming the largest triangle with the previously kept point
+    and the average of the next bucket, which preserves peaks and troughs.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return points
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = points[a][0], points[a][1]
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def _as_datetime(bucket_value):
+    if isinstance(bucket_value, datetime):
+        return bucket_value
+    if len(bucket_value) == 7 and bucket_value[4] == '-':  # SQLite '%Y-%W'
+        return datetime.strptime(bucket_value + '-1', '%Y-%W-%w')
+    return datetime.strptime(bucket_value, '%Y-%m-%d')
+
+
+def health_series(athlete_id, range_key='all', bucket='auto', agg='avg', points=DEFAULT_POINTS, now=None):
+    """Return bucketed, downsampled chart series for every health metric.
+
+    Aggregation happens in one grouped SQL query over the requested range,
+    so the work done in Python is bounded by the number of buckets, and
+    each series is then reduced to at most ``points`` entries with LTTB.
+    """
+    now = now or datetime.utcnow()
+    span = RANGES[range_key]
+    start = now - span if span else None
+
+    if bucket == 'auto':
+        if start is None:
+            first = db.session.execute(
+                select(func.min(HealthRecord.recorded_at)).where(HealthRecord.athlete_id == athlete_id)
+            ).scalar()
+            bucket = auto_bucket(now - first if first else None)
+        else:
+            bucket = auto_bucket(span)
+
+    bucket_expression = _bucket_expression(bucket)
+    bucket_col = bucket_expression.label('bucket')
+    # Only the requested aggregate is computed; 'last' is the expensive one
+    columns = [bucket_col] + [
+        _aggregate_expression(agg, column, bucket_expression, start).label(key)
+        for key, column in METRICS.items()
+    ]
+
+    query = select(*columns).where(HealthRecord.athlete_id == athlete_id)
+    if start is not None:
+        query = query.where(HealthRecord.recorded_at >= start)
+    rows = db.session.execute(query.group_by(bucket_col).order_by(bucket_col)).mappings().all()
+
+    series = {}
+    for key in METRICS:
+        raw = []
+        for row in rows:
+            value = row[key]
+            if value is None:
+                continue
+            when = _as_datetime(row['bucket'])
+            raw.append((when.timestamp(), float(value), when))
+        series[key] = [
+            {"date": when.strftime("%Y-%m-%d"), "value": round(value, 1)}
+            for _, value, when in lttb(raw, points)
+        ]
+
+    return {'bucket': bucket, 'range': range_key, 'agg': agg, 'series': series}
@@ -0,0 +1,291 @@
+# app/services/heart_rate_store_service.py
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import logging
+import zlib
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.workout_log import WorkoutLog
+from app.models.workout_heart_rate import WorkoutHeartRateStream
+from app.services.health_timeseries_service import lttb
+
+ENCODING_VERSION = 1
+MIN_BPM, MAX_BPM = 25, 250
+MAX_GAP_SECONDS = 10  # longer gaps (pauses, dropouts) count this long towards zones
+MIGRATION_BATCH_SIZE = 200
+
+# Zone column -> share of max HR, lower bound inclusive
+HR_ZONES = (
+    ('hr_zone_relaxed', 0.50, 0.60),
+    ('hr_zone_light', 0.60, 0.70),
+    ('hr_zone_aerobic', 0.70, 0.85),
+    ('hr_zone_intensive', 0.85, 0.90),
+    ('hr_zone_anaerobic', 0.90, None),
+)
+
+_TIME_KEYS = ('t', 'offset', 'time', 'timestamp', 'ts')
+_BPM_KEYS = ('bpm', 'hr', 'heart_rate', 'value')
+
+
+# ------- codec -------
+def _write_varint(out, value):
+    value = (value << 1) ^ (value >> 63)  # zigzag, keeps small negative deltas small
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varints(buffer):
+    value = shift = 0
+    for byte in buffer:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield (value >> 1) ^ -(value & 1)
+        value = shift = 0
+
+
+def encode_samples(samples):
+    """Pack sorted ``(t, bpm)`` pairs as zigzag varint deltas and compress them.
+
+    Consecutive samples usually differ by one second and a few bpm, so
+    most deltas fit in a single byte before compression.
+    """
+    out = bytearray()
+    prev_t = prev_bpm = 0
+    for t, bpm in samples:
+        _write_varint(out, t - prev_t)
+        _write_varint(out, bpm - prev_bpm)
+        prev_t, prev_bpm = t, bpm
+    return zlib.compress(bytes(out), 6)
+
+
+def decode_samples(data):
+    values = _read_varints(zlib.decompress(data))
+    samples = []
+    t = bpm = 0
+    for dt in values:
+        t += dt
+        bpm += next(values)
+        samples.append((t, bpm))
+    return samples
+
+
+# ------- input parsing -------
+def _as_seconds(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    raise ValueError(f"Unsupported sample time: {value!r}")
+
+
+def _first(mapping, keys):
+    for key in keys:
+        if mapping.get(key) is not None:
+            return mapping[key]
+    return None
+
+
+def normalize_samples(raw, interval=1):
+    """Turn the HR payloads clients send into sorted ``(offset_seconds, bpm)`` pairs.
+
+    Accepts a list of bpm values spaced ``interval`` seconds apart, a list
+    of ``[t, bpm]`` pairs, a list of dicts such as ``{"t": 12, "bpm": 141}``
+    or ``{"timestamp": "...", "hr": 141}``, or a dict wrapping any of these
+    under ``samples`` (or parallel ``timestamps``/``values`` lists).
+    Times are made relative to the first sample; out-of-range bpm values are
+    dropped.
+    """
+    if not raw:
+        return []
+    if isinstance(raw, dict):
+        interval = raw.get('interval', interval) or 1
+        if 'timestamps' in raw and 'values' in raw:
+            raw = list(zip(raw['timestamps'], raw['values']))
+        else:
+            raw = raw.get('samples') or raw.get('data') or []
+
+    pairs = []
+    for index, item in enumerate(raw):
+        if isinstance(item, dict):
+            t, bpm = _first(item, _TIME_KEYS), _first(item, _BPM_KEYS)
+        elif isinstance(item, (list, tuple)) and len(item) >= 2:
+            t, bpm = item[0], item[1]
+        else:
+            t, bpm = None, item
+        if t is None:
+            t = index * interval
+        try:
+            bpm = int(round(float(bpm)))
+            t = _as_seconds(t)
+        except (TypeError, ValueError):
+            continue
+        if MIN_BPM <= bpm <= MAX_BPM:
+            pairs.append((t, bpm))
+
+    if not pairs:
+        return []
+    pairs.sort()
+    origin = pairs[0][0]
+
+    samples, last_t = [], None
+    for t, bpm in pairs:
+        offset = int(round(t - origin))
+        if offset == last_t:
+            continue  # keep one sample per second
+        samples.append((offset, bpm))
+        last_t = offset
+    return samples
+
+
+# ------- summary -------
+def athlete_max_hr(athlete_id):
+    """Age-predicted max HR (220 - age) when the athlete profile has an age"""
+    from app.models.athlete_profile import AthleteProfile
+    age = db.session.execute(
+        select(AthleteProfile.age).where(AthleteProfile.user_id == athlete_id)
+    ).scalar()
+    return 220 - age if age and 0 < age < 120 else None
+
+
+def athlete_max_hrs(athlete_ids):
+    """``athlete_max_hr`` for many athletes with one query; athletes without an age map to 0"""
+    from app.models.athlete_profile import AthleteProfile
+    max_hrs = dict.fromkeys(athlete_ids, 0)
+    rows = db.session.execute(
+        select(AthleteProfile.user_id, AthleteProfile.age).where(AthleteProfile.user_id.in_(max_hrs))
+    ).all()
+    for user_id, age in rows:
+        if age and 0 < age < 120:
+            max_hrs[user_id] = 220 - age
+    return max_hrs
+
+
+def summarize(samples, max_hr=None):
+    """Min/avg/max bpm and the percentage of time spent in each HR zone.
+
+    Each sample counts for the time until the next one (capped at
+    ``MAX_GAP_SECONDS``); without a known ``max_hr`` the observed peak is
+    used as the reference.
+    """
+    if not samples:
+        return None
+
+    bpms = [bpm for _, bpm in samples]
+    max_hr = max_hr or max(bpms)
+    zone_seconds = dict.fromkeys((zone for zone, _, _ in HR_ZONES), 0)
+    weighted_sum = total_seconds = 0
+
+    for i, (t, bpm) in enumerate(samples):
+        weight = min(samples[i + 1][0] - t, MAX_GAP_SECONDS) if i + 1 < len(samples) else 1
+        weighted_sum += bpm * weight
+        total_seconds += weight
+        share = bpm / max_hr
+        for zone, lower, upper in HR_ZONES:
+            if share >= lower and (upper is None or share < upper):
+                zone_seconds[zone] += weight
+                break
+
+    summary = {
+        'min_heart_rate': min(bpms),
+        'avg_heart_rate': int(round(weighted_sum / total_seconds)),
+        'max_heart_rate': max(bpms),
+        'hr_sample_count': len(samples),
+    }
+    for zone, seconds in zone_seconds.items():
+        summary[zone] = round(100.0 * seconds / total_seconds, 1)
+    return summary
+
+
+# ------- store -------
+def store_samples(workout, raw, max_hr=None, interval=1):
+    """Replace the HR stream of ``workout`` and refresh its summary columns.
+
+    The caller owns the transaction. Returns the summary dict, or None when
+    ``raw`` contained no usable samples. Without ``max_hr`` it is looked up
+    from the athlete profile; ``max_hr=0`` skips the lookup and zones are
+    relative to the observed peak.
+    """
+    samples = normalize_samples(raw, interval=interval)
+    if not samples:
+        return None
+
+    if max_hr is None:
+        max_hr = athlete_max_hr(workout.athlete_id)
+    summary = summarize(samples, max_hr)
+    for column, value in summary.items():
+        setattr(workout, column, value)
+
+    stream = workout.heart_rate_stream
+    if stream is None:
+        stream = WorkoutHeartRateStream()
+        workout.heart_rate_stream = stream
+    stream.encoding = ENCODING_VERSION
+    stream.sample_count = len(samples)
+    stream.duration_seconds = samples[-1][0]
+    stream.data = encode_samples(samples)
+
+    workout.heart_rate_data = {}
+    return summary
+
+
+def read_samples(workout, start=None, end=None, max_points=None):
+    """Samples of ``workout`` with offsets in ``[start, end]`` seconds.
+
+    Falls back to the legacy ``heart_rate_data`` column for workouts that
+    have not been migrated. With ``max_points`` the range is reduced with
+    LTTB so charts keep their peaks.
+    """
+    stream = workout.heart_rate_stream
+    if stream is not None:
+        samples = decode_samples(stream.data)
+    else:
+        samples = normalize_samples(workout.heart_rate_data)
+
+    if start is not None or end is not None:
+        offsets = [t for t, _ in samples]
+        lo = bisect_left(offsets, start) if start is not None else 0
+        hi = bisect_right(offsets, end) if end is not None else len(samples)
+        samples = samples[lo:hi]
+
+    if max_points:
+        samples = [(t, bpm) for t, bpm, _ in lttb([(t, bpm, None) for t, bpm in samples], max_points)]
+
+    return [{"t": t, "bpm": bpm} for t, bpm in samples]
+
+
+def migrate_legacy_heart_rate(batch_size=MIGRATION_BATCH_SIZE):
+    """Move non-empty ``heart_rate_data`` JSONB payloads into the sample store"""
+    migrated = last_id = 0
+    while True:
+        workouts = (
+            WorkoutLog.query
+            .filter(WorkoutLog.id > last_id, WorkoutLog.hr_sample_count.is_(None) | (WorkoutLog.hr_sample_count == 0))
+            .order_by(WorkoutLog.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not workouts:
+            break
+
+        max_hrs = athlete_max_hrs({workout.athlete_id for workout in workouts})
+        for workout in workouts:
+            if workout.heart_rate_data and store_samples(workout, workout.heart_rate_data, max_hr=max_hrs[workout.athlete_id]):
+                migrated += 1
+        last_id = workouts[-1].id
+        db.session.commit()
+
+    logging.info(f"Migrated heart rate data of {migrated} workouts")
+    return migrated
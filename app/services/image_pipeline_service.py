@@ -0,0 +1,231 @@
+# app/services/image_pipeline_service.py
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+
+import eventlet
+from eventlet import patcher
+from flask import url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.services.offload_service import offloader
+from app.services.usage_metering_service import usage_meter
+
+UPLOAD_ROOT = "uploads"
+VARIANT_FOLDER = "variants"
+UPLOAD_FOLDERS = ("profile", "workouts", "plans")
+IMAGE_WORKERS = 2
+WEBP_QUALITY = 80
+VARIANT_MAX_AGE = 365 * 24 * 3600
+STORAGE_UNIT_BYTES = 1024 * 1024  # the 'storage' feature is metered in MB
+
+# name -> (width, height, crop); cropped variants are exactly width x height
+VARIANTS = {
+    "thumb": (96, 96, True),     # chat lists, rosters, navbars
+    "avatar": (256, 256, True),  # profile headers
+    "display": (1280, 1280, False),
+}
+
+FORMAT_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+HASHED_NAME_PATTERN = re.compile(r"([0-9a-f]{64})\.(?:jpg|png|gif|webp)$")
+
+
+class ImageUploadError(ValueError):
+    """Raised when an upload is not an image the pipeline accepts"""
+
+    status_code = 400
+
+
+class StorageLimitError(ImageUploadError):
+    """Raised when new content does not fit in the uploader's storage quota"""
+
+    status_code = 403
+
+
+def storage_units(size_bytes):
+    """Metered storage units (MB) taken by ``size_bytes``, rounded up"""
+    return -(-size_bytes // STORAGE_UNIT_BYTES)
+
+
+class StoredImage:
+    """Result of storing one upload"""
+
+    __slots__ = ("digest", "folder", "filename", "size_bytes", "created")
+
+    def __init__(self, digest, folder, filename, size_bytes, created):
+        self.digest = digest
+        self.folder = folder
+        self.filename = filename
+        self.size_bytes = size_bytes
+        self.created = created
+
+    @property
+    def url(self):
+        return f"/static/{UPLOAD_ROOT}/{self.folder}/{self.filename}"
+
+    def variant_url(self, variant):
+        return url_for("media.image_variant", digest=self.digest, variant=variant)
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ImagePipeline:
+    """Content-addressed image storage with resized WebP variants.
+
+    Originals are named by the SHA-256 of their bytes, so identical uploads
+    share one file and every URL is immutable. Variants are rendered off
+    the request through the shared offloader (``eventlet.tpool``) when the
+    server runs under eventlet, otherwise on a small thread pool. The media
+    route renders a variant on demand if it is requested before the worker
+    has finished.
+    """
+
+    def __init__(self):
+        self.static_folder = None
+        self._executor = None
+        self._green_pool = None
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        workers = app.config.get("IMAGE_WORKERS", IMAGE_WORKERS)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-pipeline")
+        self._green_pool = eventlet.GreenPool(workers)
+
+    # ------- paths -------
+    def original_path(self, folder, filename):
+        return os.path.join(self.static_folder, UPLOAD_ROOT, folder, filename)
+
+    def variant_path(self, digest, variant):
+        return os.path.join(self.static_folder, UPLOAD_ROOT, VARIANT_FOLDER, digest[:2], f"{digest}.{variant}.webp")
+
+    def find_original(self, digest):
+        for folder in UPLOAD_FOLDERS:
+            for extension in FORMAT_EXTENSIONS.values():
+                path = self.original_path(folder, f"{digest}.{extension}")
+                if os.path.exists(path):
+                    return path
+        return None
+
+    # ------- storing -------
+    def store(self, file_storage, folder, user_id=None):
+        """Validate, hash and save an uploaded image, then queue its variants.
+
+        With ``user_id``, new content is checked against and counted toward
+        that user's storage quota; bytes that are already stored take no
+        more disk and are not counted again.
+        """
+        if folder not in UPLOAD_FOLDERS:
+            raise ValueError(f"Unknown upload folder: {folder}")
+
+        data = file_storage.read()
+        if not data:
+            raise ImageUploadError("Empty file")
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image_format = image.format
+                image.verify()
+        except (UnidentifiedImageError, OSError, SyntaxError) as e:
+            raise ImageUploadError("File is not a valid image") from e
+
+        extension = FORMAT_EXTENSIONS.get(image_format)
+        if extension is None:
+            raise ImageUploadError(f"Unsupported image format: {image_format}")
+
+        digest = hashlib.sha256(data).hexdigest()
+        filename = f"{digest}.{extension}"
+        path = self.original_path(folder, filename)
+        created = not os.path.exists(path)
+        if created:
+            units = storage_units(len(data))
+            if user_id is not None and not usage_meter.check(user_id, 'storage', units):
+                raise StorageLimitError("Storage limit reached for your subscription plan")
+            _write_atomic(path, data)
+            if user_id is not None:
+                usage_meter.record(user_id, 'storage', units)
+
+        if any(not os.path.exists(self.variant_path(digest, variant)) for variant in VARIANTS):
+            self._submit(digest, path)
+        return StoredImage(digest, folder, filename, len(data), created)
+
+    # ------- variants -------
+    def render_variant(self, digest, variant, source_path):
+        width, height, crop = VARIANTS[variant]
+        with Image.open(source_path) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+            if crop:
+                image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+            else:
+                image.thumbnail((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+        _write_atomic(self.variant_path(digest, variant), buffer.getvalue())
+
+    def render_all(self, digest, source_path):
+        for variant in VARIANTS:
+            if not os.path.exists(self.variant_path(digest, variant)):
+                self.render_variant(digest, variant, source_path)
+
+    def _render_job(self, digest, source_path):
+        try:
+            offloader.run(self.render_all, digest, source_path, name="image_variants")
+        except Exception as e:
+            logging.error(f"Error rendering image variants for {digest}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(digest)
+
+    def _submit(self, digest, source_path):
+        with self._lock:
+            if digest in self._pending:
+                return
+            self._pending.add(digest)
+
+        if patcher.is_monkey_patched("thread"):
+            # GreenPool.spawn_n waits for a free slot; waiting in a separate green
+            # thread queues the job without holding up the upload request
+            eventlet.spawn_n(self._green_pool.spawn_n, self._render_job, digest, source_path)
+        else:
+            self._executor.submit(self._render_job, digest, source_path)
+
+
+image_pipeline = ImagePipeline()
+
+
+def content_digest(value):
+    """The SHA-256 digest in a stored filename or URL, or None for legacy names"""
+    match = HASHED_NAME_PATTERN.search(value or "")
+    return match.group(1) if match else None
+
+
+def image_variant_url(value, variant="display", default=None):
+    """URL of a resized variant of a stored image, or its original URL for legacy uploads"""
+    digest = content_digest(value)
+    if digest:
+        return url_for("media.image_variant", digest=digest, variant=variant)
+    return value or default
+
+
+def is_shared_upload(filename):
+    """Content-addressed files may be referenced by other rows and are never deleted"""
+    return content_digest(filename) is not None
@@ -0,0 +1,38 @@
+# app/services/job_lock_service.py
+from functools import wraps
+import logging
+import zlib
+
+from sqlalchemy import text
+
+from app.extensions import db
+
+
+def exclusive_job(name, func):
+    """Wrap a scheduled ``func(app)`` so only one process runs it at a time.
+
+    Every server process runs its own scheduler, so database-wide jobs
+    (sweeps, compaction) take a PostgreSQL session advisory lock keyed on
+    ``name`` on a dedicated connection and skip the run when another
+    process holds it. Other databases run the job unguarded. Jobs that
+    flush per-process buffers must not be wrapped: each process has to
+    flush its own.
+    """
+    key = zlib.crc32(name.encode("utf-8"))
+
+    @wraps(func)
+    def run(app):
+        with app.app_context():
+            if db.engine.dialect.name != "postgresql":
+                return func(app)
+            with db.engine.connect() as connection:
+                if not connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar():
+                    logging.info(f"Skipping {name}: another process is running it")
+                    return None
+                try:
+                    return func(app)
+                finally:
+                    connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                    connection.commit()
+
+    return run
@@ -0,0 +1,91 @@
+# app/services/json_provider_service.py
+from datetime import date, datetime, time
+from decimal import Decimal
+import enum
+import json
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder produces the same output, only slower
+    orjson = None
+
+
+def _default(o):
+    """Types neither encoder handles natively; dates are ISO 8601 on both paths"""
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, enum.Enum):
+        return o.value
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """``jsonify``/``return dict`` serialization through orjson.
+
+    ``datetime``, ``date`` and ``time`` become ISO 8601 strings (naive
+    values stay naive, as ``.isoformat()`` would write them), ``Decimal``
+    becomes a float and UUIDs, enums and sets are converted too, so routes
+    can return model values as they are. Keys are not sorted, non-ASCII
+    text is written as UTF-8 rather than escaped, and the encoded bytes go
+    straight into the response without a str round trip.
+    Calls with stdlib ``json.dumps`` keyword arguments, and values orjson
+    rejects (integers beyond 64 bits), use the stdlib encoder with the
+    same conversions.
+    """
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and app.config.get("JSON_FAST_SERIALIZER", True)
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj):
+        if self.use_orjson:
+            try:
+                return orjson.dumps(obj, default=_default, option=self._options())
+            except TypeError:
+                pass
+        return self.dumps(obj).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            try:
+                return orjson.dumps(obj, default=_default, option=self._options()).decode("utf-8")
+            except TypeError:
+                pass
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def install_json_provider(app):
+    app.json = FastJSONProvider(app)
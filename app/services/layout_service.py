@@ -0,0 +1,119 @@
+# app/services/layout_service.py
+import hashlib
+import logging
+
+from flask import g, render_template
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from markupsafe import Markup
+from werkzeug.local import LocalProxy
+
+ROLES = ("admin", "coach", "athlete")
+FRAGMENT_TEMPLATES = {
+    "navbar": "shared/navbar_{role}.html",
+    "sidebar": "shared/sidebar_{role}.html",
+}
+
+
+class Fragment:
+    __slots__ = ("html", "etag")
+
+    def __init__(self, html):
+        self.html = Markup(html)
+        self.etag = hashlib.sha1(html.encode("utf-8")).hexdigest()[:16]
+
+
+class LayoutFragments:
+    """Role navbar and sidebar HTML, rendered once per process instead of on every page.
+
+    The fragments carry no user data: the name, avatar and admin
+    permissions are filled in by ``layout-user.js`` from ``/me``. Pages get
+    them through the ``layout_fragment()`` template global, and the
+    ``/navbar`` and ``/sidebar`` endpoints serve them with an ETag.
+    """
+
+    def __init__(self):
+        self._fragments = {}
+
+    def init_app(self, app):
+        app.jinja_env.globals["layout_fragment"] = self.for_current_role
+        app.jinja_env.globals["current_role"] = current_role
+
+    def warm(self, app):
+        """Render every fragment up front; called once the blueprints are registered"""
+        with app.test_request_context("/"):
+            for kind in FRAGMENT_TEMPLATES:
+                for role in ROLES:
+                    try:
+                        self.get(kind, role)
+                    except Exception as e:
+                        logging.error(f"Could not prerender {kind} for {role}: {e}")
+
+    def get(self, kind, role):
+        """The cached fragment of one kind for one role; None for unknown kinds or roles"""
+        if kind not in FRAGMENT_TEMPLATES or role not in ROLES:
+            return None
+        fragment = self._fragments.get((kind, role))
+        if fragment is None:
+            fragment = Fragment(render_template(FRAGMENT_TEMPLATES[kind].format(role=role)))
+            self._fragments[(kind, role)] = fragment
+        return fragment
+
+    def for_current_role(self, kind):
+        fragment = self.get(kind, current_role())
+        return fragment.html if fragment else Markup("")
+
+    def clear(self):
+        self._fragments.clear()
+
+
+layout_fragments = LayoutFragments()
+
+
+def current_role():
+    """Role claim of the request's JWT (no database access), or None when anonymous"""
+    if "current_role" not in g:
+        role = None
+        try:
+            verify_jwt_in_request(optional=True)
+            if get_jwt_identity():
+                role = get_jwt().get("role")
+        except Exception:
+            pass
+        g.current_role = role
+    return g.current_role
+
+
+def _load_current_user():
+    if "current_user_obj" not in g:
+        from app.models import User
+
+        user = None
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+            if identity:
+                user = User.query.get(identity)
+        except Exception:
+            pass
+        g.current_user_obj = user
+    return g.current_user_obj
+
+
+# Template ``user``: only queried when a template actually reads it
+lazy_current_user = LocalProxy(_load_current_user)
+
+
+def user_summary(user):
+    """What the layout needs to personalise the cached fragments"""
+    profile = user.admin_profile if user.role == "admin" else None
+    permissions = (profile.permissions or {}) if profile else {}
+    if isinstance(permissions, dict):
+        permissions = [key for key, allowed in permissions.items() if allowed]
+    return {
+        "id": user.id,
+        "name": user.name,
+        "role": user.role,
+        "avatar": user.avatar_url("thumb"),
+        "is_superadmin": bool(profile and profile.is_superadmin),
+        "permissions": sorted(permissions),
+    }
@@ -0,0 +1,154 @@
+# app/services/login_throttle_service.py
+from datetime import datetime
+import logging
+import threading
+import time
+
+from limits import RateLimitItemPerMinute, RateLimitItemPerHour
+from limits.storage import storage_from_string
+from limits.strategies import MovingWindowRateLimiter
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models.login_logs import LoginLog
+
+LOGIN_LOG_BATCH_SIZE = 50
+# The per-IP windows hold successful attempts too, so they are sized above the failure limit
+IP_ATTEMPT_HEADROOM = 10
+
+
+class LoginThrottle:
+    """Sliding-window throttling of failed logins per email and per IP.
+
+    Counters live in the storage named by ``LOGIN_THROTTLE_STORAGE_URI``:
+    ``memory://`` keeps them in process, while ``redis://`` or
+    ``memcached://`` share them between workers. ``reserve`` counts an
+    attempt as failed before the password hash is computed, so a burst of
+    concurrent attempts cannot all get past the check and hash; a locked-out
+    email or IP costs no hashing at all. ``register_success`` takes the
+    attempt back: it clears the email's window and records a refund in the
+    IP's, so logins from a shared address do not lock it out.
+    """
+
+    def __init__(self):
+        self._limiter = None
+        self.email_limit = None
+        self.ip_limit = None
+        self.ip_window = None
+        self.register_limit = None
+
+    def init_app(self, app):
+        lockout_minutes = max(1, int(app.config['ACCOUNT_LOCKOUT_DURATION'].total_seconds() // 60))
+        ip_minutes = max(1, int(app.config['LOGIN_IP_WINDOW'].total_seconds() // 60))
+
+        self._limiter = MovingWindowRateLimiter(
+            storage_from_string(app.config.get('LOGIN_THROTTLE_STORAGE_URI', 'memory://'))
+        )
+        self.email_limit = RateLimitItemPerMinute(app.config['MAX_LOGIN_ATTEMPTS'], lockout_minutes)
+        self.ip_limit = RateLimitItemPerMinute(app.config['LOGIN_IP_MAX_ATTEMPTS'], ip_minutes)
+        self.ip_window = RateLimitItemPerMinute(app.config['LOGIN_IP_MAX_ATTEMPTS'] * IP_ATTEMPT_HEADROOM, ip_minutes)
+        self.register_limit = RateLimitItemPerHour(app.config['REGISTRATION_IP_LIMIT_PER_HOUR'])
+
+    def _retry_after(self, item, *identifiers):
+        if self._limiter.test(item, *identifiers):
+            return 0
+        return self._reset_in(item, *identifiers)
+
+    def _reset_in(self, item, *identifiers):
+        reset_time, _ = self._limiter.get_window_stats(item, *identifiers)
+        return max(1, int(reset_time - time.time()))
+
+    def _used(self, item, *identifiers):
+        _, remaining = self._limiter.get_window_stats(item, *identifiers)
+        return item.amount - remaining
+
+    def _ip_failures(self, ip_address):
+        return self._used(self.ip_window, 'login-ip', ip_address) - self._used(self.ip_window, 'login-ip-ok', ip_address)
+
+    def _ip_retry_after(self, ip_address, allowed):
+        if self._ip_failures(ip_address) <= allowed:
+            return 0
+        return self._reset_in(self.ip_window, 'login-ip', ip_address)
+
+    def retry_after(self, ip_address, email):
+        """Seconds until a login from ``ip_address`` for ``email`` is allowed again, 0 if allowed"""
+        return max(
+            self._ip_retry_after(ip_address, self.ip_limit.amount - 1),
+            self._retry_after(self.email_limit, 'login-email', email)
+        )
+
+    def reserve(self, ip_address, email):
+        """Count a login attempt as failed before checking its password.
+
+        Returns 0 when the attempt may go ahead, otherwise the seconds until
+        one would; refused attempts stay counted. Call ``register_success``
+        once the password matches.
+        """
+        if not self._limiter.hit(self.email_limit, 'login-email', email):
+            return self._reset_in(self.email_limit, 'login-email', email)
+        if not self._limiter.hit(self.ip_window, 'login-ip', ip_address):
+            return self._reset_in(self.ip_window, 'login-ip', ip_address)
+        return self._ip_retry_after(ip_address, self.ip_limit.amount)
+
+    def register_success(self, ip_address, email):
+        self._limiter.clear(self.email_limit, 'login-email', email)
+        self._limiter.hit(self.ip_window, 'login-ip-ok', ip_address)
+
+    def allow_registration(self, ip_address):
+        """Count a registration attempt and return False once the IP exceeds its hourly limit"""
+        return self._limiter.hit(self.register_limit, 'register-ip', ip_address)
+
+    def block_ip(self, ip_address):
+        """Fill the IP window so further logins from it are rejected until it slides"""
+        self._limiter.hit(self.ip_window, 'login-ip', ip_address, cost=self.ip_limit.amount)
+
+
+class LoginLogBuffer:
+    """Collect ``LoginLog`` rows in memory and insert them in batches"""
+
+    def __init__(self, batch_size=LOGIN_LOG_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._rows = []
+
+    def add(self, status, ip_address, user_id=None, user_agent=None, details=None, is_suspicious=False):
+        with self._lock:
+            self._rows.append({
+                'user_id': user_id,
+                'ip_address': ip_address or 'unknown',
+                'status': status,
+                'is_suspicious': is_suspicious,
+                'user_agent': user_agent,
+                'details': details,
+                'created_at': datetime.utcnow()
+            })
+            should_flush = len(self._rows) >= self.batch_size
+
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(LoginLog.__table__), rows)
+        except Exception as e:
+            logging.error(f"Error flushing login logs: {e}")
+            with self._lock:
+                self._rows[:0] = rows
+            return 0
+        return len(rows)
+
+
+login_throttle = LoginThrottle()
+login_log_buffer = LoginLogBuffer()
+
+
+def run_scheduled_flush(app):
+    """Entry point for the scheduler, which runs outside of any app context"""
+    with app.app_context():
+        login_log_buffer.flush()
@@ -0,0 +1,262 @@
+# app/services/metrics_service.py
+from bisect import bisect_left
+from datetime import datetime, timezone
+import threading
+import time
+
+from dateutil.parser import isoparse
+from eventlet import patcher
+from flask import g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WEBHOOK_LAG_BUCKETS = (0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+# The OS thread id even under eventlet, where threading.get_ident() is per green thread
+_os_thread_id = patcher.original("_thread").get_ident
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        shard = self.registry._shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def render(self, merged):
+        for labels, value in sorted(merged.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; each series is ``[count per bucket..., +Inf count, sum]``"""
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self.registry._shard()
+        key = (self.name, labels)
+        series = shard.get(key)
+        if series is None:
+            series = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @staticmethod
+    def merge(total, series):
+        if total is None:
+            return list(series)
+        return [a + b for a, b in zip(total, series)]
+
+    def render(self, merged):
+        for labels, series in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """In-process Prometheus metrics with per-OS-thread shards.
+
+    Recording touches only the calling thread's own dict, so the hot path
+    takes no lock: green threads of one OS thread never preempt each
+    other mid-update under eventlet, and real threads (tpool, scheduler)
+    each get their own shard. A scrape sums the shards. Gauges are
+    callbacks evaluated at scrape time.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._gauges = []
+        self._shards = {}
+        self._shards_lock = threading.Lock()
+        self._socket_clients = 0
+
+    def _shard(self):
+        thread_id = _os_thread_id()
+        shard = self._shards.get(thread_id)
+        if shard is None:
+            with self._shards_lock:
+                shard = self._shards.setdefault(thread_id, {})
+        return shard
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._metrics.setdefault(name, Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._metrics.setdefault(name, Histogram(self, name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, labelnames=()):
+        """Register ``callback() -> [(label values tuple, value), ...]`` evaluated on every scrape"""
+        self._gauges.append((name, documentation, tuple(labelnames), callback))
+
+    # ------- request instrumentation -------
+    def init_app(self, app):
+        @app.before_request
+        def _start_request_timer():
+            g.metrics_started_at = time.perf_counter()
+
+        @app.after_request
+        def _record_request(response):
+            started = g.pop("metrics_started_at", None)
+            if started is not None:
+                endpoint = request.endpoint or "<unmatched>"
+                blueprint = request.blueprint or "app"
+                request_duration.observe(time.perf_counter() - started, blueprint, endpoint)
+                requests_total.inc(endpoint, request.method, str(response.status_code))
+            return response
+
+    # Called from the Socket.IO connect/disconnect handlers in socket_rooms_service
+    def socket_connected(self):
+        self._socket_clients += 1
+
+    def socket_disconnected(self):
+        self._socket_clients = max(self._socket_clients - 1, 0)
+
+    # ------- exposition -------
+    def _merged(self):
+        with self._shards_lock:
+            shards = list(self._shards.values())
+        merged = {}
+        for shard in shards:
+            for (name, labels), value in list(shard.items()):
+                metric = self._metrics[name]
+                series = merged.setdefault(name, {})
+                series[labels] = metric.merge(series.get(labels), value)
+        return merged
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        merged = self._merged()
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render(merged.get(name, {})))
+        for name, documentation, labelnames, callback in self._gauges:
+            try:
+                samples = list(callback())
+            except Exception:
+                continue  # a broken source must not take the whole scrape down
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labelnames, labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    # ------- helpers for other services -------
+    def cache_lookup(self, cache, hit):
+        cache_requests.inc(cache, "hit" if hit else "miss")
+
+    def observe_webhook(self, provider, sent_at=None, started=None):
+        """Record a handled webhook.
+
+        ``sent_at`` is the provider's event timestamp (ISO string or
+        datetime; naive values are taken as UTC) and ``started`` the
+        ``perf_counter()`` reading taken when the handler began.
+        """
+        if started is not None:
+            webhook_processing.observe(time.perf_counter() - started, provider)
+        if isinstance(sent_at, str):
+            try:
+                sent_at = isoparse(sent_at)
+            except ValueError:
+                sent_at = None
+        if sent_at is not None:
+            if sent_at.tzinfo is not None:
+                sent_at = sent_at.astimezone(timezone.utc).replace(tzinfo=None)
+            lag = (datetime.utcnow() - sent_at).total_seconds()
+            webhook_lag.observe(max(lag, 0.0), provider)
+
+
+metrics = MetricsRegistry()
+
+request_duration = metrics.histogram(
+    "app_request_duration_seconds", "HTTP request latency by blueprint and endpoint",
+    ("blueprint", "endpoint"))
+requests_total = metrics.counter(
+    "app_requests_total", "HTTP requests by endpoint, method and status",
+    ("endpoint", "method", "status"))
+cache_requests = metrics.counter(
+    "app_cache_requests_total", "In-process cache lookups by cache and result",
+    ("cache", "result"))
+webhook_lag = metrics.histogram(
+    "app_webhook_lag_seconds", "Delay between a payment provider emitting a webhook and the app handling it",
+    ("provider",), WEBHOOK_LAG_BUCKETS)
+webhook_processing = metrics.histogram(
+    "app_webhook_processing_seconds", "Time spent handling payment webhooks",
+    ("provider",))
+
+
+def _pool_samples():
+    from app.extensions import db
+
+    pool = db.engine.pool
+    samples = []
+    for stat in ("size", "checkedin", "checkedout", "overflow"):
+        reader = getattr(pool, stat, None)
+        if reader is not None:
+            samples.append(((stat,), reader()))
+    return samples
+
+
+def _cache_hit_ratio():
+    totals = metrics._merged().get(cache_requests.name, {})
+    caches = {}
+    for (cache, result), count in totals.items():
+        hits, lookups = caches.get(cache, (0, 0))
+        caches[cache] = (hits + (count if result == "hit" else 0), lookups + count)
+    return [((cache,), round(hits / lookups, 4)) for cache, (hits, lookups) in sorted(caches.items()) if lookups]
+
+
+def _offload_samples():
+    from app.services.offload_service import offloader
+
+    snapshot = offloader.snapshot()
+    return [(("queue_depth",), snapshot["queue_depth"]), (("in_flight",), snapshot["in_flight"]),
+            (("max_workers",), snapshot["max_workers"])]
+
+
+metrics.gauge("app_db_pool_connections", "SQLAlchemy connection pool state", _pool_samples, ("state",))
+metrics.gauge("app_socketio_connected_clients", "Socket.IO clients connected to this process",
+              lambda: [((), metrics._socket_clients)])
+metrics.gauge("app_cache_hit_ratio", "Share of cache lookups served from memory since start", _cache_hit_ratio, ("cache",))
+metrics.gauge("app_offload_tasks", "CPU offload pool queue depth and in-flight tasks", _offload_samples, ("state",))
@@ -0,0 +1,104 @@
+# app/services/offload_service.py
+import threading
+import time
+
+from eventlet import patcher, tpool
+from werkzeug.security import check_password_hash, generate_password_hash
+
+OFFLOAD_MAX_WORKERS = 8
+
+
+class Offloader:
+    """Runs CPU-bound calls off the eventlet hub.
+
+    Under eventlet the call goes to a real OS thread through
+    ``eventlet.tpool`` while the calling green thread sleeps, so sockets and
+    other requests keep being served. Without eventlet (CLI, tests, threaded
+    servers) the call simply runs inline. A semaphore bounds how many calls
+    run at once; callers beyond that wait their turn, and the wait is
+    reported per task name together with run time and queue depth.
+    """
+
+    def __init__(self, max_workers=OFFLOAD_MAX_WORKERS):
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._stats = {}
+
+    def init_app(self, app):
+        max_workers = app.config.get("OFFLOAD_MAX_WORKERS", OFFLOAD_MAX_WORKERS)
+        if max_workers != self.max_workers:
+            self._slots = threading.BoundedSemaphore(max_workers)
+            self.max_workers = max_workers
+
+    def run(self, func, *args, name=None, **kwargs):
+        name = name or getattr(func, "__name__", "task")
+        queued_at = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+        try:
+            self._slots.acquire()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        failed = False
+        try:
+            if patcher.is_monkey_patched("thread"):
+                return tpool.execute(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            finished = time.perf_counter()
+            self._slots.release()
+            with self._lock:
+                self._running -= 1
+                self._record(name, started - queued_at, finished - started, failed)
+
+    def _record(self, name, waited, ran, failed):
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = {
+                "calls": 0, "failures": 0,
+                "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+                "run_seconds_total": 0.0, "run_seconds_max": 0.0,
+            }
+        stats["calls"] += 1
+        stats["failures"] += int(failed)
+        stats["wait_seconds_total"] += waited
+        stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+        stats["run_seconds_total"] += ran
+        stats["run_seconds_max"] = max(stats["run_seconds_max"], ran)
+
+    def snapshot(self):
+        """Queue depth, in-flight count and per-task timings"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._waiting,
+                "in_flight": self._running,
+                "offloaded_to_threads": patcher.is_monkey_patched("thread"),
+                "tasks": {
+                    name: {key: round(value, 4) if isinstance(value, float) else value for key, value in stats.items()}
+                    for name, stats in self._stats.items()
+                },
+            }
+
+
+offloader = Offloader()
+
+
+def hash_password(password):
+    """PBKDF2 hash of a password, computed off the hub"""
+    return offloader.run(generate_password_hash, password, name="password_hash")
+
+
+def verify_password(password_hash, password):
+    return offloader.run(check_password_hash, password_hash, password, name="password_check")
@@ -0,0 +1,56 @@
+# app/services/plan_catalog_service.py
+import copy
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models.subscription import Subscription
+from app.models.subscription_plans import SubscriptionPlan
+from app.services.cache_service import cached
+
+CATALOG_TTL_SECONDS = 300
+
+
+@cached(tags=(SubscriptionPlan, Subscription), ttl=CATALOG_TTL_SECONDS, name="plan_catalog")
+def _catalog():
+    """Serialized plans, with their active subscription counts from one grouped query"""
+    counts = dict(db.session.execute(
+        select(Subscription.plan_id, func.count(Subscription.id))
+        .where(Subscription.status == 'active')
+        .group_by(Subscription.plan_id)
+    ).all())
+
+    plans = SubscriptionPlan.query.order_by(
+        SubscriptionPlan.sort_order,
+        SubscriptionPlan.name
+    ).all()
+    return [plan.to_dict(active_subscriptions=counts.get(plan.id, 0)) for plan in plans]
+
+
+class PlanCatalog:
+    """Catalog of serialized subscription plans.
+
+    The catalog is built with one query for the plans and one grouped
+    ``COUNT`` of active subscriptions for all of them, instead of a
+    ``COUNT`` per plan in ``SubscriptionPlan.to_dict()``. It lives in the
+    application cache tagged with both tables, so committing a change to
+    a plan or a subscription rebuilds it on the next read. Callers get
+    their own copies and may modify them.
+    """
+
+    def all_plans(self):
+        """Every plan ordered by ``sort_order`` then name, as the admin lists them"""
+        return copy.deepcopy(_catalog())
+
+    def active_plans(self):
+        """Active plans ordered by ``sort_order`` then price, as athletes see them"""
+        plans = [copy.deepcopy(plan) for plan in _catalog() if plan['is_active']]
+        plans.sort(key=lambda plan: (plan['sort_order'] or 0, plan['price']))
+        return plans
+
+    def next_sort_order(self):
+        """Sort order for a newly created plan"""
+        return max((plan['sort_order'] or 0 for plan in _catalog()), default=0) + 1
+
+
+plan_catalog = PlanCatalog()
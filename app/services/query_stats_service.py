@@ -0,0 +1,262 @@
+# app/services/query_stats_service.py
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+TOP_STATEMENTS = 5
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER = r"(?:%\(\w+\)s|\?|:\w+|%s|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement):
+    """``(digest, normalized SQL)`` that is the same for every execution of one query shape.
+
+    Expanded ``IN`` lists, bound parameters and inline literals collapse to
+    ``?`` so the same lookup issued once per row shows up as one fingerprint.
+    """
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _PLACEHOLDER_LIST.sub("(?)", normalized)
+    normalized = _LITERAL.sub("?", normalized)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12], normalized
+
+
+class QueryStats:
+    """Counts and times of the SQL one unit of work (a request, a capture block) issued"""
+
+    __slots__ = ("count", "seconds", "fingerprints", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+        self.statements = {}
+
+    def add(self, statement, elapsed):
+        digest, normalized = fingerprint(statement)
+        self.count += 1
+        self.seconds += elapsed
+        self.fingerprints[digest] += 1
+        self.statements.setdefault(digest, normalized)
+
+    @property
+    def duplicates(self):
+        """Executions beyond the first of every repeated query shape"""
+        return sum(count - 1 for count in self.fingerprints.values() if count > 1)
+
+    def repeated(self, limit=TOP_STATEMENTS):
+        return [
+            {"fingerprint": digest, "count": count, "sql": self.statements[digest]}
+            for digest, count in self.fingerprints.most_common(limit)
+            if count > 1
+        ]
+
+    def to_dict(self):
+        return {
+            "queries": self.count,
+            "db_ms": round(self.seconds * 1000, 2),
+            "duplicates": self.duplicates,
+            "repeated": self.repeated(),
+        }
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by ``assert_query_budget`` when an endpoint issues more queries than allowed"""
+
+
+class QueryRecorder:
+    """Per-request SQL instrumentation on SQLAlchemy cursor events.
+
+    Every statement is timed between ``before_cursor_execute`` and
+    ``after_cursor_execute`` and added to the current request's
+    ``QueryStats`` (and to any active ``capture()`` block). After the
+    request the totals are folded into a per-endpoint report, compared with
+    the view's declared ``query_budget``, and sent back as ``X-DB-*``
+    headers when ``SQL_STATS_HEADERS`` is on (the default in debug).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._local = threading.local()
+        self._listening = False
+        self.enabled = False
+
+    def init_app(self, app):
+        self.enabled = app.config.get("SQL_STATS_ENABLED", True)
+        if not self.enabled:
+            return
+        self._install_listeners()
+        send_headers = app.config.get("SQL_STATS_HEADERS")
+        if send_headers is None:
+            send_headers = app.debug
+
+        @app.before_request
+        def _start_query_stats():
+            g.query_stats = QueryStats()
+
+        @app.after_request
+        def _finish_query_stats(response):
+            stats = g.pop("query_stats", None)
+            if stats is None:
+                return response
+            budget = self.budget_for(app, request.endpoint)
+            self._record_endpoint(request.endpoint or "<unmatched>", stats, budget)
+            if budget is not None and stats.count > budget:
+                logging.warning(
+                    f"{request.endpoint} ran {stats.count} queries (budget {budget}); "
+                    f"most repeated: {stats.repeated(1)}"
+                )
+            if send_headers:
+                response.headers["X-DB-Query-Count"] = str(stats.count)
+                response.headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+                response.headers["X-DB-Duplicate-Queries"] = str(stats.duplicates)
+            return response
+
+    # ------- cursor events -------
+    def _install_listeners(self):
+        if self._listening:
+            return
+        event.listen(Engine, "before_cursor_execute", self._before_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_execute)
+        self._listening = True
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("query_started_at")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if has_request_context():
+            stats = g.get("query_stats")
+            if stats is not None:
+                stats.add(statement, elapsed)
+        for captured in getattr(self._local, "captures", ()):
+            captured.add(statement, elapsed)
+
+    # ------- reporting -------
+    def current(self):
+        """Stats of the request being served, or None outside of one"""
+        return g.get("query_stats") if has_request_context() else None
+
+    @staticmethod
+    def budget_for(app, endpoint):
+        view = app.view_functions.get(endpoint) if endpoint else None
+        return getattr(view, "query_budget", None)
+
+    def _record_endpoint(self, endpoint, stats, budget):
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            if entry is None:
+                entry = self._endpoints[endpoint] = {
+                    "requests": 0, "queries_total": 0, "queries_max": 0,
+                    "db_seconds_total": 0.0, "db_seconds_max": 0.0,
+                    "duplicates_total": 0, "over_budget": 0, "budget": budget,
+                    "repeated": Counter(), "statements": {},
+                }
+            entry["requests"] += 1
+            entry["queries_total"] += stats.count
+            entry["queries_max"] = max(entry["queries_max"], stats.count)
+            entry["db_seconds_total"] += stats.seconds
+            entry["db_seconds_max"] = max(entry["db_seconds_max"], stats.seconds)
+            entry["duplicates_total"] += stats.duplicates
+            if budget is not None and stats.count > budget:
+                entry["over_budget"] += 1
+            for digest, count in stats.fingerprints.items():
+                if count > 1:
+                    entry["repeated"][digest] += count - 1
+                    entry["statements"].setdefault(digest, stats.statements[digest])
+
+    def report(self, sort="queries_avg"):
+        """Per-endpoint query counts, DB time and the statements most often repeated within a request"""
+        with self._lock:
+            rows = []
+            for endpoint, entry in self._endpoints.items():
+                requests = entry["requests"] or 1
+                rows.append({
+                    "endpoint": endpoint,
+                    "requests": entry["requests"],
+                    "queries_avg": round(entry["queries_total"] / requests, 2),
+                    "queries_max": entry["queries_max"],
+                    "db_ms_avg": round(entry["db_seconds_total"] / requests * 1000, 2),
+                    "db_ms_max": round(entry["db_seconds_max"] * 1000, 2),
+                    "duplicates_avg": round(entry["duplicates_total"] / requests, 2),
+                    "budget": entry["budget"],
+                    "over_budget": entry["over_budget"],
+                    "repeated": [
+                        {"fingerprint": digest, "extra_executions": count, "sql": entry["statements"][digest]}
+                        for digest, count in entry["repeated"].most_common(TOP_STATEMENTS)
+                    ],
+                })
+        rows.sort(key=lambda row: row.get(sort) or 0, reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    # ------- tests and benchmarks -------
+    @contextmanager
+    def capture(self):
+        """Collect every statement this thread runs inside the block, requests included"""
+        self._install_listeners()
+        stats = QueryStats()
+        captures = getattr(self._local, "captures", None)
+        if captures is None:
+            captures = self._local.captures = []
+        captures.append(stats)
+        try:
+            yield stats
+        finally:
+            captures.remove(stats)
+
+
+query_stats = QueryRecorder()
+
+
+def query_budget(limit):
+    """Declare how many queries a view may run; exceeding it is logged and reported"""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def assert_query_budget(client, path, method="GET", budget=None, **kwargs):
+    """Issue a request through a Flask test client and fail if it runs more queries than allowed.
+
+    ``budget`` defaults to the one the matched view declared with
+    ``@query_budget``. Returns the response so callers can check it too.
+    """
+    app = client.application
+    if budget is None:
+        adapter = app.url_map.bind("localhost")
+        endpoint, _ = adapter.match(path.split("?", 1)[0], method=method)
+        budget = QueryRecorder.budget_for(app, endpoint)
+        if budget is None:
+            raise ValueError(f"{endpoint} declares no query budget")
+
+    with query_stats.capture() as stats:
+        response = client.open(path, method=method, **kwargs)
+
+    if stats.count > budget:
+        repeated = "\n".join(f"  {item['count']}x {item['sql']}" for item in stats.repeated())
+        raise QueryBudgetExceeded(
+            f"{method} {path} ran {stats.count} queries, budget is {budget}"
+            + (f"\nRepeated statements:\n{repeated}" if repeated else "")
+        )
+    return response
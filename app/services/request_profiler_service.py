@@ -0,0 +1,285 @@
+# app/services/request_profiler_service.py
+from collections import deque
+import cProfile
+from datetime import datetime
+import io
+import itertools
+import json
+import logging
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+
+from flask import g, request
+
+from app.services.query_stats_service import query_stats
+
+SLOW_REQUEST_MS = 1000
+MAX_PROFILES = 20
+TOP_FRAMES = 10
+SPEEDSCOPE_MAX_DEPTH = 64
+SPEEDSCOPE_MIN_SECONDS = 0.0001
+
+
+def _frame_label(func):
+    filename, line, name = func
+    return f"{os.path.relpath(filename) if filename.startswith(os.sep) else filename}:{line}({name})"
+
+
+def top_frames(stats, limit=TOP_FRAMES):
+    """The functions with the highest cumulative time in a ``{func: (cc, nc, tt, ct, callers)}`` table"""
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {"frame": _frame_label(func), "calls": nc, "own_ms": round(tt * 1000, 2), "cumulative_ms": round(ct * 1000, 2)}
+        for func, (cc, nc, tt, ct, callers) in ranked[:limit]
+    ]
+
+
+def to_speedscope(stats, name):
+    """Speedscope "sampled" profile rebuilt from a cProfile table.
+
+    cProfile only records caller/callee edges, so stacks are reconstructed
+    by walking down from the root functions and splitting each function's
+    time across its callees in proportion to the edge times (the same
+    approximation flame graph tools use for cProfile data). Recursion is
+    cut at the first repeat and tiny branches are dropped.
+    """
+    callees = {}
+    for func, (cc, nc, tt, ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    frames, frame_index = [], {}
+    samples, weights = [], []
+
+    def index_of(func):
+        if func not in frame_index:
+            filename, line, function = func
+            frame_index[func] = len(frames)
+            frames.append({"name": function, "file": filename, "line": line})
+        return frame_index[func]
+
+    def walk(func, weight, stack, on_stack):
+        cc, nc, tt, ct, callers = stats[func]
+        stack = stack + [index_of(func)]
+        if ct <= 0:
+            return
+        own = weight * min(tt / ct, 1.0)
+        if own >= SPEEDSCOPE_MIN_SECONDS:
+            samples.append(stack)
+            weights.append(own)
+        if len(stack) >= SPEEDSCOPE_MAX_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            share = weight * edge_ct / ct
+            if callee in on_stack or callee not in stats or share < SPEEDSCOPE_MIN_SECONDS:
+                continue
+            walk(callee, share, stack, on_stack | {callee})
+
+    roots = [func for func, entry in stats.items() if not entry[4] or set(entry[4]) == {func}]
+    for root in roots:
+        walk(root, stats[root][3], [], {root})
+
+    total = sum(weights)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "sport-app request profiler",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": total,
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+class RequestProfiler:
+    """Slow-request log and opt-in cProfile sampling of live requests.
+
+    Every request slower than ``slow_ms`` is logged with its endpoint, its
+    SQL breakdown from the query recorder and, when it was profiled, its
+    top frames. A request is profiled when it wins the ``sample_rate``
+    draw or hits one of the ``endpoints`` singled out for investigation;
+    the most recent profiles are kept in memory for download. All settings
+    can be changed at runtime through ``update()`` (the admin API) and
+    apply to this process only.
+
+    Under eventlet all green threads share one OS thread, so a profile can
+    include frames of other requests that ran while this one waited on I/O.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles = deque(maxlen=MAX_PROFILES)
+        self._ids = itertools.count(1)
+        self.slow_log_enabled = True
+        self.slow_ms = SLOW_REQUEST_MS
+        self.sample_rate = 0.0
+        self.endpoints = set()
+
+    def init_app(self, app):
+        self.slow_log_enabled = app.config.get("PROFILING_SLOW_LOG_ENABLED", True)
+        self.slow_ms = app.config.get("PROFILING_SLOW_REQUEST_MS", SLOW_REQUEST_MS)
+        self.sample_rate = app.config.get("PROFILING_SAMPLE_RATE", 0.0)
+        self.endpoints = set(app.config.get("PROFILING_ENDPOINTS", ()))
+        self._profiles = deque(maxlen=app.config.get("PROFILING_MAX_PROFILES", MAX_PROFILES))
+
+        @app.before_request
+        def _start_request_profile():
+            g.request_started_at = time.perf_counter()
+            if not self._should_profile(request.endpoint):
+                return
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # another profiler is already active on this thread
+                return
+            g.request_profiler = profiler
+
+        @app.after_request
+        def _finish_request_profile(response):
+            started = g.pop("request_started_at", None)
+            profiler = g.pop("request_profiler", None)
+            if profiler is not None:
+                profiler.disable()
+            if started is None:
+                return response
+
+            duration_ms = (time.perf_counter() - started) * 1000
+            stats = None
+            if profiler is not None:
+                profiler.create_stats()
+                stats = profiler.stats
+                self._store(stats, duration_ms, response.status_code)
+            if self.slow_log_enabled and duration_ms >= self.slow_ms:
+                self._log_slow(duration_ms, response.status_code, stats)
+            return response
+
+    def _should_profile(self, endpoint):
+        if endpoint in self.endpoints:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _request_summary(self, duration_ms, status):
+        sql = query_stats.current()
+        return {
+            "endpoint": request.endpoint,
+            "method": request.method,
+            "path": request.path,
+            "status": status,
+            "duration_ms": round(duration_ms, 2),
+            "sql": sql.to_dict() if sql is not None else None,
+        }
+
+    def _log_slow(self, duration_ms, status, stats):
+        summary = self._request_summary(duration_ms, status)
+        sql = summary["sql"]
+        if sql:
+            sql_part = (f"{sql['queries']} queries, {sql['db_ms']} ms in SQL "
+                        f"({sql['db_ms'] / duration_ms:.0%}), {sql['duplicates']} repeated")
+        else:
+            sql_part = "SQL not recorded"
+        lines = [f"Slow request: {summary['method']} {summary['path']} ({summary['endpoint']}) "
+                 f"-> {status} in {duration_ms:.0f} ms; {sql_part}"]
+        for item in (sql or {}).get("repeated", []):
+            lines.append(f"  sql {item['count']}x {item['sql'][:200]}")
+        if stats is not None:
+            for frame in top_frames(stats):
+                lines.append(f"  {frame['cumulative_ms']:>9.1f} ms  {frame['calls']:>6}x  {frame['frame']}")
+        else:
+            lines.append("  (not profiled; add the endpoint to the profiling endpoints for frames)")
+        logging.warning("\n".join(lines))
+
+    def _store(self, stats, duration_ms, status):
+        entry = self._request_summary(duration_ms, status)
+        entry["created_at"] = datetime.utcnow().isoformat()
+        entry["top_frames"] = top_frames(stats)
+        entry["_stats"] = marshal.dumps(stats)
+        with self._lock:
+            entry["id"] = next(self._ids)
+            self._profiles.append(entry)
+
+    # ------- runtime control -------
+    def settings(self):
+        return {
+            "slow_log_enabled": self.slow_log_enabled,
+            "slow_ms": self.slow_ms,
+            "sample_rate": self.sample_rate,
+            "endpoints": sorted(self.endpoints),
+            "max_profiles": self._profiles.maxlen,
+        }
+
+    def update(self, data):
+        """Apply a partial settings dict; raises ValueError on bad values"""
+        if "slow_log_enabled" in data:
+            self.slow_log_enabled = bool(data["slow_log_enabled"])
+        if "slow_ms" in data:
+            slow_ms = float(data["slow_ms"])
+            if slow_ms < 0:
+                raise ValueError("slow_ms must not be negative")
+            self.slow_ms = slow_ms
+        if "sample_rate" in data:
+            sample_rate = float(data["sample_rate"])
+            if not 0 <= sample_rate <= 1:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = sample_rate
+        if "endpoints" in data:
+            endpoints = data["endpoints"] or []
+            if not isinstance(endpoints, list):
+                raise ValueError("endpoints must be a list of endpoint names")
+            self.endpoints = {str(endpoint) for endpoint in endpoints}
+        return self.settings()
+
+    def profiles(self):
+        with self._lock:
+            return [
+                {key: value for key, value in entry.items() if not key.startswith("_")}
+                for entry in reversed(self._profiles)
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+    def export(self, profile_id, fmt="pstats"):
+        """``(bytes, filename, mimetype)`` of a stored profile, or None if it has rotated out"""
+        with self._lock:
+            entry = next((item for item in self._profiles if item["id"] == profile_id), None)
+        if entry is None:
+            return None
+
+        base = f"profile-{profile_id}-{(entry['endpoint'] or 'request').replace('.', '_')}"
+        if fmt == "pstats":
+            # Same layout as cProfile.Profile.dump_stats(), loadable with pstats.Stats(path)
+            return entry["_stats"], f"{base}.prof", "application/octet-stream"
+        if fmt == "speedscope":
+            document = to_speedscope(marshal.loads(entry["_stats"]), f"{entry['method']} {entry['path']}")
+            return json.dumps(document).encode("utf-8"), f"{base}.speedscope.json", "application/json"
+        if fmt == "text":
+            buffer = io.StringIO()
+            stats = pstats.Stats(_StatsSource(marshal.loads(entry["_stats"])), stream=buffer)
+            stats.sort_stats("cumulative").print_stats(40)
+            return buffer.getvalue().encode("utf-8"), f"{base}.txt", "text/plain"
+        raise ValueError(f"Unknown profile format: {fmt}")
+
+
+class _StatsSource:
+    """Minimal profiler stand-in so pstats.Stats can load a stored table"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,305 @@
+# app/services/scheduling_service.py
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import threading
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import AddConstraint
+
+from app.extensions import db
+from app.models.equipment_reservations import EquipmentReservation
+from app.models.equipments import Equipment
+from app.models.session_schedules import BOOKED_STATUSES, SessionSchedule, session_period
+
+MAX_SESSION_MINUTES = 8 * 60
+MAX_RESERVATION = timedelta(hours=24)
+DEFAULT_SLOT_MINUTES = 60
+UNRESERVABLE_EQUIPMENT = ("maintenance", "out_of_order")
+EXCLUSION_VIOLATION = "23P01"  # PostgreSQL SQLSTATE for exclusion constraints
+
+
+class SchedulingError(ValueError):
+    """Raised when a booking or reservation request is invalid"""
+
+
+class SchedulingConflict(SchedulingError):
+    """Raised when the requested time overlaps bookings that already hold it"""
+
+    def __init__(self, message, conflicts=()):
+        super().__init__(message)
+        self.conflicts = [
+            {"id": key, "start": start.isoformat(), "end": end.isoformat()}
+            for start, end, key in conflicts
+        ]
+
+
+def peak_overlap(intervals, start, end):
+    """Largest number of ``intervals`` in use at the same instant within ``[start, end)``"""
+    points = []
+    for begin, finish, _ in intervals:
+        begin, finish = max(begin, start), min(finish, end)
+        if begin < finish:
+            points.append((begin, 1))
+            points.append((finish, -1))
+    points.sort()  # at equal instants ends (-1) sort before starts
+    level = peak = 0
+    for _, delta in points:
+        level += delta
+        peak = max(peak, level)
+    return peak
+
+
+def free_slots(busy, start, end, min_minutes=DEFAULT_SLOT_MINUTES, capacity=1):
+    """Gaps in ``[start, end)`` at least ``min_minutes`` long where fewer than ``capacity`` intervals are busy"""
+    points = []
+    for begin, finish, _ in busy:
+        begin, finish = max(begin, start), min(finish, end)
+        if begin < finish:
+            points.append((begin, 1))
+            points.append((finish, -1))
+    points.sort()
+
+    spans, level, free_from = [], 0, start
+    for instant, delta in points:
+        before, level = level, level + delta
+        if before < capacity <= level:
+            if instant > free_from:
+                spans.append((free_from, instant))
+            free_from = None
+        elif level < capacity <= before:
+            free_from = instant
+    if free_from is not None and end > free_from:
+        spans.append((free_from, end))
+
+    minimum = timedelta(minutes=min_minutes)
+    return [
+        {"start": begin.isoformat(), "end": finish.isoformat(), "minutes": int((finish - begin).total_seconds() // 60)}
+        for begin, finish in spans
+        if finish - begin >= minimum
+    ]
+
+
+# ------- database access -------
+def _has_range_index():
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+_guard_locks = defaultdict(threading.Lock)
+_guard_locks_lock = threading.Lock()
+
+
+@contextmanager
+def _guard(resource):
+    """Serialize check-then-write for one resource within this process.
+
+    PostgreSQL enforces the same rule across processes (exclusion constraint
+    for sessions, a row lock for equipment); this keeps SQLite honest too.
+    """
+    with _guard_locks_lock:
+        lock = _guard_locks[resource]
+    with lock:
+        yield
+
+
+def _commit(message):
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION:
+            raise SchedulingConflict(message) from e
+        raise
+
+
+def coach_busy(coach_id, start, end, exclude_id=None):
+    """Booked sessions of a coach overlapping ``[start, end)`` as ``(start, end, id)``"""
+    criteria = [SessionSchedule.coach_id == coach_id, SessionSchedule.status.in_(BOOKED_STATUSES)]
+    if exclude_id is not None:
+        criteria.append(SessionSchedule.id != exclude_id)
+
+    if _has_range_index():
+        # Same expression as the exclusion constraint, so the GiST index answers it
+        criteria.append(
+            session_period(SessionSchedule.scheduled_at, SessionSchedule.duration)
+            .op("&&")(func.tsrange(start, end, "[)"))
+        )
+    else:
+        criteria += [
+            SessionSchedule.scheduled_at < end,
+            SessionSchedule.scheduled_at >= start - timedelta(minutes=MAX_SESSION_MINUTES),
+        ]
+
+    rows = db.session.execute(
+        select(SessionSchedule.id, SessionSchedule.scheduled_at, SessionSchedule.duration)
+        .where(*criteria)
+        .order_by(SessionSchedule.scheduled_at)
+    ).all()
+    intervals = [
+        (row.scheduled_at, row.scheduled_at + timedelta(minutes=row.duration or 0), row.id)
+        for row in rows
+    ]
+    # Without the range index the window above is a superset; trim it to real overlaps
+    return [interval for interval in intervals if interval[1] > start]
+
+
+def equipment_busy(equipment_id, start, end, exclude_id=None):
+    """Active reservations of a piece of equipment overlapping ``[start, end)``"""
+    criteria = [EquipmentReservation.equipment_id == equipment_id, EquipmentReservation.status == "active"]
+    if exclude_id is not None:
+        criteria.append(EquipmentReservation.id != exclude_id)
+
+    if _has_range_index():
+        criteria.append(
+            func.tsrange(EquipmentReservation.start_time, EquipmentReservation.end_time, "[)")
+            .op("&&")(func.tsrange(start, end, "[)"))
+        )
+    else:
+        criteria += [EquipmentReservation.start_time < end, EquipmentReservation.end_time > start]
+
+    rows = db.session.execute(
+        select(EquipmentReservation.id, EquipmentReservation.start_time, EquipmentReservation.end_time)
+        .where(*criteria)
+        .order_by(EquipmentReservation.start_time)
+    ).all()
+    return [(row.start_time, row.end_time, row.id) for row in rows]
+
+
+# ------- sessions -------
+def validate_duration(duration):
+    try:
+        duration = int(duration)
+    except (TypeError, ValueError):
+        raise SchedulingError("Duration must be a number of minutes")
+    if not 0 < duration <= MAX_SESSION_MINUTES:
+        raise SchedulingError(f"Duration must be between 1 and {MAX_SESSION_MINUTES} minutes")
+    return duration
+
+
+def book_session(session):
+    """Commit a new or edited session; booked ones must not overlap the coach's booked time"""
+    session.duration = validate_duration(session.duration)
+    if session.status is None:
+        session.status = "scheduled"
+    with _guard(("coach", session.coach_id)):
+        if session.status in BOOKED_STATUSES:
+            with db.session.no_autoflush:
+                conflicts = coach_busy(session.coach_id, session.scheduled_at, session.end_time, exclude_id=session.id)
+            if conflicts:
+                db.session.rollback()
+                raise SchedulingConflict("This time slot is already booked with this coach.", conflicts)
+        db.session.add(session)
+        _commit("This time slot was just booked with this coach.")
+    return session
+
+
+def confirm_session(session, status="scheduled"):
+    """Move a pending request to a booked status, unless its time is already taken"""
+    session.duration = validate_duration(session.duration)
+    start, end = session.scheduled_at, session.end_time
+    with _guard(("coach", session.coach_id)):
+        with db.session.no_autoflush:
+            conflicts = coach_busy(session.coach_id, start, end, exclude_id=session.id)
+        if conflicts:
+            raise SchedulingConflict("Time slot conflicts with another approved session", conflicts)
+        session.status = status
+        _commit("Time slot conflicts with another approved session")
+    return session
+
+
+def coach_free_slots(coach_id, start, end, min_minutes=DEFAULT_SLOT_MINUTES):
+    if start >= end:
+        return []  # e.g. a window that is already over; an inverted tsrange is an error
+    return free_slots(coach_busy(coach_id, start, end), start, end, min_minutes)
+
+
+# ------- equipment -------
+def reserve_equipment(equipment_id, user_id, start, end):
+    """Reserve equipment for ``[start, end)`` while fewer than ``max_users`` reservations overlap it.
+
+    The equipment row is locked ``FOR UPDATE`` so concurrent reservations of
+    the same equipment are checked one after the other.
+    """
+    if end <= start:
+        raise SchedulingError("end_time must be after start_time")
+    if end - start > MAX_RESERVATION:
+        raise SchedulingError("Reservations cannot exceed 24 hours")
+
+    with _guard(("equipment", equipment_id)):
+        equipment = db.session.execute(
+            select(Equipment).where(Equipment.id == equipment_id).with_for_update()
+        ).scalar_one_or_none()
+        if equipment is None:
+            db.session.rollback()
+            raise SchedulingError("Equipment not found")
+        if equipment.status in UNRESERVABLE_EQUIPMENT:
+            db.session.rollback()
+            raise SchedulingError(f"Equipment is {equipment.status.replace('_', ' ')}")
+
+        busy = equipment_busy(equipment_id, start, end)
+        if peak_overlap(busy, start, end) >= (equipment.max_users or 1):
+            db.session.rollback()
+            raise SchedulingConflict("Equipment is fully reserved for this time", busy)
+
+        reservation = EquipmentReservation(
+            equipment_id=equipment_id,
+            user_id=user_id,
+            start_time=start,
+            end_time=end,
+            status="active"
+        )
+        db.session.add(reservation)
+        _commit("Equipment is fully reserved for this time")
+    return reservation
+
+
+def equipment_free_slots(equipment, start, end, min_minutes=DEFAULT_SLOT_MINUTES):
+    if equipment.status in UNRESERVABLE_EQUIPMENT or start >= end:
+        return []
+    busy = equipment_busy(equipment.id, start, end)
+    return free_slots(busy, start, end, min_minutes, capacity=equipment.max_users or 1)
+
+
+# ------- schema -------
+def install_range_constraints():
+    """Add the GiST exclusion constraint and range indexes to an existing PostgreSQL database.
+
+    ``create_all`` adds them to new databases; existing ones need this once.
+    Returns the names of the objects created.
+    """
+    if db.engine.dialect.name != "postgresql":
+        return []
+
+    created = []
+    with db.engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        inspector = inspect(conn)
+        for table in (SessionSchedule.__table__, EquipmentReservation.__table__):
+            for constraint in table.constraints:
+                if not isinstance(constraint, ExcludeConstraint):
+                    continue
+                exists = conn.execute(
+                    text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": constraint.name}
+                ).first()
+                if not exists:
+                    conn.execute(AddConstraint(constraint))
+                    created.append(constraint.name)
+
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+                    created.append(index.name)
+    return created
+
+
+def parse_slot_minutes(value):
+    """Clamp a requested slot length to what a session can last"""
+    return min(max(value or DEFAULT_SLOT_MINUTES, 5), MAX_SESSION_MINUTES)
+
+
+def upcoming(start):
+    """Free time in the past is of no use to anyone"""
+    return max(start, datetime.now().replace(second=0, microsecond=0))
@@ -0,0 +1,46 @@
+# app/services/socket_rooms_service.py
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from flask_socketio import join_room
+
+from app.extensions import socketio
+from app.services.metrics_service import metrics
+
+ADMIN_ROOM = "admins"
+
+
+def user_room(user_id):
+    """Room holding every open socket of one user"""
+    return f"user_{user_id}"
+
+
+class SocketRooms:
+    """Puts each Socket.IO connection in rooms derived from its JWT cookie.
+
+    Authenticated sockets join ``user_<id>`` and, for admins, ``admins``,
+    so server-side emits can target a user or the admin team instead of
+    broadcasting to every connected client. Also keeps the connected
+    client gauge up to date (one connect handler per namespace).
+    """
+
+    def init_app(self, app):
+        socketio.on_event("connect", self._connected)
+        socketio.on_event("disconnect", self._disconnected)
+
+    def _connected(self, *args):
+        metrics.socket_connected()
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            return
+        if identity is None:
+            return
+        join_room(user_room(identity))
+        if get_jwt().get("role") == "admin":
+            join_room(ADMIN_ROOM)
+
+    def _disconnected(self, *args):
+        metrics.socket_disconnected()
+
+
+socket_rooms = SocketRooms()
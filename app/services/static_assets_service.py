@@ -0,0 +1,239 @@
+# app/services/static_assets_service.py
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+from flask import request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # gzip variants are still written without it
+    brotli = None
+
+MANIFEST_NAME = "manifest.json"
+ASSET_MAX_AGE = 365 * 24 * 3600
+HASH_LENGTH = 12
+
+# Never collected: user uploads are written at runtime, maps and sources are development-only
+EXCLUDED_FOLDERS = ("uploads",)
+EXCLUDED_SUFFIXES = (".map", ".ts", ".scss")
+COMPRESSIBLE_SUFFIXES = (
+    ".css", ".js", ".mjs", ".cjs", ".json", ".svg", ".html", ".txt", ".xml",
+    ".ttf", ".otf", ".eot", ".ico",
+)
+MIN_COMPRESS_BYTES = 512
+# (suffix, Content-Encoding) in order of preference
+ENCODINGS = ((".br", "br"), (".gz", "gzip"))
+
+# Only whole-line comments; bundles also build such strings at runtime
+SOURCE_MAP_COMMENT = re.compile(rb"(?m)^[ \t]*(?://[#@] sourceMappingURL=[^\r\n]*|/\*[#@] sourceMappingURL=[^*\r\n]*\*/)[ \t]*\r?$")
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+class StaticBuildError(RuntimeError):
+    """Raised when the static folder cannot be collected"""
+
+
+def hashed_name(path, data):
+    """``css/app.css`` -> ``css/app.<sha256 prefix>.css``"""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    stem, ext = posixpath.splitext(path)
+    return f"{stem}.{digest}{ext}"
+
+
+def _collectable(source_dir):
+    for root, dirs, files in os.walk(source_dir):
+        relative_root = os.path.relpath(root, source_dir)
+        if relative_root == ".":
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_FOLDERS]
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for filename in sorted(files):
+            if filename.startswith(".") or filename.endswith(EXCLUDED_SUFFIXES):
+                continue
+            path = os.path.join(root, filename)
+            yield os.path.relpath(path, source_dir).replace(os.sep, "/"), path
+
+
+def _rewrite_css_urls(path, text, hashed):
+    """Point ``url(...)`` references at the hashed copies collected so far"""
+    base = posixpath.dirname(path)
+
+    def replace(match):
+        quote, target = match.group(1), match.group(2).strip()
+        if target.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return match.group(0)
+        split = len(target)
+        for marker in ("?", "#"):
+            index = target.find(marker)
+            if index != -1:
+                split = min(split, index)
+        referenced = posixpath.normpath(posixpath.join(base, target[:split]))
+        if referenced not in hashed:
+            return match.group(0)
+        rewritten = posixpath.relpath(hashed[referenced], base or ".") + target[split:]
+        return f"url({quote}{rewritten}{quote})"
+
+    return CSS_URL.sub(replace, text)
+
+
+def _compress(data):
+    """(suffix, bytes) for every encoding that is worth serving"""
+    variants = []
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    variants.append((".gz", gzip.compress(data, compresslevel=9, mtime=0)))
+    return [(suffix, body) for suffix, body in variants if len(body) < len(data) * 0.95]
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as handle:
+        handle.write(data)
+
+
+def collect_static(source_dir, output_dir, compress=True):
+    """Copy the static folder into ``output_dir`` for production serving.
+
+    Every file is written under its own name and under a content-hashed
+    name; templates link to the hashed one through ``url_for`` so it can
+    be cached for a year, while the plain copy keeps relative references
+    inside vendor bundles (TinyMCE plugins, Chart.js chunks, CSS fonts)
+    working. CSS ``url()`` references are rewritten to hashed names,
+    source maps and ``.ts``/``.scss`` sources are dropped, and text assets
+    get ``.br``/``.gz`` siblings. The build is written next to
+    ``output_dir`` and swapped in when complete.
+    """
+    source_dir = os.path.abspath(source_dir)
+    output_dir = os.path.abspath(output_dir)
+    if not os.path.isdir(source_dir):
+        raise StaticBuildError(f"{source_dir} is not a directory")
+    if output_dir == source_dir or output_dir.startswith(source_dir + os.sep):
+        raise StaticBuildError("The output folder must be outside the static folder")
+
+    build_dir = output_dir + ".tmp"
+    shutil.rmtree(build_dir, ignore_errors=True)
+
+    hashed = {}
+    encoded = {}
+    stats = {"files": 0, "bytes": 0, "compressed_files": 0, "compressed_bytes": 0}
+
+    # Stylesheets last, so the fonts and images they reference already have hashed names
+    collectable = sorted(_collectable(source_dir), key=lambda item: item[0].endswith(".css"))
+    for logical, path in collectable:
+        with open(path, "rb") as handle:
+            data = handle.read()
+        if logical.endswith((".js", ".mjs", ".cjs", ".css")):
+            data = SOURCE_MAP_COMMENT.sub(b"", data)
+        if logical.endswith(".css"):
+            try:
+                data = _rewrite_css_urls(logical, data.decode("utf-8"), hashed).encode("utf-8")
+            except UnicodeDecodeError:
+                pass
+
+        fingerprinted = hashed_name(logical, data)
+        hashed[logical] = fingerprinted
+        variants = []
+        if compress and logical.endswith(COMPRESSIBLE_SUFFIXES) and len(data) >= MIN_COMPRESS_BYTES:
+            variants = _compress(data)
+
+        for name in (logical, fingerprinted):
+            target = os.path.join(build_dir, *name.split("/"))
+            _write(target, data)
+            for suffix, body in variants:
+                _write(target + suffix, body)
+            if variants:
+                encoded[name] = [suffix for suffix, _ in variants]
+
+        stats["files"] += 1
+        stats["bytes"] += len(data)
+        if variants:
+            stats["compressed_files"] += 1
+            stats["compressed_bytes"] += min(len(body) for _, body in variants)
+
+    manifest = {"version": 1, "files": hashed, "encoded": encoded}
+    _write(os.path.join(build_dir, MANIFEST_NAME), json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8"))
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(build_dir, output_dir)
+    stats["brotli"] = brotli is not None
+    stats["output"] = output_dir
+    return stats
+
+
+class StaticAssets:
+    """Serves the collected static build instead of ``app/static``.
+
+    With ``STATIC_BUILD_ENABLED`` and a manifest from ``flask collect-static``
+    present, ``url_for('static', ...)`` resolves to the hashed file names
+    and the ``static`` endpoint serves the precompressed ``.br``/``.gz``
+    variant the client accepts. Hashed files are cached immutably for a
+    year; plain names and files missing from the build (uploads) fall back
+    to Flask's normal static handling.
+    """
+
+    def __init__(self):
+        self.build_dir = None
+        self.hashed = {}
+        self.fingerprinted = frozenset()
+        self.encoded = {}
+        self._send_static_file = None
+
+    def init_app(self, app):
+        if not app.config.get("STATIC_BUILD_ENABLED"):
+            return
+        self.build_dir = app.config.get("STATIC_BUILD_DIR") or os.path.join(app.instance_path, "static-build")
+        manifest_path = os.path.join(self.build_dir, MANIFEST_NAME)
+        try:
+            with open(manifest_path, encoding="utf-8") as handle:
+                manifest = json.load(handle)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Static build disabled, could not read {manifest_path}: {e}")
+            return
+
+        self.hashed = manifest.get("files", {})
+        self.fingerprinted = frozenset(self.hashed.values())
+        self.encoded = {name: tuple(suffixes) for name, suffixes in manifest.get("encoded", {}).items()}
+        self._send_static_file = app.view_functions["static"]
+        app.view_functions["static"] = self.send_static
+        app.url_defaults(self.hashed_url)
+
+    def hashed_url(self, endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = self.hashed.get(values["filename"].lstrip("/"), values["filename"])
+
+    def send_static(self, filename):
+        path = safe_join(self.build_dir, filename)
+        if path is None or not os.path.isfile(path):
+            return self._send_static_file(filename=filename)
+
+        immutable = filename in self.fingerprinted
+        max_age = ASSET_MAX_AGE if immutable else None
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+        available = self.encoded.get(filename, ())
+        encoding = None
+        if available:
+            accepted = request.accept_encodings.best_match([name for suffix, name in ENCODINGS if suffix in available])
+            encoding = next(((suffix, name) for suffix, name in ENCODINGS if name == accepted), None)
+
+        if encoding:
+            response = send_file(path + encoding[0], mimetype=mimetype, max_age=max_age, conditional=True)
+            response.content_encoding = encoding[1]
+        else:
+            response = send_file(path, mimetype=mimetype, max_age=max_age, conditional=True)
+        if available:
+            response.vary.add("Accept-Encoding")
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        return response
+
+
+static_assets = StaticAssets()
@@ -0,0 +1,195 @@
+# app/services/subscription_bulk_service.py
+from datetime import datetime, timedelta, timezone
+import logging
+
+from sqlalchemy import case, insert, select, update
+
+from app.extensions import db
+from app.models.activity_log import ActivityLog
+from app.models.notifications import Notification
+from app.models.subscription import Subscription
+
+BULK_CHUNK_SIZE = 1000
+ACTIVE_STATUSES = ('active', 'trial')
+
+
+def chunked(ids, size=BULK_CHUNK_SIZE):
+    """Yield successive slices of ``ids`` of at most ``size`` items"""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+class BulkSubscriptionActions:
+    """Apply admin bulk actions as chunked set-based statements.
+
+    Each action issues one ``UPDATE ... WHERE id IN (...)`` (or one
+    multi-row ``INSERT``) per chunk instead of loading and mutating every
+    ``Subscription`` object. An audit ``ActivityLog`` row is written for
+    every affected subscription with a single ``insert().values([...])``
+    per chunk. The caller owns the transaction and commits once.
+    """
+
+    def __init__(self, admin_id, ids, chunk_size=BULK_CHUNK_SIZE, progress=None):
+        self.admin_id = int(admin_id)
+        self.ids = sorted({int(i) for i in ids})
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.processed = 0
+        self.chunks = 0
+
+    def _run(self, action, statement_for_chunk, details=None):
+        now = datetime.now(timezone.utc)
+        total = len(self.ids)
+        done = 0
+
+        for chunk in chunked(self.ids, self.chunk_size):
+            affected = db.session.execute(
+                statement_for_chunk(chunk, now),
+                execution_options={"synchronize_session": False}
+            ).scalars().all()
+
+            self._audit(action, affected, now, details)
+            self.processed += len(affected)
+            self.chunks += 1
+            done += len(chunk)
+
+            if self.progress:
+                self.progress(done, total)
+
+        return self.processed
+
+    def _audit(self, action, subscription_ids, now, details=None):
+        if not subscription_ids:
+            return
+        db.session.execute(
+            insert(ActivityLog).values([
+                {
+                    'user_id': self.admin_id,
+                    'action': f"Bulk subscription {action}",
+                    'details': dict(details or {}, subscription_id=sub_id, admin_action=True),
+                    'created_at': now.replace(tzinfo=None)
+                }
+                for sub_id in subscription_ids
+            ])
+        )
+
+    def extend(self, months):
+        """Extend every selected subscription by ``months`` billing periods"""
+        extension = timedelta(days=30 * months)
+
+        def statement(chunk, now):
+            new_end = case(
+                (Subscription.end_date > now, Subscription.end_date + extension),
+                else_=now + extension
+            )
+            return (
+                update(Subscription)
+                .where(Subscription.id.in_(chunk))
+                .values(
+                    end_date=new_end,
+                    current_period_end=new_end,
+                    next_billing_date=case(
+                        (Subscription.auto_renew == True, new_end),
+                        else_=Subscription.next_billing_date
+                    ),
+                    status='active',
+                    updated_at=now
+                )
+                .returning(Subscription.id)
+            )
+
+        return self._run('extend', statement, {'months': months})
+
+    def cancel(self, reason):
+        """Immediately cancel the selected subscriptions that are active or in trial"""
+        def statement(chunk, now):
+            return (
+                update(Subscription)
+                .where(
+                    Subscription.id.in_(chunk),
+                    Subscription.status.in_(ACTIVE_STATUSES)
+                )
+                .values(
+                    status='canceled',
+                    end_date=now,
+                    current_period_end=now,
+                    next_billing_date=None,
+                    canceled_at=now,
+                    cancellation_reason=reason,
+                    auto_renew=False,
+                    updated_at=now
+                )
+                .returning(Subscription.id)
+            )
+
+        return self._run('cancel', statement, {'reason': reason})
+
+    def change_plan(self, plan):
+        """Move the selected subscriptions to ``plan`` starting a fresh period"""
+        duration = timedelta(days=30 * plan.duration_months)
+
+        def statement(chunk, now):
+            return (
+                update(Subscription)
+                .where(Subscription.id.in_(chunk))
+                .values(
+                    plan_id=plan.id,
+                    end_date=now + duration,
+                    current_period_end=now + duration,
+                    updated_at=now
+                )
+                .returning(Subscription.id)
+            )
+
+        return self._run('change_plan', statement, {'new_plan_id': plan.id})
+
+    def send_notification(self, message, title=None):
+        """Insert one ``Notification`` per subscriber of the selected subscriptions"""
+        total = len(self.ids)
+        done = 0
+        notified_users = set()
+        now = datetime.now(timezone.utc)
+
+        for chunk in chunked(self.ids, self.chunk_size):
+            rows = db.session.execute(
+                select(Subscription.id, Subscription.user_id)
+                .where(Subscription.id.in_(chunk))
+            ).all()
+
+            recipients = []
+            for _, user_id in rows:
+                if user_id not in notified_users:
+                    notified_users.add(user_id)
+                    recipients.append(user_id)
+
+            if recipients:
+                db.session.execute(
+                    insert(Notification).values([
+                        {
+                            'coach_id': self.admin_id,
+                            'athlete_id': user_id,
+                            'title': title or "Subscription update",
+                            'content': message,
+                            'type': 'general',
+                            'priority': 'medium',
+                            'category': 'subscription',
+                            'extra_data': {},
+                            'sent_at': now.replace(tzinfo=None),
+                            'is_read': False,
+                            'delivery_status': 'sent',
+                            'delivery_attempts': 0
+                        }
+                        for user_id in recipients
+                    ])
+                )
+
+            self._audit('send_notification', [sub_id for sub_id, _ in rows], now)
+            self.processed += len(rows)
+            self.chunks += 1
+            done += len(chunk)
+
+            if self.progress:
+                self.progress(done, total)
+
+        logging.info(f"Bulk notification sent to {len(notified_users)} user(s)")
+        return self.processed
@@ -0,0 +1,163 @@
+# app/services/subscription_lifecycle_service.py
+from datetime import datetime, timedelta, timezone
+import logging
+import time
+
+from sqlalchemy import insert, or_, select, update
+
+from app.extensions import db
+from app.models.payments import Payment
+from app.models.subscription import Subscription
+from app.models.subscription_plans import SubscriptionPlan
+from app.services.usage_metering_service import usage_meter
+
+SWEEP_BATCH_SIZE = 500
+RENEWAL_GRACE_PERIOD = timedelta(days=3)
+
+# Stats of the most recent sweep, exposed to the admin API
+last_run_stats = {}
+
+
+def _transition(where, values, batch_size):
+    """Apply ``values`` to every subscription matching ``where`` in id batches.
+
+    Rows are picked with an indexed range query, ``LIMIT batch_size``, and
+    updated with one ``UPDATE ... WHERE id IN (...)`` per batch so a large
+    backlog never holds locks on the whole table at once.
+    """
+    total = 0
+    while True:
+        ids = db.session.execute(
+            select(Subscription.id).where(*where).order_by(Subscription.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        db.session.execute(
+            update(Subscription).where(Subscription.id.in_(ids)).values(**values),
+            execution_options={"synchronize_session": False}
+        )
+        db.session.commit()
+        total += len(ids)
+
+        if len(ids) < batch_size:
+            break
+    return total
+
+
+def _queue_renewals(now, batch_size):
+    """Create a pending renewal ``Payment`` for every subscription due for billing.
+
+    Queued subscriptions stay ``active`` and lose their
+    ``next_billing_date`` so they are never queued twice. The subscriber
+    pays the renewal through the provider checkout
+    (``/api/renewals/<id>/pay``), whose webhook extends the subscription;
+    only a failed charge moves it to ``past_due``.
+    """
+    total = 0
+    while True:
+        rows = db.session.execute(
+            select(Subscription.id, Subscription.billing_cycle, SubscriptionPlan.price)
+            .join(SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id)
+            .where(
+                Subscription.status == 'active',
+                Subscription.auto_renew == True,
+                Subscription.cancel_at_period_end == False,
+                Subscription.next_billing_date <= now
+            )
+            .order_by(Subscription.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        created_at = now.replace(tzinfo=None)
+        db.session.execute(
+            insert(Payment).values([
+                {
+                    'subscription_id': sub_id,
+                    'amount': price,
+                    'currency': 'USD',
+                    'status': 'pending',
+                    'extra_data': {'renewal': True, 'billing_cycle': billing_cycle},
+                    'created_at': created_at,
+                    'updated_at': created_at
+                }
+                for sub_id, billing_cycle, price in rows
+            ])
+        )
+        db.session.execute(
+            update(Subscription)
+            .where(Subscription.id.in_([row[0] for row in rows]))
+            .values(next_billing_date=None, updated_at=now),
+            execution_options={"synchronize_session": False}
+        )
+        db.session.commit()
+        total += len(rows)
+
+        if len(rows) < batch_size:
+            break
+    return total
+
+
+def sweep_subscriptions(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Move subscriptions whose dates have passed to their next lifecycle state.
+
+    Returns a dict of per-transition row counts, also kept in
+    ``last_run_stats``.
+    """
+    now = now or datetime.now(timezone.utc)
+    started = time.perf_counter()
+
+    stats = {
+        'canceled_at_period_end': _transition(
+            (
+                Subscription.cancel_at_period_end == True,
+                Subscription.status.in_(('active', 'trial', 'past_due')),
+                Subscription.end_date <= now
+            ),
+            {'status': 'canceled', 'next_billing_date': None, 'updated_at': now},
+            batch_size
+        ),
+        'renewals_queued': _queue_renewals(now, batch_size),
+        # Auto-renewing subscriptions keep the grace period to pay their queued renewal
+        'expired': _transition(
+            (
+                Subscription.status == 'active',
+                Subscription.end_date <= now,
+                or_(Subscription.auto_renew.isnot(True), Subscription.end_date <= now - RENEWAL_GRACE_PERIOD)
+            ),
+            {'status': 'expired', 'next_billing_date': None, 'updated_at': now},
+            batch_size
+        ),
+        'trials_ended': _transition(
+            (Subscription.status == 'trial', Subscription.trial_end_date <= now),
+            {'status': 'expired', 'next_billing_date': None, 'updated_at': now},
+            batch_size
+        ),
+        'past_due_expired': _transition(
+            (Subscription.status == 'past_due', Subscription.end_date <= now - RENEWAL_GRACE_PERIOD),
+            {'status': 'expired', 'updated_at': now},
+            batch_size
+        ),
+    }
+
+    stats['started_at'] = now.isoformat()
+    stats['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    last_run_stats.clear()
+    last_run_stats.update(stats)
+    usage_meter.invalidate()
+
+    logging.info(f"Subscription sweep finished: {stats}")
+    return stats
+
+
+def run_scheduled_sweep(app):
+    """Entry point for the scheduler, which runs outside of any app context"""
+    with app.app_context():
+        try:
+            sweep_subscriptions()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error in subscription sweep: {e}")
@@ -0,0 +1,98 @@
+# app/services/training_plan_service.py
+from sqlalchemy import desc, func, select
+
+from app.extensions import db
+from app.models.training_plan import TrainingPlan
+from app.models.user import User
+from app.models.workout_session import WorkoutSession
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Listing columns; the JSONB ``exercises`` payload is only read by plan_detail()
+LIST_COLUMNS = (
+    TrainingPlan.id,
+    TrainingPlan.athlete_id,
+    TrainingPlan.coach_id,
+    TrainingPlan.title,
+    TrainingPlan.description,
+    TrainingPlan.start_date,
+    TrainingPlan.end_date,
+    TrainingPlan.duration_weeks,
+    TrainingPlan.status,
+    TrainingPlan.progress,
+    TrainingPlan.image_url,
+    TrainingPlan.created_at,
+)
+
+
+def _plan_query(*columns):
+    """Plans joined to their athlete's name and the number of workout sessions they hold"""
+    return (
+        select(
+            *columns,
+            User.name.label('athlete_name'),
+            User.email.label('athlete_email'),
+            func.count(WorkoutSession.id).label('workout_count'),
+        )
+        .outerjoin(User, User.id == TrainingPlan.athlete_id)
+        .outerjoin(WorkoutSession, WorkoutSession.plan_id == TrainingPlan.id)
+        .group_by(TrainingPlan.id, User.name, User.email)
+    )
+
+
+def serialize_plan(row):
+    plan = {
+        'id': row.id,
+        'athlete_id': row.athlete_id,
+        'athlete_name': row.athlete_name or 'Unknown',
+        'title': row.title,
+        'description': row.description,
+        'start_date': row.start_date.isoformat() if row.start_date else None,
+        'end_date': row.end_date.isoformat() if row.end_date else None,
+        'duration_weeks': row.duration_weeks,
+        'status': row.status,
+        'progress': row.progress,
+        'image_url': row.image_url,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'workout_count': row.workout_count or 0
+    }
+    if 'exercises' in row._fields:
+        plan['athlete_email'] = row.athlete_email or 'Unknown'
+        plan['exercises'] = row.exercises or {}
+    return plan
+
+
+def limit_arg(args, default=DEFAULT_LIMIT):
+    return min(max(args.get('limit', default, type=int) or default, 1), MAX_LIMIT)
+
+
+def plan_rows(*criteria, after=None, limit=None):
+    """Plan summary rows, newest first, keyset-paginated on ``id``.
+
+    ``after`` is the id of the last plan of the previous page, so every page
+    is an index range scan no matter how deep the caller pages.
+    """
+    query = _plan_query(*LIST_COLUMNS).where(*criteria)
+    if after:
+        query = query.where(TrainingPlan.id < after)
+    query = query.order_by(desc(TrainingPlan.id))
+    if limit:
+        query = query.limit(limit)
+    return db.session.execute(query).all()
+
+
+def plan_page(*criteria, after=None, limit=DEFAULT_LIMIT):
+    """One page of serialized plans and the cursor of the next page (None on the last one)"""
+    rows = plan_rows(*criteria, after=after, limit=limit + 1)
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return [serialize_plan(row) for row in rows[:limit]], next_cursor
+
+
+def plan_detail(plan_id, *criteria):
+    """A single plan with its ``exercises`` payload, or None"""
+    row = db.session.execute(
+        _plan_query(*LIST_COLUMNS, TrainingPlan.exercises)
+        .where(TrainingPlan.id == plan_id, *criteria)
+    ).first()
+    return serialize_plan(row) if row else None
@@ -0,0 +1,173 @@
+# app/services/usage_metering_service.py
+from collections import defaultdict
+import logging
+import threading
+import time
+
+from sqlalchemy import bindparam, select, update
+
+from app.extensions import db
+from app.models.subscription import Subscription
+from app.models.subscription_usage import SubscriptionUsage
+from app.services.metrics_service import metrics
+
+METERED_FEATURES = ('athletes', 'workouts', 'storage')
+QUOTA_TTL_SECONDS = 60
+FLUSH_THRESHOLD = 200
+
+
+class QuotaView:
+    """Current usage and limits of one subscription, keyed by feature"""
+
+    __slots__ = ('subscription_id', 'limits', 'used', 'loaded_at')
+
+    def __init__(self, subscription_id, limits, used):
+        self.subscription_id = subscription_id
+        self.limits = limits
+        self.used = used
+        self.loaded_at = time.monotonic()
+
+    def remaining(self, feature):
+        limit = self.limits.get(feature)
+        if not limit or limit <= 0:
+            return None  # unlimited
+        return limit - self.used.get(feature, 0)
+
+
+class UsageMeter:
+    """Meter subscription usage in memory and flush it to the database in batches.
+
+    ``record`` bumps an in-process counter and the cached quota view of the
+    user, so ``check`` answers plan-limit questions without touching the
+    database. Pending deltas are written with one executemany
+    ``UPDATE subscription_usage SET usage_count = usage_count + :delta``
+    once ``FLUSH_THRESHOLD`` increments accumulate or on the periodic flush
+    job, whichever comes first.
+    """
+
+    def __init__(self, flush_threshold=FLUSH_THRESHOLD, quota_ttl=QUOTA_TTL_SECONDS):
+        self.flush_threshold = flush_threshold
+        self.quota_ttl = quota_ttl
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)  # (subscription_id, feature) -> delta
+        self._pending_events = 0
+        self._quotas = {}  # user_id -> QuotaView, or None when no subscription
+
+    # ------- quota view -------
+    def _load_quota(self, user_id):
+        rows = db.session.execute(
+            select(Subscription.id, SubscriptionUsage.feature,
+                   SubscriptionUsage.usage_count, SubscriptionUsage.usage_limit)
+            .join(SubscriptionUsage, SubscriptionUsage.subscription_id == Subscription.id)
+            .where(
+                Subscription.user_id == user_id,
+                Subscription.status.in_(('active', 'trial'))
+            )
+            .order_by(Subscription.id.desc())
+        ).all()
+        if not rows:
+            return None
+
+        subscription_id = rows[0][0]
+        limits, used = {}, {}
+        with self._lock:
+            for sub_id, feature, usage_count, usage_limit in rows:
+                if sub_id != subscription_id:
+                    continue
+                limits[feature] = (usage_limit or 0) * SubscriptionUsage.LIMIT_SCALE.get(feature, 1)
+                used[feature] = (usage_count or 0) + self._pending.get((sub_id, feature), 0)
+        return QuotaView(subscription_id, limits, used)
+
+    def quota(self, user_id):
+        """Return the cached ``QuotaView`` of a user, or None without a live subscription"""
+        user_id = int(user_id)
+        with self._lock:
+            view = self._quotas.get(user_id, False)
+        if view is not False and (view is None or time.monotonic() - view.loaded_at < self.quota_ttl):
+            metrics.cache_lookup("usage_quota", True)
+            return view
+
+        metrics.cache_lookup("usage_quota", False)
+        view = self._load_quota(user_id)
+        with self._lock:
+            self._quotas[user_id] = view
+        return view
+
+    def invalidate(self, user_id=None):
+        """Drop the cached quota view of one user, or of everyone"""
+        with self._lock:
+            if user_id is None:
+                self._quotas.clear()
+            else:
+                self._quotas.pop(int(user_id), None)
+
+    # ------- metering -------
+    def check(self, user_id, feature, amount=1):
+        """Return True when ``amount`` more units of ``feature`` fit in the user's plan"""
+        view = self.quota(user_id)
+        if view is None:
+            return True
+        remaining = view.remaining(feature)
+        return remaining is None or remaining >= amount
+
+    def record(self, user_id, feature, amount=1):
+        """Count ``amount`` units of ``feature`` against the user's current subscription"""
+        if feature not in METERED_FEATURES or not amount:
+            return
+        view = self.quota(user_id)
+        if view is None:
+            return
+
+        with self._lock:
+            view.used[feature] = view.used.get(feature, 0) + amount
+            self._pending[(view.subscription_id, feature)] += amount
+            self._pending_events += 1
+            should_flush = self._pending_events >= self.flush_threshold
+
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """Write pending deltas in one batched statement on a separate connection"""
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, defaultdict(int)
+            self._pending_events = 0
+
+        usage = SubscriptionUsage.__table__
+        params = [
+            {'b_subscription_id': sub_id, 'b_feature': feature, 'b_delta': delta}
+            for (sub_id, feature), delta in pending.items() if delta
+        ]
+        if not params:
+            return 0
+
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    update(usage)
+                    .where(
+                        usage.c.subscription_id == bindparam('b_subscription_id'),
+                        usage.c.feature == bindparam('b_feature')
+                    )
+                    .values(usage_count=usage.c.usage_count + bindparam('b_delta')),
+                    params
+                )
+        except Exception as e:
+            logging.error(f"Error flushing usage counters: {e}")
+            with self._lock:
+                for key, delta in pending.items():
+                    self._pending[key] += delta
+            return 0
+
+        return len(params)
+
+
+usage_meter = UsageMeter()
+
+
+def run_scheduled_flush(app):
+    """Entry point for the scheduler, which runs outside of any app context"""
+    with app.app_context():
+        usage_meter.flush()
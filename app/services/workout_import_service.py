@@ -0,0 +1,402 @@
+# app/services/workout_import_service.py
+from datetime import datetime, timedelta, timezone
+import codecs
+import csv
+import logging
+import re
+import time
+
+import ijson
+from dateutil import parser as date_parser
+from sqlalchemy import insert, select
+
+from app.extensions import db
+from app.models.health_record import HealthRecord
+from app.models.workout_log import WorkoutLog
+from app.services.usage_metering_service import usage_meter
+
+IMPORT_BATCH_SIZE = 500
+SOURCES = ('csv', 'json', 'apple_health', 'google_fit')
+
+# Normalized column/key name -> WorkoutLog field
+WORKOUT_ALIASES = {
+    'start_time': ('start_time', 'start', 'startdate', 'start_date', 'starttime', 'starttimemillis'),
+    'end_time': ('end_time', 'end', 'enddate', 'end_date', 'endtime', 'endtimemillis'),
+    'workout_type': ('workout_type', 'type', 'activity', 'activity_type', 'activitytype',
+                     'fitnessactivity', 'workoutactivitytype', 'sport'),
+    'title': ('title', 'name'),
+    'duration': ('duration', 'duration_minutes', 'actual_duration', 'duration_min'),
+    'duration_seconds': ('duration_seconds', 'duration_sec', 'active_time'),
+    'calories_burned': ('calories_burned', 'calories', 'active_energy', 'activeenergy',
+                        'activeenergyburned', 'total_energy', 'energy', 'kcal'),
+    'avg_heart_rate': ('avg_heart_rate', 'average_heart_rate', 'avgheartrate', 'avg_hr', 'heart_rate_avg'),
+    'max_heart_rate': ('max_heart_rate', 'maxheartrate', 'max_hr', 'heart_rate_max'),
+    'distance': ('distance', 'distance_km', 'total_distance'),
+}
+
+# Normalized column/key name -> (HealthRecord field, how values of one day combine)
+HEALTH_ALIASES = {
+    'weight': ('weight', 'last'), 'weight_body_mass': ('weight', 'last'), 'body_mass': ('weight', 'last'),
+    'height': ('height', 'last'),
+    'heart_rate': ('heart_rate', 'avg'), 'resting_heart_rate': ('heart_rate', 'avg'),
+    'average_heart_rate': ('heart_rate', 'avg'),
+    'steps': ('steps', 'sum'), 'step_count': ('steps', 'sum'),
+    'sleep_hours': ('sleep_hours', 'sum'), 'sleep_analysis': ('sleep_hours', 'sum'), 'sleep': ('sleep_hours', 'sum'),
+    'calories_intake': ('calories_intake', 'sum'), 'dietary_energy': ('calories_intake', 'sum'),
+    'active_energy': ('calories_burned', 'sum'), 'calories_burned': ('calories_burned', 'sum'),
+    'calories_expended': ('calories_burned', 'sum'), 'calories': ('calories_burned', 'sum'),
+    'hrv': ('hrv', 'avg'), 'heart_rate_variability': ('hrv', 'avg'),
+    'spo2': ('spo2', 'avg'), 'blood_oxygen_saturation': ('spo2', 'avg'), 'oxygen_saturation': ('spo2', 'avg'),
+    'hydration': ('hydration', 'sum'), 'water': ('hydration', 'sum'),
+}
+HEALTH_DATE_KEYS = ('date', 'day', 'recorded_at', 'timestamp')
+INTEGER_HEALTH_FIELDS = {'heart_rate', 'steps', 'calories_intake', 'calories_burned', 'spo2'}
+
+GOOGLE_FIT_METRICS = {
+    'com.google.calories.expended': 'calories_burned',
+    'com.google.heart_rate.bpm': 'avg_heart_rate',
+    'com.google.distance.delta': 'distance',
+}
+
+
+class WorkoutImportError(ValueError):
+    """Raised when an upload cannot be read as the requested source"""
+
+
+def normalize_key(key):
+    """``"Calories (kcal)"`` -> ``calories``, ``"startDate"`` -> ``startdate``"""
+    key = re.sub(r'\(.*?\)', '', str(key)).strip().lower()
+    return re.sub(r'[\s\-]+', '_', key).strip('_')
+
+
+def _number(value):
+    if isinstance(value, dict):  # {"qty": 123, "units": "kcal"}
+        value = value.get('qty', value.get('value'))
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = value.strip().rstrip('s')  # Google Fit durations look like "1800.000s"
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp(value):
+    """Parse ISO strings, free-form dates and epoch seconds/millis into naive UTC"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise WorkoutImportError(f"Unreadable timestamp: {value!r}")
+    if isinstance(value, str) and not value.strip().isdigit():
+        try:
+            moment = date_parser.parse(value)
+        except (ValueError, OverflowError):
+            return None
+    else:
+        number = float(value)
+        try:
+            moment = datetime.fromtimestamp(number / 1000 if number > 1e11 else number, tz=timezone.utc)
+        except (ValueError, OverflowError, OSError) as e:
+            raise WorkoutImportError(f"Timestamp out of range: {value!r}") from e
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _pick(record, aliases):
+    for alias in aliases:
+        if record.get(alias) not in (None, ''):
+            return record[alias]
+    return None
+
+
+# ------- record readers -------
+def iter_csv(stream):
+    """Yield one normalized dict per CSV row without loading the file"""
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    for row in reader:
+        yield {normalize_key(key): value for key, value in row.items() if key is not None}
+
+
+def _sniff_json(stream):
+    """Return ``('array', None)`` or ``('map', first_key)`` for a JSON document"""
+    shape = first_key = None
+    for prefix, event, value in ijson.parse(stream):
+        if prefix == '' and event == 'start_array':
+            shape = 'array'
+            break
+        if prefix == '' and event == 'start_map':
+            shape = 'map'
+            continue
+        if prefix == '' and event == 'map_key':
+            first_key = value
+            break
+    stream.seek(0)
+    return shape, first_key
+
+
+def _apple_metric_records(metric):
+    """Flatten one Health Auto Export metric into ``{"date": ..., name: qty}`` records"""
+    name = normalize_key(metric.get('name', ''))
+    for point in metric.get('data') or []:
+        value = point.get('qty', point.get('Avg', point.get('asleep', point.get('totalSleep'))))
+        yield {'date': point.get('date'), name: value}
+
+
+def _google_session_record(session):
+    active_millis = _number(session.get('activeTimeMillis'))
+    record = {
+        'start_time': session.get('startTime') or session.get('startTimeMillis'),
+        'end_time': session.get('endTime') or session.get('endTimeMillis'),
+        'workout_type': session.get('fitnessActivity') or session.get('activityType'),
+        'title': session.get('name'),
+        'duration_seconds': session.get('duration') or (active_millis / 1000 if active_millis else None),
+    }
+    for aggregate in session.get('aggregate') or []:
+        field = GOOGLE_FIT_METRICS.get(aggregate.get('metricName'))
+        if field:
+            record[field] = aggregate.get('floatValue', aggregate.get('intValue'))
+    return record
+
+
+def _apple_workout_record(workout):
+    record = {normalize_key(key): value for key, value in workout.items()}
+    if 'duration' in record:  # Health Auto Export reports seconds
+        record['duration_seconds'] = record.pop('duration')
+    return record
+
+
+def iter_json(stream):
+    """Yield normalized records from a JSON export, streaming list items.
+
+    Understands Health Auto Export style ``{"data": {"workouts": [...],
+    "metrics": [...]}}`` dumps, Google Fit ``{"session": [...]}`` lists and
+    single Takeout session files, and plain arrays of flat records.
+    """
+    shape, first_key = _sniff_json(stream)
+    if shape == 'array':
+        for item in ijson.items(stream, 'item'):
+            if 'fitnessActivity' in item or 'activityType' in item:
+                item = _google_session_record(item)
+            yield {normalize_key(key): value for key, value in item.items()}
+    elif first_key == 'data':
+        for workout in ijson.items(stream, 'data.workouts.item'):
+            yield _apple_workout_record(workout)
+        stream.seek(0)
+        for metric in ijson.items(stream, 'data.metrics.item'):
+            yield from _apple_metric_records(metric)
+    elif first_key == 'session':
+        for session in ijson.items(stream, 'session.item'):
+            yield {normalize_key(key): value for key, value in _google_session_record(session).items()}
+    elif shape == 'map':
+        for document in ijson.items(stream, ''):
+            yield {normalize_key(key): value for key, value in _google_session_record(document).items()}
+
+
+# ------- importer -------
+class WorkoutImporter:
+    """Import a wearable or CSV history for one athlete.
+
+    Records are streamed from the upload and split into workouts, which are
+    deduplicated against existing ``(athlete_id, start_time)`` rows and
+    inserted ``batch_size`` at a time with one executemany ``INSERT``, and
+    health metrics, which are rolled up to one ``HealthRecord`` per day.
+    Workouts beyond what the plan still allows are not inserted and are
+    counted as ``workouts_over_limit``. Progress is recalculated once after
+    the last batch.
+    """
+
+    def __init__(self, athlete_id, source=None, batch_size=IMPORT_BATCH_SIZE):
+        self.athlete_id = int(athlete_id)
+        self.source = source
+        self.batch_size = batch_size
+        self.stats = {
+            'workouts_imported': 0, 'workouts_skipped': 0,
+            'health_records_imported': 0, 'health_records_skipped': 0,
+            'rows_rejected': 0, 'workouts_over_limit': 0,
+        }
+        self._workout_quota = None  # workouts the plan still allows; None = unlimited
+        self._workouts = []
+        self._seen_starts = set()
+        self._days = {}  # date -> {field: [op, total, count]}
+
+    def _records(self, file_storage):
+        source = self.source
+        if source is None:
+            source = 'csv' if (file_storage.filename or '').lower().endswith('.csv') else 'json'
+        if source not in SOURCES:
+            raise WorkoutImportError(f"Unsupported import source: {source}")
+        self.source = source
+        stream = file_storage.stream
+        return iter_csv(stream) if source == 'csv' else iter_json(stream)
+
+    # ------- workouts -------
+    def _workout_row(self, record, now):
+        start = _timestamp(_pick(record, WORKOUT_ALIASES['start_time']))
+        if start is None:
+            return None
+        end = _timestamp(_pick(record, WORKOUT_ALIASES['end_time']))
+
+        duration = _number(_pick(record, WORKOUT_ALIASES['duration']))
+        seconds = _number(_pick(record, WORKOUT_ALIASES['duration_seconds']))
+        if seconds is not None:
+            duration = seconds / 60
+        if duration is None and end is not None:
+            duration = (end - start).total_seconds() / 60
+        if end is None and duration:
+            end = start + timedelta(minutes=duration)
+
+        workout_type = str(_pick(record, WORKOUT_ALIASES['workout_type']) or 'other').strip().lower()
+        calories = _number(_pick(record, WORKOUT_ALIASES['calories_burned']))
+        avg_hr = _number(_pick(record, WORKOUT_ALIASES['avg_heart_rate']))
+        max_hr = _number(_pick(record, WORKOUT_ALIASES['max_heart_rate']))
+        distance = _number(_pick(record, WORKOUT_ALIASES['distance']))
+        minutes = int(round(duration)) if duration is not None else None
+
+        return {
+            'athlete_id': self.athlete_id,
+            'title': str(_pick(record, WORKOUT_ALIASES['title']) or workout_type.replace('_', ' ').title())[:150],
+            'workout_type': workout_type[:50],
+            'session_type': 'workout',
+            'planned_duration': minutes,
+            'actual_duration': minutes,
+            'total_time': minutes,
+            'calories_burned': int(round(calories)) if calories is not None else 0,
+            'avg_heart_rate': int(round(avg_hr)) if avg_hr is not None else None,
+            'max_heart_rate': int(round(max_hr)) if max_hr is not None else None,
+            'completion_status': 'completed',
+            'difficulty_level': 'beginner',
+            'date': start.date(),
+            'start_time': start,
+            'end_time': end,
+            'logged_at': now,
+            'workout_details': {'imported': True, 'source': self.source},
+            'metrics': {'distance': distance} if distance is not None else {},
+            'heart_rate_data': {},
+        }
+
+    def _flush_workouts(self):
+        rows, self._workouts = self._workouts, []
+        if not rows:
+            return
+
+        starts = [row['start_time'] for row in rows]
+        existing = set(db.session.execute(
+            select(WorkoutLog.start_time).where(
+                WorkoutLog.athlete_id == self.athlete_id,
+                WorkoutLog.start_time.in_(starts)
+            )
+        ).scalars())
+        fresh = [row for row in rows if row['start_time'] not in existing]
+        self.stats['workouts_skipped'] += len(rows) - len(fresh)
+        if self._workout_quota is not None:
+            allowed = max(self._workout_quota - self.stats['workouts_imported'], 0)
+            if len(fresh) > allowed:
+                self.stats['workouts_over_limit'] += len(fresh) - allowed
+                fresh = fresh[:allowed]
+
+        if fresh:
+            db.session.execute(insert(WorkoutLog.__table__), fresh)
+            db.session.commit()
+            self.stats['workouts_imported'] += len(fresh)
+
+    # ------- health metrics -------
+    def _collect_health(self, record):
+        when = _timestamp(_pick(record, HEALTH_DATE_KEYS))
+        if when is None:
+            return False
+
+        collected = False
+        day = self._days.setdefault(when.date(), {})
+        for key, value in record.items():
+            target = HEALTH_ALIASES.get(key)
+            number = _number(value) if target else None
+            if number is None:
+                continue
+            field, op = target
+            slot = day.setdefault(field, [op, 0.0, 0])
+            slot[1] = number if op == 'last' else slot[1] + number
+            slot[2] += 1
+            collected = True
+        return collected
+
+    def _flush_health(self):
+        if not self._days:
+            return
+
+        rows = []
+        for day, fields in self._days.items():
+            row = {key: None for key in ('weight', 'height', 'heart_rate', 'steps', 'sleep_hours',
+                                         'calories_intake', 'calories_burned', 'hrv', 'spo2', 'hydration')}
+            for field, (op, total, count) in fields.items():
+                value = total / count if op == 'avg' else total
+                row[field] = int(round(value)) if field in INTEGER_HEALTH_FIELDS else round(value, 2)
+            row['athlete_id'] = self.athlete_id
+            row['recorded_at'] = datetime.combine(day, datetime.min.time())
+            rows.append(row)
+        self._days = {}
+
+        rows.sort(key=lambda row: row['recorded_at'])
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            # Any record on the same day counts, not only one stamped at midnight
+            existing = {moment.date() for moment in db.session.execute(
+                select(HealthRecord.recorded_at).where(
+                    HealthRecord.athlete_id == self.athlete_id,
+                    HealthRecord.recorded_at >= batch[0]['recorded_at'],
+                    HealthRecord.recorded_at < batch[-1]['recorded_at'] + timedelta(days=1)
+                )
+            ).scalars()}
+            fresh = [row for row in batch if row['recorded_at'].date() not in existing]
+            self.stats['health_records_skipped'] += len(batch) - len(fresh)
+            if fresh:
+                db.session.execute(insert(HealthRecord.__table__), fresh)
+                db.session.commit()
+                self.stats['health_records_imported'] += len(fresh)
+
+    # ------- entry point -------
+    def run(self, file_storage):
+        started = time.perf_counter()
+        now = datetime.utcnow()
+
+        quota = usage_meter.quota(self.athlete_id)
+        if quota is not None:
+            remaining = quota.remaining('workouts')
+            self._workout_quota = max(remaining, 0) if remaining is not None else None
+
+        try:
+            for record in self._records(file_storage):
+                try:
+                    row = self._workout_row(record, now) if _pick(record, WORKOUT_ALIASES['start_time']) else None
+                    collected = row is not None or self._collect_health(record)
+                except WorkoutImportError:
+                    self.stats['rows_rejected'] += 1
+                    continue
+                if row is not None:
+                    if row['start_time'] in self._seen_starts:
+                        self.stats['workouts_skipped'] += 1
+                        continue
+                    self._seen_starts.add(row['start_time'])
+                    self._workouts.append(row)
+                    if len(self._workouts) >= self.batch_size:
+                        self._flush_workouts()
+                elif not collected:
+                    self.stats['rows_rejected'] += 1
+
+            self._flush_workouts()
+            self._flush_health()
+        except (ijson.JSONError, csv.Error, UnicodeDecodeError) as e:
+            db.session.rollback()
+            raise WorkoutImportError(f"Could not parse {self.source} file: {e}") from e
+
+        if self.stats['workouts_imported']:
+            usage_meter.record(self.athlete_id, 'workouts', self.stats['workouts_imported'])
+        if self.stats['workouts_imported'] or self.stats['health_records_imported']:
+            from app.routes.player.progress import save_calculated_progress_optimized
+            save_calculated_progress_optimized(self.athlete_id)
+
+        self.stats['source'] = self.source
+        self.stats['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        logging.info(f"Workout import for athlete {self.athlete_id} finished: {self.stats}")
+        return self.stats
@@ -0,0 +1,188 @@
+# app/services/workout_list_service.py
+import json
+import time
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.orm import defer
+
+from app.extensions import db
+from app.models.user import User
+from app.models.workout_log import WorkoutLog
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+# Only the columns list views render; the JSONB blobs stay in the database
+SUMMARY_COLUMNS = (
+    WorkoutLog.id,
+    WorkoutLog.athlete_id,
+    WorkoutLog.title,
+    WorkoutLog.workout_type,
+    WorkoutLog.session_type,
+    WorkoutLog.planned_duration,
+    WorkoutLog.actual_duration,
+    WorkoutLog.total_time,
+    WorkoutLog.calories_burned,
+    WorkoutLog.avg_heart_rate,
+    WorkoutLog.max_heart_rate,
+    WorkoutLog.min_heart_rate,
+    WorkoutLog.hr_sample_count,
+    WorkoutLog.hr_zone_anaerobic,
+    WorkoutLog.hr_zone_aerobic,
+    WorkoutLog.hr_zone_intensive,
+    WorkoutLog.hr_zone_light,
+    WorkoutLog.hr_zone_relaxed,
+    WorkoutLog.training_effect_aerobic,
+    WorkoutLog.training_effect_anaerobic,
+    WorkoutLog.recovery_time,
+    WorkoutLog.completion_status,
+    WorkoutLog.difficulty_level,
+    WorkoutLog.date,
+    WorkoutLog.start_time,
+    WorkoutLog.end_time,
+    WorkoutLog.feedback,
+    WorkoutLog.notes,
+    WorkoutLog.image_url,
+)
+
+
+def summary_query(*criteria, order_by=None):
+    """``SELECT`` of the summary columns plus ``athlete_name``, one row per workout"""
+    query = (
+        select(*SUMMARY_COLUMNS, User.name.label('athlete_name'))
+        .outerjoin(User, User.id == WorkoutLog.athlete_id)
+        .where(*criteria)
+    )
+    if order_by is None:
+        order_by = (desc(WorkoutLog.date), desc(WorkoutLog.logged_at))
+    return query.order_by(*order_by)
+
+
+def serialize_summary(row):
+    """Turn a summary row (a named tuple) into the list-view shape of ``WorkoutLog.to_dict()``"""
+    return {
+        "id": row.id,
+        "athlete_id": row.athlete_id,
+        "athlete_name": row.athlete_name or 'Unknown',
+        "title": row.title,
+        "workout_type": row.workout_type,
+        "session_type": row.session_type,
+        "planned_duration": row.planned_duration,
+        "actual_duration": row.actual_duration,
+        "total_time": row.total_time,
+        "calories_burned": row.calories_burned,
+        "avg_heart_rate": row.avg_heart_rate,
+        "max_heart_rate": row.max_heart_rate,
+        "min_heart_rate": row.min_heart_rate,
+        "hr_sample_count": row.hr_sample_count or 0,
+        "hr_zones": {
+            "anaerobic": row.hr_zone_anaerobic,
+            "aerobic": row.hr_zone_aerobic,
+            "intensive": row.hr_zone_intensive,
+            "light": row.hr_zone_light,
+            "relaxed": row.hr_zone_relaxed
+        },
+        "training_effect": {
+            "aerobic": row.training_effect_aerobic,
+            "anaerobic": row.training_effect_anaerobic
+        },
+        "recovery_time": row.recovery_time,
+        "completion_status": row.completion_status,
+        "difficulty_level": row.difficulty_level,
+        "date": row.date.isoformat() if row.date else None,
+        "start_time": row.start_time.isoformat() if row.start_time else None,
+        "end_time": row.end_time.isoformat() if row.end_time else None,
+        "feedback": row.feedback,
+        "notes": row.notes,
+        "image_url": row.image_url
+    }
+
+
+def page_args(args, default_per_page=DEFAULT_PER_PAGE):
+    """Read ``page``/``per_page`` from request args, clamped to sane bounds"""
+    page = max(args.get('page', 1, type=int) or 1, 1)
+    per_page = min(max(args.get('per_page', default_per_page, type=int) or default_per_page, 1), MAX_PER_PAGE)
+    return page, per_page
+
+
+def fetch_page(query, page=1, per_page=DEFAULT_PER_PAGE):
+    """Run a summary query for one page and return ``(items, pagination)``"""
+    total = db.session.execute(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    ).scalar()
+    rows = db.session.execute(query.limit(per_page).offset((page - 1) * per_page)).all()
+    pagination = {
+        "page": page,
+        "pages": (total + per_page - 1) // per_page if total else 0,
+        "per_page": per_page,
+        "total": total
+    }
+    return [serialize_summary(row) for row in rows], pagination
+
+
+def fetch_rows(query, limit=None):
+    if limit:
+        query = query.limit(limit)
+    return [serialize_summary(row) for row in db.session.execute(query).all()]
+
+
+def fetch_list(query, args, default_per_page=DEFAULT_PER_PAGE):
+    """``(items, headers)`` for a list endpoint: one page, with the ``X-Page``/``X-Total-Count`` headers.
+
+    Requests without ``page``/``per_page`` get the first ``default_per_page``
+    rows; ``per_page`` is capped at ``MAX_PER_PAGE``.
+    """
+    page, per_page = page_args(args, default_per_page)
+    items, pagination = fetch_page(query, page, per_page)
+    return items, pagination_headers(pagination)
+
+
+def pagination_headers(pagination):
+    """List endpoints keep returning a JSON array; paging metadata travels in headers"""
+    return {
+        "X-Page": str(pagination["page"]),
+        "X-Pages": str(pagination["pages"]),
+        "X-Per-Page": str(pagination["per_page"]),
+        "X-Total-Count": str(pagination["total"]),
+    }
+
+
+def benchmark_serialization(limit=1000, repeat=5):
+    """Time the ORM ``to_dict()`` path against the projected summary path.
+
+    Both paths load the same ``limit`` most recent workouts and encode them
+    to JSON; the best of ``repeat`` runs is reported for each.
+    """
+    def orm_path():
+        workouts = (
+            WorkoutLog.query
+            .options(defer(WorkoutLog.heart_rate_data))
+            .order_by(desc(WorkoutLog.date), desc(WorkoutLog.logged_at))
+            .limit(limit)
+            .all()
+        )
+        items = []
+        for workout in workouts:
+            item = workout.to_dict()
+            item['athlete_name'] = workout.athlete.name if workout.athlete else 'Unknown'
+            items.append(item)
+        return json.dumps(items)
+
+    def summary_path():
+        return json.dumps(fetch_rows(summary_query(), limit=limit))
+
+    results = {}
+    for name, path in (("orm_to_dict", orm_path), ("summary_rows", summary_path)):
+        best, payload = None, ''
+        for _ in range(repeat):
+            db.session.expunge_all()
+            started = time.perf_counter()
+            payload = path()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {"best_ms": round(best * 1000, 2), "bytes": len(payload)}
+
+    results["limit"] = limit
+    if results["summary_rows"]["best_ms"]:
+        results["speedup"] = round(results["orm_to_dict"]["best_ms"] / results["summary_rows"]["best_ms"], 2)
+    return results
@@ -0,0 +1,38 @@
+// Personalises the cached navbar/sidebar fragments with the signed-in user's
+// name, avatar and admin permissions from /me. The last answer is kept in
+// sessionStorage so navigation paints immediately; /me revalidates with an ETag.
+// Permission-gated items render hidden and are only revealed here.
+(function () {
+  const STORAGE_KEY = 'layout_user';
+
+  function apply(user) {
+    if (!user) return;
+    document.querySelectorAll('[data-user-name]').forEach(el => { el.textContent = user.name; });
+    document.querySelectorAll('[data-user-avatar]').forEach(el => { el.src = user.avatar; });
+
+    if (user.role !== 'admin') return;
+    const granted = new Set(user.permissions || []);
+    document.querySelectorAll('[data-permission]').forEach(el => {
+      const needed = el.dataset.permission.split(' ');
+      const allowed = user.is_superadmin || needed.some(key => granted.has(key));
+      el.hidden = !allowed;
+    });
+  }
+
+  let cached = null;
+  try {
+    cached = JSON.parse(sessionStorage.getItem(STORAGE_KEY));
+  } catch (e) {
+    cached = null;
+  }
+  apply(cached);
+
+  fetch('/me', { credentials: 'same-origin' })
+    .then(response => (response.ok ? response.json() : null))
+    .then(user => {
+      if (!user) return;
+      sessionStorage.setItem(STORAGE_KEY, JSON.stringify(user));
+      apply(user);
+    })
+    .catch(() => {});
+})();
@@ -1,10 +1,11 @@
 import eventlet
 eventlet.monkey_patch()
 
-from app import create_app
+from app import create_app, start_background_jobs
 from app.extensions import socketio
 
 app = create_app()
+start_background_jobs(app)  # no-op inside `flask` CLI commands
 
 if __name__ == "__main__":
     socketio.run(app, host="0.0.0.0", port=5000)